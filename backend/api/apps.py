@@ -2,3 +2,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = "api"
+
+    def ready(self):
+        # Keeps the in-memory "landmarks near me" index in step with the Landmark table
+        from .landmark_index import connect_signals
+        connect_signals()
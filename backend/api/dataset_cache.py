@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+
+# ---------------- Config ----------------
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "preprocessed")
+IMG_SIZE = 224
+IMG_EXTENSIONS = (".jpg", ".jpeg", ".png", ".ppm", ".bmp", ".pgm", ".tif", ".tiff", ".webp")
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+
+MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
+STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
+
+# Layout per class under data/cache/preprocessed/:
+#   <class>.u8    raw uint8 array of shape (N, IMG_SIZE, IMG_SIZE, 3)
+#   <class>.json  {"img_size", "count", "files": [[name, size, mtime_ns], ...], "skipped": [...]}
+# The .json is only rewritten after the new rows are on disk, so a crash
+# mid-append just leaves unused bytes at the end of the .u8 file.
+
+
+def image_files(folder):
+    return sorted(
+        f for f in os.listdir(folder)
+        if f.lower().endswith(IMG_EXTENSIONS) and os.path.isfile(os.path.join(folder, f))
+    )
+
+
+def _file_key(folder, name):
+    st = os.stat(os.path.join(folder, name))
+    return [name, st.st_size, st.st_mtime_ns]
+
+
+def decode_image(path):
+    """Decode + resize one image to a (IMG_SIZE, IMG_SIZE, 3) uint8 array, or None if unreadable."""
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (IMG_SIZE, IMG_SIZE))  # cheap JPEG downscale while decoding
+            img = img.convert("RGB").resize((IMG_SIZE, IMG_SIZE), Image.BILINEAR)
+            return np.asarray(img, dtype=np.uint8)
+    except Exception as e:
+        print(f"Skipping unreadable image {path}: {e}")
+        return None
+
+
+def _load_index(class_name):
+    try:
+        with open(os.path.join(CACHE_DIR, f"{class_name}.json")) as f:
+            index = json.load(f)
+        if index.get("img_size") == IMG_SIZE:
+            return index
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return None
+
+
+def _save_index(class_name, index):
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(CACHE_DIR, f"{class_name}.json"))
+
+
+def sync_class(data_dir, class_name):
+    """
+    Brings one class's cache up to date with data/raw/<class_name>.
+    New files are decoded and appended; if files were removed or changed the
+    class is rebuilt. Returns the number of cached images.
+    """
+    folder = os.path.join(data_dir, class_name)
+    data_path = os.path.join(CACHE_DIR, f"{class_name}.u8")
+    current = {name: _file_key(folder, name) for name in image_files(folder)}
+
+    index = _load_index(class_name)
+    cached_ok = index is not None and all(current.get(entry[0]) == entry for entry in index["files"])
+    if not cached_ok:
+        index = {"img_size": IMG_SIZE, "count": 0, "files": [], "skipped": []}
+        if os.path.exists(data_path):
+            os.remove(data_path)
+
+    known = {entry[0] for entry in index["files"]} | set(index["skipped"])
+    new_names = [name for name in current if name not in known]
+    if not new_names:
+        return index["count"]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Drop any bytes left behind by an interrupted append
+    if os.path.exists(data_path):
+        with open(data_path, "r+b") as f:
+            f.truncate(index["count"] * IMG_SIZE * IMG_SIZE * 3)
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool, open(data_path, "ab") as out:
+        for name, arr in zip(new_names, pool.map(decode_image, [os.path.join(folder, n) for n in new_names])):
+            if arr is None:
+                index["skipped"].append(name)
+                continue
+            out.write(arr.tobytes())
+            index["files"].append(current[name])
+            index["count"] += 1
+
+    _save_index(class_name, index)
+    print(f"Cache for {class_name}: +{len(new_names)} new files, {index['count']} images cached")
+    return index["count"]
+
+
+class CachedImageDataset(Dataset):
+    """
+    Drop-in replacement for datasets.ImageFolder(data_dir, transform=...) that
+    reads pre-decoded, pre-resized images from the uint8 cache. Items are
+    normalised (C, H, W) float tensors, the same as the old transform produces.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = str(data_dir)
+        class_dirs = sorted(
+            d for d in os.listdir(self.data_dir) if os.path.isdir(os.path.join(self.data_dir, d))
+        )
+        counts = {d: sync_class(self.data_dir, d) for d in class_dirs}
+
+        # Like ImageFolder, a class needs at least one usable image
+        self.classes = [d for d in class_dirs if counts[d] > 0]
+        self.class_to_idx = {c: i for i, c in enumerate(self.classes)}
+        self.counts = [counts[c] for c in self.classes]
+        self.targets = [i for i, n in enumerate(self.counts) for _ in range(n)]
+        # <class>/<file> for every item, in item order (cache rows follow the index's file list)
+        self.files = [f"{c}/{entry[0]}" for c in self.classes for entry in _load_index(c)["files"]]
+        self._offsets = np.cumsum([0] + self.counts)
+        self._arrays = None
+
+    def __getstate__(self):
+        # Memmaps are reopened lazily in each DataLoader worker
+        state = self.__dict__.copy()
+        state["_arrays"] = None
+        return state
+
+    def _open(self):
+        self._arrays = [
+            np.memmap(os.path.join(CACHE_DIR, f"{c}.u8"), dtype=np.uint8, mode="r",
+                      shape=(n, IMG_SIZE, IMG_SIZE, 3))
+            for c, n in zip(self.classes, self.counts)
+        ]
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __getitem__(self, idx):
+        if self._arrays is None:
+            self._open()
+        label = int(np.searchsorted(self._offsets, idx, side="right") - 1)
+        arr = self._arrays[label][idx - self._offsets[label]]
+        tensor = torch.from_numpy(np.array(arr)).permute(2, 0, 1).float().div_(255)
+        return (tensor - MEAN) / STD, label
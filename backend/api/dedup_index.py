@@ -0,0 +1,170 @@
+import os
+import threading
+
+import imagehash
+from PIL import Image
+
+# ---------------- Config ----------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Max differing bits (out of 64) for two images to count as the same picture
+DUPLICATE_HAMMING_THRESHOLD = int(os.getenv("DUPLICATE_HAMMING_THRESHOLD", "4"))
+
+_MASK = (1 << 64) - 1
+
+
+def image_phash(img: Image.Image) -> int:
+    """
+    64-bit average hash (same as utils/remove_duplicates.py), returned as a
+    signed int so it fits a BigIntegerField.
+    """
+    # The hash is computed on an 8x8 thumbnail, so a reduced JPEG decode is plenty
+    img.draft("L", (64, 64))
+    value = int(str(imagehash.average_hash(img)), 16)
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def file_phash(path):
+    try:
+        with Image.open(path) as img:
+            return image_phash(img)
+    except Exception:
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Hamming distance. A lookup only descends into
+    children whose edge distance is within `max_distance` of the query's
+    distance to the node, so most of the tree is never visited.
+    """
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+        # Removed values stay in the tree as routing nodes but never match
+        self._removed = set()
+
+    def add(self, value):
+        if self._root is None:
+            self._root = (value, {})
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                if value in self._removed:
+                    self._removed.discard(value)
+                    self.size += 1
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (value, {})
+                self.size += 1
+                return
+            node = child
+
+    def remove(self, value):
+        if value not in self._removed and self.find(value, 0) is not None:
+            self._removed.add(value)
+            self.size -= 1
+
+    def find(self, value, max_distance):
+        """Returns a stored hash within max_distance of value, or None."""
+        if self._root is None:
+            return None
+        stack = [self._root]
+        while stack:
+            node_value, children = stack.pop()
+            d = hamming(value, node_value)
+            if d <= max_distance and node_value not in self._removed:
+                return node_value
+            for edge in range(max(1, d - max_distance), d + max_distance + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+        return None
+
+
+class _LandmarkHashes:
+    def __init__(self):
+        self.tree = BKTree()
+        # Highest LandmarkImage id already loaded, so other workers' ingests get picked up
+        self.synced_up_to = 0
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _sync(landmark_name, entry):
+    """Loads hashes of rows added since the last sync; rows without a hash are backfilled."""
+    from .models import LandmarkImage
+
+    rows = list(
+        LandmarkImage.objects.filter(landmark__name=landmark_name, id__gt=entry.synced_up_to)
+        .order_by("id")
+        .values_list("id", "image", "phash")
+    )
+    if not rows:
+        return
+
+    backfill = []
+    for row_id, image, phash in rows:
+        if phash is None:
+            phash = file_phash(os.path.join(BASE_DIR, image))
+            if phash is None:
+                continue
+            backfill.append(LandmarkImage(id=row_id, phash=phash))
+        entry.tree.add(phash)
+
+    if backfill:
+        LandmarkImage.objects.bulk_update(backfill, ["phash"], batch_size=500)
+    entry.synced_up_to = rows[-1][0]
+
+
+def _entry(landmark_name):
+    entry = _indexes.get(landmark_name)
+    if entry is None:
+        entry = _indexes[landmark_name] = _LandmarkHashes()
+    return entry
+
+
+def sync(landmark_name):
+    """Pulls in rows added since the last sync. Call from a thread that may use the DB."""
+    with _lock:
+        _sync(landmark_name, _entry(landmark_name))
+
+
+def claim(landmark_name, phash, threshold=DUPLICATE_HAMMING_THRESHOLD, sync_db=True) -> bool:
+    """
+    Returns True and records the hash if no near-duplicate exists for this
+    landmark; returns False for a duplicate, which the caller should not write.
+    Hashes claimed here count immediately, so duplicates within one scrape or
+    upload batch are caught before any rows are committed.
+
+    Worker threads pass sync_db=False after the caller has run sync() once,
+    so they never open DB connections of their own.
+    """
+    with _lock:
+        entry = _entry(landmark_name)
+        if sync_db:
+            _sync(landmark_name, entry)
+        if entry.tree.find(phash, threshold) is not None:
+            return False
+        entry.tree.add(phash)
+        return True
+
+
+def release(landmark_name, phash):
+    """Undoes a claim() whose image was never stored, so a later copy of it is not rejected."""
+    if phash is None:
+        return
+    with _lock:
+        entry = _indexes.get(landmark_name)
+        if entry is not None:
+            entry.tree.remove(phash)
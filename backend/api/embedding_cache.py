@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import torch
+from filelock import FileLock
+from torch import nn
+from torchvision import models
+
+from .dataset_cache import DECODE_WORKERS, MEAN, STD, decode_image
+
+# ---------------- Config ----------------
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+EMBED_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "embeddings")
+EMBED_DIM = 512
+EMBED_BATCH_SIZE = 64
+# Web workers (k-NN sync) and training processes append to the same files
+EMBED_LOCK_TIMEOUT_S = int(os.getenv("EMBED_LOCK_TIMEOUT_S", "600"))
+_ROW_BYTES = EMBED_DIM * 4
+
+# Layout under data/cache/embeddings/ (append-only):
+#   keys.txt      one sha1 per line, row i of vectors.f32 belongs to line i
+#   vectors.f32   float32 rows of EMBED_DIM
+#   files.json    {path: [size, mtime_ns, sha1]} so unchanged files are not re-hashed
+# Vectors are written before keys, so a crash leaves only unreferenced rows.
+# Every read-modify-write of these files happens under the .lock file lock.
+
+_backbone = None
+_backbone_lock = threading.Lock()
+
+
+def get_backbone():
+    """ImageNet-pretrained ResNet-18 with the fc layer removed: images -> 512-d embeddings."""
+    global _backbone
+    with _backbone_lock:
+        if _backbone is None:
+            net = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
+            net.fc = nn.Identity()
+            net.eval()
+            _backbone = net
+        return _backbone
+
+
+def backbone_state_dict():
+    """Backbone weights with an 'fc.' slot free, for assembling a full classifier checkpoint."""
+    return {k: v for k, v in get_backbone().state_dict().items() if not k.startswith("fc.")}
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def embed_tensors(batch):
+    """(B, 3, 224, 224) normalised tensor -> (B, 512) float32 numpy array."""
+    with torch.no_grad():
+        return get_backbone()(batch).numpy().astype(np.float32)
+
+
+class EmbeddingCache:
+    """Content-addressed store of backbone embeddings for files under data/raw."""
+
+    def __init__(self, cache_dir=EMBED_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._keys_path = os.path.join(cache_dir, "keys.txt")
+        self._vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._files_path = os.path.join(cache_dir, "files.json")
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(cache_dir, ".lock"), timeout=EMBED_LOCK_TIMEOUT_S)
+        self._files = {}
+        with self._file_lock:
+            self._load()
+            self._files = self._read_file_hashes()
+
+    def _load(self):
+        """Reads keys and vectors from disk. Call with the file lock held."""
+        keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path) as f:
+                keys = [line.strip() for line in f if line.strip()]
+
+        rows_on_disk = os.path.getsize(self._vectors_path) // _ROW_BYTES if os.path.exists(self._vectors_path) else 0
+        if len(keys) > rows_on_disk:
+            # Keys without vectors (left by an older unlocked writer): drop them, they get re-embedded
+            print(f"WARNING: embedding cache has {len(keys)} keys but {rows_on_disk} vectors; repairing")
+            keys = keys[:rows_on_disk]
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write("".join(f"{k}\n" for k in keys))
+            os.replace(tmp_path, self._keys_path)
+
+        vectors = np.zeros((0, EMBED_DIM), dtype=np.float32)
+        if keys:
+            vectors = np.fromfile(self._vectors_path, dtype=np.float32, count=len(keys) * EMBED_DIM)
+            vectors = vectors.reshape(len(keys), EMBED_DIM)
+
+        # Row count on disk, which can exceed len(self._row) if a key was ever written twice
+        self._n_rows = len(keys)
+        self._keys_size = os.path.getsize(self._keys_path) if os.path.exists(self._keys_path) else 0
+        self._row = {k: i for i, k in enumerate(keys)}
+        self._vectors = vectors
+
+    def _refresh(self):
+        """Picks up rows other processes appended since our last load. Call with the file lock held."""
+        size = os.path.getsize(self._keys_path) if os.path.exists(self._keys_path) else 0
+        if size != self._keys_size:
+            self._load()
+
+    def _read_file_hashes(self):
+        try:
+            with open(self._files_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def __len__(self):
+        return len(self._row)
+
+    def _hash_for(self, path):
+        st = os.stat(path)
+        known = self._files.get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        digest = file_sha1(path)
+        self._files[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def _append(self, keys, vectors):
+        """Appends rows not already cached. Call with the file lock held, after _refresh()."""
+        fresh = [i for i, k in enumerate(keys) if k not in self._row]
+        if not fresh:
+            return
+        keys = [keys[i] for i in fresh]
+        vectors = np.ascontiguousarray(vectors[fresh], dtype=np.float32)
+
+        # Drop rows left behind by an interrupted append before adding more
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(self._n_rows * _ROW_BYTES)
+            f.write(vectors.tobytes())
+        with open(self._keys_path, "a") as f:
+            f.write("".join(f"{k}\n" for k in keys))
+
+        for i, k in enumerate(keys):
+            self._row[k] = self._n_rows + i
+        self._n_rows += len(keys)
+        self._keys_size = os.path.getsize(self._keys_path)
+        self._vectors = np.concatenate([self._vectors, vectors], axis=0)
+
+    def _save_file_hashes(self):
+        """Merges our file hashes into files.json. Call with the file lock held."""
+        merged = self._read_file_hashes()
+        merged.update(self._files)
+        self._files = merged
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._files, f)
+        os.replace(tmp_path, self._files_path)
+
+    def embed_files(self, paths):
+        """
+        Returns (embeddings, ok_mask) for the given image paths. Only files
+        whose content hash is not cached yet go through the backbone;
+        unreadable files get ok_mask False.
+        """
+        with self._lock:
+            hashes = [self._hash_for(p) for p in paths]
+            with self._file_lock:
+                self._refresh()
+
+            missing = {}
+            for path, digest in zip(paths, hashes):
+                if digest not in self._row and digest not in missing:
+                    missing[digest] = path
+
+            if missing:
+                print(f"Embedding {len(missing)} new images ({len(self._row)} cached)")
+                items = list(missing.items())
+                with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+                    for start in range(0, len(items), EMBED_BATCH_SIZE):
+                        chunk = items[start:start + EMBED_BATCH_SIZE]
+                        arrays = list(pool.map(decode_image, [path for _, path in chunk]))
+                        good = [(digest, arr) for (digest, _), arr in zip(chunk, arrays) if arr is not None]
+                        if not good:
+                            continue
+                        batch = torch.from_numpy(np.stack([arr for _, arr in good]))
+                        batch = (batch.permute(0, 3, 1, 2).float().div_(255) - MEAN) / STD
+                        vectors = embed_tensors(batch)
+                        # The backbone runs outside the file lock; only the append holds it
+                        with self._file_lock:
+                            self._refresh()
+                            self._append([digest for digest, _ in good], vectors)
+
+            with self._file_lock:
+                self._save_file_hashes()
+
+            ok = np.array([d in self._row for d in hashes], dtype=bool)
+            out = np.zeros((len(paths), EMBED_DIM), dtype=np.float32)
+            rows = [self._row[d] for d in hashes if d in self._row]
+            out[ok] = self._vectors[rows]
+            return out, ok
@@ -0,0 +1,272 @@
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .embedding_cache import EMBED_DIM, EmbeddingCache, embed_tensors
+from .preprocessing import preprocess_in_pool
+
+# ---------------- Config ----------------
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+INDEX_PATH = os.path.join(BASE_DIR, "data", "cache", "knn_index.npz")
+KNN_K = int(os.getenv("KNN_K", "10"))
+KNN_TOP_LANDMARKS = 3
+# How often a worker checks LandmarkImage for rows that are not indexed yet
+KNN_SYNC_INTERVAL_S = float(os.getenv("KNN_SYNC_INTERVAL_S", "60"))
+# Switch from brute force to IVF partitions once the index gets this big
+KNN_IVF_MIN_VECTORS = int(os.getenv("KNN_IVF_MIN_VECTORS", "50000"))
+KNN_IVF_PROBES = int(os.getenv("KNN_IVF_PROBES", "8"))
+
+
+class IndexNotReadyError(RuntimeError):
+    """The k-NN engine has no reference images to compare against yet."""
+
+
+def _normalise(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _kmeans(data, n_clusters, iterations=10, seed=0):
+    """Spherical k-means on unit vectors. Returns (n_clusters, dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=n_clusters)
+        empty = counts == 0
+        # Re-seed empty clusters with random points so every list is usable
+        sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+        centroids = _normalise(sums)
+    return centroids
+
+
+class EmbeddingIndex:
+    """
+    L2-normalised embeddings with their landmark labels, searchable by cosine
+    similarity. Brute force (one matrix-vector product) by default; call
+    build_ivf() to partition into inverted lists and only scan the lists
+    nearest to the query. Vectors can be added at any time.
+    """
+
+    def __init__(self, dim=EMBED_DIM):
+        self.dim = dim
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._labels = np.zeros(1024, dtype=np.int32)
+        self.size = 0
+        self.label_names = []
+        self._label_idx = {}
+        self.keys = set()
+        # Highest LandmarkImage id already considered by sync_index()
+        self.synced_up_to = 0
+
+        self.centroids = None
+        self._lists = None
+
+    # ---------------- Building ----------------
+    def _label_id(self, name):
+        if name not in self._label_idx:
+            self._label_idx[name] = len(self.label_names)
+            self.label_names.append(name)
+        return self._label_idx[name]
+
+    def add(self, vectors, labels, keys=None):
+        """Adds embeddings (normalised here) with their landmark names. Keys already present are skipped."""
+        vectors = _normalise(vectors).reshape(-1, self.dim)
+        keys = list(keys) if keys is not None else [None] * len(vectors)
+        fresh = [i for i, key in enumerate(keys) if key is None or key not in self.keys]
+        if not fresh:
+            return 0
+        vectors = vectors[fresh]
+        label_ids = np.array([self._label_id(labels[i]) for i in fresh], dtype=np.int32)
+
+        needed = self.size + len(vectors)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            self._vectors = np.resize(self._vectors, (capacity, self.dim))
+            self._labels = np.resize(self._labels, capacity)
+
+        start = self.size
+        self._vectors[start:needed] = vectors
+        self._labels[start:needed] = label_ids
+        self.size = needed
+        self.keys.update(keys[i] for i in fresh if keys[i] is not None)
+
+        if self.centroids is not None:
+            assign = np.argmax(vectors @ self.centroids.T, axis=1)
+            for list_id in np.unique(assign):
+                new_ids = np.arange(start, needed)[assign == list_id]
+                self._lists[list_id] = np.concatenate([self._lists[list_id], new_ids])
+        return len(vectors)
+
+    def build_ivf(self, n_lists=None, sample_size=50000, seed=0):
+        """Partitions the current vectors into n_lists inverted lists (default ~sqrt(N))."""
+        data = self._vectors[:self.size]
+        n_lists = n_lists or max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(seed)
+        sample = data if self.size <= sample_size else data[rng.choice(self.size, sample_size, replace=False)]
+        centroids = _kmeans(sample, n_lists, seed=seed)
+
+        assign = np.empty(self.size, dtype=np.int64)
+        for start in range(0, self.size, 65536):
+            assign[start:start + 65536] = np.argmax(data[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(n_lists + 1))
+        # search() runs without the index lock and switches to IVF once centroids is set,
+        # so the lists must be in place first
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+        self.centroids = centroids
+
+    # ---------------- Querying ----------------
+    def search(self, query, k=KNN_K, n_probe=KNN_IVF_PROBES):
+        """Returns (row_ids, similarities) of the k nearest vectors, best first."""
+        if self.size == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        q = _normalise(query).reshape(self.dim)
+
+        centroids = self.centroids
+        if centroids is None:
+            candidates = None
+            scores = self._vectors[:self.size] @ q
+        else:
+            probe = np.argsort(centroids @ q)[::-1][:n_probe]
+            candidates = np.concatenate([self._lists[i] for i in probe])
+            scores = self._vectors[candidates] @ q
+
+        k = min(k, len(scores))
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return rows, scores[top]
+
+    def classify(self, query, k=KNN_K, top_landmarks=KNN_TOP_LANDMARKS):
+        """
+        k-NN vote weighted by similarity. Returns the winning label, its share
+        of the vote as confidence, and the best landmarks with their highest
+        neighbour similarity.
+        """
+        rows, sims = self.search(query, k)
+        if len(rows) == 0:
+            return None
+
+        weights = np.maximum(sims, 0)
+        labels = self._labels[rows]
+        votes = np.bincount(labels, weights=weights, minlength=len(self.label_names))
+        best_sim = np.full(len(self.label_names), -1.0)
+        np.maximum.at(best_sim, labels, sims)
+
+        ranked = [i for i in np.argsort(-votes) if best_sim[i] > -1.0][:top_landmarks]
+        total = votes.sum()
+        return {
+            "label": self.label_names[ranked[0]],
+            "confidence": round(float(votes[ranked[0]] / total), 4) if total > 0 else 0.0,
+            "top_k": [
+                {"label": self.label_names[i], "score": round(float(best_sim[i]), 4)}
+                for i in ranked
+            ]
+        }
+
+    # ---------------- Persistence ----------------
+    def save(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                vectors=self._vectors[:self.size],
+                labels=self._labels[:self.size],
+                label_names=np.array(self.label_names, dtype=object),
+                keys=np.array(sorted(k for k in self.keys if k is not None), dtype=object),
+                synced_up_to=np.array(self.synced_up_to)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        data = np.load(path, allow_pickle=True)
+        label_names = list(data["label_names"])
+        index.add(data["vectors"], [label_names[i] for i in data["labels"]])
+        index.keys = set(data["keys"].tolist())
+        index.synced_up_to = int(data["synced_up_to"])
+        if index.size >= KNN_IVF_MIN_VECTORS:
+            index.build_ivf()
+        return index
+
+
+# ---------------- Prediction engine ----------------
+_index = None
+_last_sync = 0.0
+_index_lock = threading.Lock()
+
+
+def sync_index():
+    """
+    Adds any LandmarkImage rows that are not in the index yet. Embeddings come
+    from the content-hash cache, so only never-seen images hit the backbone.
+    """
+    global _index, _last_sync
+    from .models import LandmarkImage
+
+    with _index_lock:
+        if _index is None:
+            _index = EmbeddingIndex.load()
+
+        # Image rows only ever get appended, so "new" is simply id > last synced id
+        rows = list(
+            LandmarkImage.objects.filter(id__gt=_index.synced_up_to)
+            .order_by("id")
+            .values_list("id", "image", "landmark__name")
+        )
+        if rows:
+            _index.synced_up_to = rows[-1][0]
+        rows = [r for r in rows if os.path.exists(os.path.join(BASE_DIR, r[1]))]
+
+        if rows:
+            embeddings, ok = EmbeddingCache().embed_files([os.path.join(BASE_DIR, r[1]) for r in rows])
+            good = [i for i, flag in enumerate(ok) if flag]
+            added = _index.add(
+                embeddings[good],
+                [rows[i][2] for i in good],
+                keys=[rows[i][0] for i in good]
+            )
+            if _index.centroids is None and _index.size >= KNN_IVF_MIN_VECTORS:
+                _index.build_ivf()
+            _index.save()
+            print(f"k-NN index: +{added} images, {_index.size} total")
+
+        _last_sync = time.monotonic()
+        return _index
+
+
+def get_index():
+    if _index is None or time.monotonic() - _last_sync > KNN_SYNC_INTERVAL_S:
+        return sync_index()
+    return _index
+
+
+def predict_tensors_knn(img_tensors, k: int = KNN_K):
+    """Embeds a list of preprocessed (3, 224, 224) tensors in one pass and classifies each."""
+    import torch
+
+    index = get_index()
+    if index.size == 0:
+        raise IndexNotReadyError("The k-NN index is empty. Upload or scrape reference images first.")
+    queries = embed_tensors(torch.stack(list(img_tensors)))
+    return [index.classify(q, k) for q in queries]
+
+
+def predict_image_knn(image_bytes: bytes, k: int = KNN_K):
+    """Alternate engine: nearest reference images vote on the landmark."""
+    img_tensor, _ = preprocess_in_pool(image_bytes)
+    return predict_tensors_knn([img_tensor], k)[0]
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from filelock import FileLock
+
+from api.utils.single_flight import SingleFlight
+
+# ---------------- Config ----------------
+# Enrichment is network-bound (Wikipedia + Gemini), so a couple of threads per worker is plenty
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "2"))
+# How long another worker's enrichment of the same landmark is waited for
+ENRICH_LOCK_TIMEOUT_S = 120
+# After a failed enrichment (Wikipedia or Gemini raised) wait this long before trying again
+ENRICH_RETRY_S = float(os.getenv("ENRICH_RETRY_S", "300"))
+
+# Shown while a summary is still being generated; clients poll /api/landmarks/<id>/summary/
+SUMMARY_PLACEHOLDER = "A summary of this landmark is being prepared and will appear shortly."
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LOCK_DIR = os.path.join(BASE_DIR, "data", "cache", "locks")
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_flight = SingleFlight()
+_failed_at = {}
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Threads do not survive a fork, so each gunicorn worker gets its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="enrich")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def enrich_landmark(landmark_id):
+    """
+    Fetches Wikipedia facts and generates the Gemini summary for a landmark
+    that has none yet. Returns the summary (or None).
+
+    SingleFlight coalesces callers within a process; the file lock does the
+    same across gunicorn workers. Whoever gets the lock second finds the
+    summary already saved and makes no external calls.
+    """
+    from django.db import close_old_connections
+    from .models import Landmark, LandmarkPrediction
+    from .utils.gemini_summary import generate_summary
+    from .utils.landmark_facts import get_landmark_facts
+
+    close_old_connections()
+    try:
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        with FileLock(os.path.join(LOCK_DIR, f"enrich_{landmark_id}.lock"), timeout=ENRICH_LOCK_TIMEOUT_S):
+            landmark = Landmark.objects.get(pk=landmark_id)
+            if landmark.summary:
+                return landmark.summary
+
+            # No Wikipedia page is not a failure: the summary is generated without facts
+            facts = get_landmark_facts(landmark.name)
+            summary = generate_summary(landmark.name, facts)
+            Landmark.objects.filter(pk=landmark_id).update(summary=summary)
+            # Predictions made while the summary was pending get it now
+            LandmarkPrediction.objects.filter(
+                predicted_landmark_id=landmark_id, summary_at_prediction__isnull=True
+            ).update(summary_at_prediction=summary)
+            _failed_at.pop(landmark_id, None)
+            print(f"DEBUG: enriched landmark {landmark.name}")
+            return summary
+    except Exception as e:
+        print(f"Error enriching landmark {landmark_id}: {e}")
+        _failed_at[landmark_id] = time.monotonic()
+        return None
+    finally:
+        close_old_connections()
+
+
+def enrich_landmark_async(landmark):
+    """
+    Queues enrichment for a landmark and returns a Future with its summary.
+    Callers asking for a landmark that is already being enriched share that
+    task's Future rather than starting new external calls.
+    """
+    return _flight.submit(_get_executor(), landmark.id, enrich_landmark, landmark.id)
+
+
+def maybe_enrich(landmark) -> bool:
+    """
+    Queues enrichment for a landmark without a summary, unless its last
+    attempt failed less than ENRICH_RETRY_S ago. Returns True if a summary
+    is on its way (queued or already in flight).
+    """
+    if landmark.summary:
+        return False
+    failed_at = _failed_at.get(landmark.id)
+    if failed_at is not None and time.monotonic() - failed_at < ENRICH_RETRY_S:
+        return False
+    enrich_landmark_async(landmark)
+    return True
+
+
+def summary_fields(landmark) -> dict:
+    """
+    'summary' and 'summary_status' for an API response. Never blocks: a
+    missing summary is queued for enrichment and a placeholder returned.
+    Status is 'ready', 'pending' or 'unavailable' (recent enrichment failed).
+    """
+    if landmark.summary:
+        return {"summary": landmark.summary, "summary_status": "ready"}
+    if not maybe_enrich(landmark):
+        return {"summary": None, "summary_status": "unavailable"}
+    return {"summary": SUMMARY_PLACEHOLDER, "summary_status": "pending"}
+
+
+def precompute_summaries(names=None):
+    """Queues enrichment for every landmark (or just `names`) that has no summary yet."""
+    from django.db.models import Q
+    from .models import Landmark
+
+    missing = Landmark.objects.filter(Q(summary__isnull=True) | Q(summary=""))
+    if names is not None:
+        missing = missing.filter(name__in=list(names))
+    queued = [enrich_landmark_async(landmark) for landmark in missing]
+    if queued:
+        print(f"DEBUG: queued summary generation for {len(queued)} landmarks")
+    return queued
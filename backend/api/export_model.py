@@ -0,0 +1,110 @@
+import os
+import random
+import tempfile
+
+import numpy as np
+import torch
+from torch import nn
+from torchvision.models import quantization as qmodels
+
+from . import model_registry
+from .dataset_cache import IMG_EXTENSIONS, MEAN, STD, decode_image
+
+# ---------------- Config ----------------
+QUANTIZED_NAME = "landmark_resnet18_int8.pt"
+CALIBRATION_IMAGES = 160
+CALIBRATION_BATCH_SIZE = 32
+# Set to 0 to skip the INT8 export after training
+EXPORT_INT8 = os.getenv("EXPORT_INT8", "1") == "1"
+
+
+def quantized_engine():
+    # fbgemm is the x86 backend; qnnpack covers ARM boxes
+    supported = torch.backends.quantized.supported_engines
+    return "fbgemm" if "fbgemm" in supported else "qnnpack"
+
+
+def quantized_path(version):
+    return os.path.join(model_registry.version_dir(version), QUANTIZED_NAME)
+
+
+def _calibration_batches(data_dir, n_images=CALIBRATION_IMAGES, seed=0):
+    """Random sample of training images, preprocessed exactly like the training cache."""
+    paths = []
+    for class_name in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, class_name)
+        if os.path.isdir(folder):
+            paths += [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMG_EXTENSIONS)]
+    random.Random(seed).shuffle(paths)
+
+    arrays = [arr for arr in map(decode_image, paths[:n_images]) if arr is not None]
+    for start in range(0, len(arrays), CALIBRATION_BATCH_SIZE):
+        batch = torch.from_numpy(np.stack(arrays[start:start + CALIBRATION_BATCH_SIZE]))
+        yield (batch.permute(0, 3, 1, 2).float().div_(255) - MEAN) / STD
+
+
+def build_int8_model(state_dict, num_classes, calibration_batches):
+    """
+    Post-training static quantization: fuse conv-bn-relu, observe activation
+    ranges on calibration images, convert to INT8, then trace and freeze
+    with TorchScript.
+    """
+    torch.backends.quantized.engine = quantized_engine()
+
+    net = qmodels.resnet18(weights=None, quantize=False)
+    net.fc = nn.Linear(net.fc.in_features, num_classes)
+    net.load_state_dict(state_dict)
+    net.eval()
+
+    net.fuse_model()
+    net.qconfig = torch.ao.quantization.get_default_qconfig(torch.backends.quantized.engine)
+    torch.ao.quantization.prepare(net, inplace=True)
+    with torch.no_grad():
+        for batch in calibration_batches:
+            net(batch)
+    torch.ao.quantization.convert(net, inplace=True)
+
+    with torch.no_grad():
+        scripted = torch.jit.trace(net, torch.zeros(1, 3, 224, 224))
+    return torch.jit.freeze(scripted)
+
+
+def export_int8(version, data_dir):
+    """
+    Writes the INT8 TorchScript variant next to a version's FP32 checkpoint.
+    Call before model_registry.publish() so the variant is in place when
+    workers switch to the version.
+    """
+    checkpoint = torch.load(
+        os.path.join(model_registry.version_dir(version), model_registry.CHECKPOINT_NAME),
+        map_location="cpu"
+    )
+    scripted = build_int8_model(
+        checkpoint["model_state_dict"], len(checkpoint["classes"]), _calibration_batches(data_dir)
+    )
+
+    target = quantized_path(version)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    os.close(fd)
+    torch.jit.save(scripted, tmp_path)
+    os.replace(tmp_path, target)
+    print(f"INT8 TorchScript model exported to {target}")
+    return target
+
+
+def load_int8(version):
+    torch.backends.quantized.engine = quantized_engine()
+    net = torch.jit.load(quantized_path(version), map_location="cpu")
+    net.eval()
+    return net
+
+
+if __name__ == "__main__":
+    # Export an already-trained version: python -m api.export_model [version]
+    import sys
+    from .train_landmarks import BASE_DATA_DIR
+
+    target_version = sys.argv[1] if len(sys.argv) > 1 else (model_registry.read_active() or {}).get("version")
+    if not target_version:
+        raise SystemExit("No published model version found. Train a model first.")
+    export_int8(target_version, BASE_DATA_DIR)
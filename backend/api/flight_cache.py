@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils.single_flight import SingleFlight
+from .utils.ttl_cache import TTLCache
+
+# ---------------- Config ----------------
+# Fares move, but not within minutes; a route is searched at most once per TTL
+FLIGHT_CACHE_TTL_S = int(os.getenv("FLIGHT_CACHE_TTL_S", "900"))
+# "No flights" answers are kept for less time than real ones
+FLIGHT_CACHE_NEGATIVE_TTL_S = int(os.getenv("FLIGHT_CACHE_NEGATIVE_TTL_S", "120"))
+# A route served this many times from one cached entry counts as hot ...
+FLIGHT_HOT_HITS = int(os.getenv("FLIGHT_HOT_HITS", "5"))
+# ... and is re-searched in the background once its entry is this close to expiring (0 disables)
+FLIGHT_REFRESH_AHEAD_S = int(os.getenv("FLIGHT_REFRESH_AHEAD_S", "120"))
+FLIGHT_REFRESH_WORKERS = int(os.getenv("FLIGHT_REFRESH_WORKERS", "2"))
+
+# Entries are small dicts; the shared 'external' cache lets gunicorn workers reuse each other's searches
+_memory_cache = TTLCache(maxsize=2048, ttl=FLIGHT_CACHE_TTL_S)
+_route_hits = TTLCache(maxsize=4096, ttl=FLIGHT_CACHE_TTL_S)
+_flight = SingleFlight()
+
+_stats = {"hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "searches": 0, "refreshes": 0, "refresh_errors": 0}
+_stats_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Threads do not survive a fork, so each gunicorn worker gets its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=FLIGHT_REFRESH_WORKERS, thread_name_prefix="flight-refresh")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _bump(name, by=1):
+    with _stats_lock:
+        _stats[name] += by
+
+
+def _shared_key(key):
+    return "flights:" + ":".join(key)
+
+
+def _lookup(key):
+    entry = _memory_cache.get(key)
+    if entry is not None:
+        _bump("hits")
+        return entry
+
+    from django.core.cache import caches
+    entry = caches["external"].get(_shared_key(key))
+    if entry is None:
+        return None
+    remaining = entry["fetched_at"] + entry["ttl"] - time.time()
+    if remaining <= 0:
+        return None
+    _memory_cache.set(key, entry, ttl=remaining)
+    _bump("shared_hits")
+    return entry
+
+
+def _fetch_and_store(key, fetch):
+    _bump("searches")
+    deals = fetch(*key)
+    entry = {
+        "deals": deals,
+        "fetched_at": time.time(),
+        "ttl": FLIGHT_CACHE_TTL_S if deals else FLIGHT_CACHE_NEGATIVE_TTL_S,
+    }
+    from django.core.cache import caches
+    caches["external"].set(_shared_key(key), entry, entry["ttl"])
+    _memory_cache.set(key, entry, ttl=entry["ttl"])
+    _route_hits.set(key, 0)
+    return entry
+
+
+def _refresh(key, fetch):
+    try:
+        _fetch_and_store(key, fetch)
+        _bump("refreshes")
+    except Exception as e:
+        # The old entry keeps serving until it expires; the next miss searches again
+        _bump("refresh_errors")
+        print(f"DEBUG: background refresh of {key} failed: {e}")
+
+
+def _maybe_refresh(key, entry, fetch):
+    hits = _route_hits.get(key, 0) + 1
+    _route_hits.set(key, hits)
+    if not FLIGHT_REFRESH_AHEAD_S or hits < FLIGHT_HOT_HITS or not entry["deals"]:
+        return
+    if time.time() < entry["fetched_at"] + entry["ttl"] - FLIGHT_REFRESH_AHEAD_S:
+        return
+    # submit() is a no-op while a search for this route is already running
+    _flight.submit(_get_executor(), key, _refresh, key, fetch)
+
+
+def get_deals(origin, dest, date, currency, fetch):
+    """
+    Cached result of fetch(origin, dest, date, currency). Concurrent misses
+    for the same route share one call to fetch; hot routes are re-fetched in
+    the background shortly before they expire, so their callers never wait.
+    Exceptions from fetch propagate and are not cached.
+    """
+    key = (origin, dest, date, currency)
+    entry = _lookup(key)
+    if entry is not None:
+        _maybe_refresh(key, entry, fetch)
+        return entry["deals"]
+
+    _bump("misses")
+    if _flight.in_flight(key):
+        _bump("coalesced")
+    return _flight.do(key, _fetch_and_store, key, fetch)["deals"]
+
+
+def stats() -> dict:
+    """Per-process counters (each gunicorn worker keeps its own)."""
+    with _stats_lock:
+        counters = dict(_stats)
+    lookups = counters["hits"] + counters["shared_hits"] + counters["misses"]
+    return {
+        "pid": os.getpid(),
+        **counters,
+        "hit_rate": round((counters["hits"] + counters["shared_hits"]) / lookups, 3) if lookups else None,
+        "memory_entries": len(_memory_cache),
+        "ttl_s": FLIGHT_CACHE_TTL_S,
+    }
+
+
+def clear():
+    _memory_cache.clear()
+    _route_hits.clear()
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,105 @@
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import flight_cache
+from .flight_service import search_deals
+from .utils.airports import get_airport_index
+
+# ---------------- Config ----------------
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "31"))
+# Searches in flight across all calendar requests of this worker; Amadeus' own
+# rate limit is enforced separately by flight_service.amadeus_limiter
+CALENDAR_WORKERS = int(os.getenv("CALENDAR_WORKERS", "4"))
+CALENDAR_NEARBY_KM = float(os.getenv("CALENDAR_NEARBY_KM", "150"))
+# Airports per side when nearby airports are included (the airport itself counts)
+CALENDAR_MAX_AIRPORTS = int(os.getenv("CALENDAR_MAX_AIRPORTS", "3"))
+# Most (day x airport pair) searches one request may ask for. At AMADEUS_RATE_PER_SEC=5
+# an uncached calendar of 100 searches streams in ~20 s, inside gunicorn's default 30 s timeout
+CALENDAR_MAX_SEARCHES = int(os.getenv("CALENDAR_MAX_SEARCHES", "100"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Threads do not survive a fork, so each gunicorn worker gets its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=CALENDAR_WORKERS, thread_name_prefix="fare-calendar")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def date_window(start_date, days):
+    """ISO dates from start_date (a date or 'YYYY-MM-DD'), `days` long, capped at CALENDAR_MAX_DAYS."""
+    if isinstance(start_date, str):
+        start_date = datetime.date.fromisoformat(start_date)
+    return [(start_date + datetime.timedelta(days=i)).isoformat() for i in range(max(1, min(days, CALENDAR_MAX_DAYS)))]
+
+
+def airports_for(iata, include_nearby):
+    if not include_nearby:
+        return [iata]
+    return [code for code, _ in get_airport_index().nearby(iata, CALENDAR_NEARBY_KM, limit=CALENDAR_MAX_AIRPORTS)]
+
+
+def _search(origin, dest, date, currency):
+    """One cached (origin, dest, date) search. Never raises: errors are reported in the result."""
+    try:
+        return flight_cache.get_deals(origin, dest, date, currency, search_deals), None
+    except Exception as e:
+        print(f"DEBUG: calendar search {origin}->{dest} on {date} failed: {e}")
+        return [], str(e)
+
+
+def _day_cell(date, results):
+    """Cheapest offer of the day across every airport pair searched for it."""
+    cheapest = None
+    errors = 0
+    for deals, error in results:
+        errors += error is not None
+        for deal in deals:
+            if deal["type"] == "Cheapest" and (cheapest is None or float(deal["price"]) < float(cheapest["price"])):
+                cheapest = deal
+    return {"type": "day", "date": date, "cheapest": cheapest, "searched": len(results), "errors": errors}
+
+
+def fare_calendar(origins, destinations, dates, currency="USD"):
+    """
+    Generator over the cheapest-per-day grid. Every (origin, destination,
+    date) search runs on the shared bounded pool and goes through
+    flight_cache, so overlapping windows reuse earlier days. A day is yielded
+    as soon as all of its searches are done, so days arrive out of order;
+    a final 'done' item carries the overall cheapest day.
+    """
+    pairs = [(o, d) for o in origins for d in destinations if o != d]
+    pending = {date: len(pairs) for date in dates}
+    results = {date: [] for date in dates}
+    futures = {}
+    executor = _get_executor()
+    for date in dates:
+        for origin, dest in pairs:
+            futures[executor.submit(_search, origin, dest, date, currency)] = date
+
+    best = None
+    try:
+        for future in as_completed(futures):
+            date = futures[future]
+            results[date].append(future.result())
+            pending[date] -= 1
+            if pending[date]:
+                continue
+            cell = _day_cell(date, results.pop(date))
+            cheapest = cell["cheapest"]
+            if cheapest and (best is None or float(cheapest["price"]) < float(best["cheapest"]["price"])):
+                best = cell
+            yield cell
+        yield {"type": "done", "cheapest_day": best["date"] if best else None, "searches": len(futures)}
+    finally:
+        # The client went away: don't spend quota on days nobody will see
+        for future in futures:
+            future.cancel()
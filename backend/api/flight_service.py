@@ -1,17 +1,64 @@
 from amadeus import Client, ResponseError
 from django.conf import settings
 import datetime
+import os
 import re
 
-amadeus = Client(
-    client_id=settings.AMADEUS_API_KEY,
-    client_secret=settings.AMADEUS_API_SECRET
-)
+from . import flight_cache
+from .utils.airports import get_airport_index
+from .utils.rate_limiter import RateLimiter
+
+# ---------------- Config ----------------
+# Nearest bundled airport must be this close, otherwise Amadeus is asked instead
+AIRPORT_MAX_KM = float(os.getenv("AIRPORT_MAX_KM", "300"))
+# Every Amadeus call in this process shares one limiter (the test environment allows ~10 per second)
+AMADEUS_RATE_PER_SEC = float(os.getenv("AMADEUS_RATE_PER_SEC", "5"))
+
+amadeus_limiter = RateLimiter(AMADEUS_RATE_PER_SEC, burst=2)
+
+if os.getenv("AMADEUS_FAKE"):
+    # Offline stand-in with deterministic offers, see utils/fake_amadeus.py
+    from .utils.fake_amadeus import FakeAmadeus
+    amadeus = FakeAmadeus()
+else:
+    amadeus = Client(
+        client_id=settings.AMADEUS_API_KEY,
+        client_secret=settings.AMADEUS_API_SECRET
+    )
 
 
 def _iata_from_coords(lat, lon):
-    """Return the nearest airport IATA code for a lat/lon pair, or None."""
+    """
+    Return the nearest airport IATA code for a lat/lon pair, or None.
+    Resolved from the bundled airport index; Amadeus is only asked when
+    no bundled airport lies within AIRPORT_MAX_KM.
+    """
+    try:
+        nearest = get_airport_index().nearest(float(lat), float(lon), max_km=AIRPORT_MAX_KM)
+    except (ValueError, TypeError):
+        return None
+    if nearest:
+        return nearest[0][0]
+    return _amadeus_iata_from_coords(lat, lon)
+
+
+def _iata_from_keyword(keyword):
+    """
+    Return the best-match IATA code for a city/airport keyword, or None.
+    Bundled index first, Amadeus keyword search as the fallback.
+    """
+    if not keyword or not keyword.strip():
+        return None
+    iata = get_airport_index().lookup(keyword)
+    if iata:
+        return iata
+    return _amadeus_iata_from_keyword(keyword)
+
+
+def _amadeus_iata_from_coords(lat, lon):
+    """Nearest airport according to the Amadeus reference-data API (one round trip)."""
     try:
+        amadeus_limiter.acquire()
         res = amadeus.reference_data.locations.airports.get(
             latitude=float(lat),
             longitude=float(lon)
@@ -23,10 +70,11 @@ def _iata_from_coords(lat, lon):
     return None
 
 
-def _iata_from_keyword(keyword):
-    """Return the best-match IATA code for a city/airport keyword, or None."""
+def _amadeus_iata_from_keyword(keyword):
+    """Best keyword match according to the Amadeus reference-data API (one round trip)."""
     try:
         clean = re.sub(r'[^a-zA-Z\s]', ' ', keyword).strip().split()[0]
+        amadeus_limiter.acquire()
         res = amadeus.reference_data.locations.get(
             keyword=clean, subType='CITY,AIRPORT'
         )
@@ -66,51 +114,108 @@ def _airline_name(offer, carriers):
     return carriers.get(code, f"Airline ({code})" if code else "Unknown Airline")
 
 
-def get_flight_deals(destination_name, origin_input, lat=None, lon=None, origin_lat=None, origin_lon=None):
+def resolve_route(destination_name, origin_input, lat=None, lon=None, origin_lat=None, origin_lon=None):
+    """Returns (origin_iata, dest_iata); either may be None if it could not be resolved."""
+    # ── DESTINATION IATA ──────────────────────────────────────────────────
+    dest_iata = None
+    if lat is not None and lon is not None:
+        try:
+            if float(lat) != 0.0 or float(lon) != 0.0:
+                dest_iata = _iata_from_coords(lat, lon)
+                print(f"DEBUG: dest via coords → {dest_iata}")
+        except (ValueError, TypeError):
+            pass
+
+    if not dest_iata and destination_name:
+        keyword = destination_name.replace('_', ' ').split()[-1]
+        dest_iata = _iata_from_keyword(keyword)
+        print(f"DEBUG: dest via keyword '{keyword}' → {dest_iata}")
+
+    # ── ORIGIN IATA ───────────────────────────────────────────────────────
+    origin_iata = None
+
+    # Use GPS coords first if available (most accurate)
+    if origin_lat and origin_lon:
+        origin_iata = _iata_from_coords(origin_lat, origin_lon)
+        print(f"DEBUG: origin via GPS coords → {origin_iata}")
+
+    # Case 1: "Lat: 51.5, Lon: -0.12" style string from the UI
+    origin_str = str(origin_input).strip()
+    if not origin_iata and 'lat:' in origin_str.lower():
+        nums = re.findall(r"[-+]?\d*\.?\d+", origin_str)
+        if len(nums) >= 2:
+            origin_iata = _iata_from_coords(nums[0], nums[1])
+            print(f"DEBUG: origin via coord string → {origin_iata}")
+
+    # Case 2: Plain city name / airport code
+    if not origin_iata:
+        origin_iata = _iata_from_keyword(origin_str)
+        print(f"DEBUG: origin via keyword '{origin_str}' → {origin_iata}")
+
+    return origin_iata, dest_iata
+
+
+def build_deals(offers, carriers, depart_date):
+    """Cheapest and Fastest deal dicts from raw Amadeus offers (which arrive price-sorted)."""
+    def build_deal(label, offer):
+        depart_code = offer['itineraries'][0]['segments'][0]['departure']['iataCode']
+        arrive_code = offer['itineraries'][-1]['segments'][-1]['arrival']['iataCode']
+        booking_url = f"https://www.google.com/travel/flights?q=flights+from+{depart_code}+to+{arrive_code}+on+{depart_date}"
+        return {
+            "type": label,
+            "site": _airline_name(offer, carriers),
+            "price": offer['price']['total'],
+            "currency": offer['price']['currency'],
+            "duration_minutes": _total_duration(offer),
+            "booking_url": booking_url,
+            "from_airport": depart_code,
+            "to_airport": arrive_code,
+        }
+
+    return [
+        # Cheapest = lowest total price (results are already price-sorted by Amadeus)
+        build_deal("Cheapest", offers[0]),
+        # Fastest = shortest total flying time across all returned offers
+        build_deal("Fastest", min(offers, key=_total_duration)),
+    ]
+
+
+def search_deals(origin_iata, dest_iata, depart_date, currency='USD'):
+    """
+    One Amadeus offer search, parsed into Cheapest/Fastest deals.
+    Returns [] when the route has no offers; raises ResponseError on API errors.
+    """
+    print(f"DEBUG: searching {origin_iata} → {dest_iata} on {depart_date}")
+    amadeus_limiter.acquire()
+    response = amadeus.shopping.flight_offers_search.get(
+        originLocationCode=origin_iata,
+        destinationLocationCode=dest_iata,
+        departureDate=depart_date,
+        adults=1,
+        max=10,         # fetch more so we have a real fastest candidate
+        currencyCode=currency
+    )
+    if not response.data:
+        return []
+
+    print(f"DEBUG OFFERS: {[(o['price']['total'], o['price']['currency'], o['itineraries'][0]['segments'][0].get('carrierCode', '?')) for o in response.data]}")
+    carriers = response.result.get('dictionaries', {}).get('carriers', {})
+    return build_deals(response.data, carriers, depart_date)
+
+
+def get_flight_deals(destination_name, origin_input, lat=None, lon=None, origin_lat=None, origin_lon=None,
+                     depart_date=None, currency='USD'):
     """
     Returns a list with a 'Cheapest' and 'Fastest' flight offer dict,
-    or a single-item list containing an error dict.
+    or a single-item list containing an error dict. Searches are cached
+    per (origin, destination, date, currency), see flight_cache.
     """
     print(f"DEBUG PARAMS: dest={destination_name}, origin={origin_input}, lat={lat}, lon={lon}, origin_lat={origin_lat}, origin_lon={origin_lon}")
     try:
-        depart_date = (datetime.date.today() + datetime.timedelta(days=14)).isoformat()
-
-        # ── DESTINATION IATA ──────────────────────────────────────────────────
-        dest_iata = None
-        if lat is not None and lon is not None:
-            try:
-                if float(lat) != 0.0 or float(lon) != 0.0:
-                    dest_iata = _iata_from_coords(lat, lon)
-                    print(f"DEBUG: dest via coords → {dest_iata}")
-            except (ValueError, TypeError):
-                pass
-
-        if not dest_iata:
-            keyword = destination_name.replace('_', ' ').split()[-1]
-            dest_iata = _iata_from_keyword(keyword)
-            print(f"DEBUG: dest via keyword '{keyword}' → {dest_iata}")
-
-        # ── ORIGIN IATA ───────────────────────────────────────────────────────
-        origin_iata = None
-
-        # Use GPS coords first if available (most accurate)
-        if origin_lat and origin_lon:
-            origin_iata = _iata_from_coords(origin_lat, origin_lon)
-            print(f"DEBUG: origin via GPS coords → {origin_iata}")
-
-        # Case 1: "Lat: 51.5, Lon: -0.12" style string from the UI
-        if not origin_iata:
-            origin_str = str(origin_input).strip()
-            if 'lat:' in origin_str.lower():
-                nums = re.findall(r"[-+]?\d*\.?\d+", origin_str)
-                if len(nums) >= 2:
-                    origin_iata = _iata_from_coords(nums[0], nums[1])
-                    print(f"DEBUG: origin via coord string → {origin_iata}")
-
-        # Case 2: Plain city name / airport code
-        if not origin_iata:
-            origin_iata = _iata_from_keyword(origin_str)
-            print(f"DEBUG: origin via keyword '{origin_str}' → {origin_iata}")
+        depart_date = depart_date or (datetime.date.today() + datetime.timedelta(days=14)).isoformat()
+        currency = (currency or 'USD').upper()
+
+        origin_iata, dest_iata = resolve_route(destination_name, origin_input, lat, lon, origin_lat, origin_lon)
 
         # ── VALIDATION ────────────────────────────────────────────────────────
         if not dest_iata or not origin_iata:
@@ -120,52 +225,14 @@ def get_flight_deals(destination_name, origin_input, lat=None, lon=None, origin_
             return [{"error": f"Origin and destination resolved to the same airport ({origin_iata}). Please check your inputs."}]
 
         # ── FLIGHT SEARCH ─────────────────────────────────────────────────────
-        print(f"DEBUG: searching {origin_iata} → {dest_iata} on {depart_date}")
-        response = amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin_iata,
-            destinationLocationCode=dest_iata,
-            departureDate=depart_date,
-            adults=1,
-            max=10,         # fetch more so we have a real fastest candidate
-            currencyCode='USD'
-        )
-
-        if not response.data:
+        deals = flight_cache.get_deals(origin_iata, dest_iata, depart_date, currency, search_deals)
+        if not deals:
             return [{"error": "No flights found for this route and date."}]
-        
-        print(f"DEBUG OFFERS: {[(o['price']['total'], o['price']['currency'], o['itineraries'][0]['segments'][0].get('carrierCode', '?')) for o in response.data]}")
-
-        carriers = response.result.get('dictionaries', {}).get('carriers', {})
-
-        # Cheapest = lowest total price (results are already price-sorted by Amadeus)
-        cheapest = response.data[0]
-
-        # Fastest = shortest total flying time across all returned offers
-        fastest = min(response.data, key=_total_duration)
-
-        def build_deal(label, offer):
-            depart_code = offer['itineraries'][0]['segments'][0]['departure']['iataCode']
-            arrive_code = offer['itineraries'][-1]['segments'][-1]['arrival']['iataCode']
-            booking_url = f"https://www.google.com/travel/flights?q=flights+from+{depart_code}+to+{arrive_code}+on+{depart_date}"
-            return {
-                "type": label,
-                "site": _airline_name(offer, carriers),
-                "price": offer['price']['total'],
-                "currency": offer['price']['currency'],
-                "duration_minutes": _total_duration(offer),
-                "booking_url": booking_url,
-                "from_airport": depart_code,
-                "to_airport": arrive_code, 
-            }
-
-        return [
-            build_deal("Cheapest", cheapest),
-            build_deal("Fastest", fastest),
-        ]
+        return deals
 
     except ResponseError as api_err:
         print(f"DEBUG: Amadeus API error: {api_err}")
         return [{"error": f"Amadeus API error: {api_err.response.body}"}]
     except Exception as fatal:
         print(f"CRITICAL: {fatal}")
-        return [{"error": "Flight service encountered an unexpected error."}]
\ No newline at end of file
+        return [{"error": "Flight service encountered an unexpected error."}]
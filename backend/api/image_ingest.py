@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from . import dedup_index
+from .dedup_index import image_phash
+from .preprocessing import MAX_IMAGE_PIXELS, InvalidImageError
+from api.utils.image_store import store_image_bytes
+
+# ---------------- Config ----------------
+# Longest side kept for training images. Training crops to 224, so anything
+# much bigger only costs disk and decode time.
+INGEST_MAX_SIDE = int(os.getenv("INGEST_MAX_SIDE", "1024"))
+INGEST_JPEG_QUALITY = int(os.getenv("INGEST_JPEG_QUALITY", "90"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="image-ingest")
+
+
+def normalise_image(source, max_side=INGEST_MAX_SIDE) -> Image.Image:
+    """
+    Opens an upload (path or file object), checks it is a real image of sane
+    size, and returns it as RGB with its longest side at most max_side.
+    """
+    try:
+        # The context manager closes the file Image.open() opened for a path
+        with Image.open(source) as img:
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise InvalidImageError(f"Image is too large ({img.width}x{img.height}).")
+            # JPEGs are decoded at reduced scale straight away when they are much bigger than needed
+            img.draft("RGB", (max_side, max_side))
+            img.load()
+            rgb = img.convert("RGB")
+        rgb.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+        return rgb
+    except InvalidImageError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(f"Could not read image: {e}")
+
+
+def _ingest_one(source, folder, landmark_name):
+    """Worker: normalise, dedup, re-encode as JPEG and store. Returns ('saved', (filename, phash)) etc."""
+    try:
+        img = normalise_image(source)
+    except InvalidImageError as e:
+        return "invalid", str(e)
+
+    phash = image_phash(img)
+    if not dedup_index.claim(landmark_name, phash, sync_db=False):
+        return "duplicate", None
+
+    try:
+        buf = BytesIO()
+        img.save(buf, format="JPEG", quality=INGEST_JPEG_QUALITY, optimize=True)
+        # store_image_bytes removes its own temp file if the write fails
+        return "saved", (store_image_bytes(folder, buf.getvalue(), ".jpg"), phash)
+    except Exception:
+        dedup_index.release(landmark_name, phash)
+        raise
+
+
+def _ingest_safely(upload, source, folder, landmark_name):
+    """Runs _ingest_one, turning any unexpected failure into an 'invalid' outcome for that file."""
+    try:
+        return _ingest_one(source(upload), folder, landmark_name)
+    except Exception as e:
+        print(f"Image ingest failed for {upload.name}: {e}")
+        return "invalid", f"Could not process image: {e}"
+
+
+def discard_saved(landmark_name, folder, saved):
+    """
+    Undoes ingest for (filename, phash) pairs that will not get a LandmarkImage
+    row: deletes the stored files and releases their dedup claims. A claim only
+    succeeds when no known image has that hash, so no other row shares the file.
+    """
+    for filename, phash in saved:
+        try:
+            os.remove(os.path.join(folder, filename))
+        except FileNotFoundError:
+            pass
+        dedup_index.release(landmark_name, phash)
+
+
+def ingest_uploads(landmark_name, folder, uploads) -> dict:
+    """
+    Processes uploaded files on the bounded ingest pool. Only file handles
+    are queued, and each worker holds one decoded image at a time, so memory
+    stays flat however many files a request carries.
+
+    Returns {'saved': [(filename, phash)], 'duplicates': n, 'invalid': [(name, error)]}
+    in upload order.
+    """
+    dedup_index.sync(landmark_name)
+
+    def _source(upload):
+        # Streamed uploads live in a temp file; small in-memory ones are read directly
+        if hasattr(upload, "temporary_file_path"):
+            return upload.temporary_file_path()
+        upload.seek(0)
+        return upload
+
+    results = _pool.map(lambda u: _ingest_safely(u, _source, folder, landmark_name), uploads)
+
+    report = {"saved": [], "duplicates": 0, "invalid": []}
+    for upload, (outcome, value) in zip(uploads, results):
+        if outcome == "saved":
+            report["saved"].append(value)
+        elif outcome == "duplicate":
+            report["duplicates"] += 1
+        else:
+            report["invalid"].append((upload.name, value))
+    return report
@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+
+class BatchingInferenceEngine:
+    """
+    Collects single-image prediction requests from many request threads and
+    runs them through the model as one batched forward pass.
+
+    A request waits at most `batch_window_ms` for other requests to join its
+    batch; a batch is dispatched early once it reaches `max_batch_size`.
+    """
+
+    def __init__(self, model_loader, max_batch_size=16, batch_window_ms=5.0):
+        # model_loader() -> (model, classes); called once per batch so that
+        # every item in a batch is scored by the same weights/class names.
+        self.model_loader = model_loader
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batch_window = max(0.0, float(batch_window_ms)) / 1000.0
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+        # Simple counters, handy for benchmarks and debugging
+        self.batches_run = 0
+        self.items_run = 0
+
+    # ---------------- Public API ----------------
+    def submit(self, img_tensor) -> Future:
+        """Queue one preprocessed (3, H, W) tensor. Returns a Future with the prediction dict."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((img_tensor, future))
+        return future
+
+    def predict(self, img_tensor, timeout=None) -> dict:
+        """Blocking helper: submit a tensor and wait for its own label and confidence."""
+        return self.submit(img_tensor).result(timeout=timeout)
+
+    # ---------------- Worker thread ----------------
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so a gunicorn worker forked from a
+        # preloaded master must start its own batching thread and queue.
+        pid = os.getpid()
+        if self._pid == pid and self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._worker is not None and self._worker.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._pid = pid
+            self._worker = threading.Thread(
+                target=self._run, args=(self._queue,), name="inference-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _collect_batch(self, work_queue):
+        batch = [work_queue.get()]
+        deadline = time.monotonic() + self.batch_window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(work_queue.get(timeout=remaining))
+                else:
+                    # Window closed: still take whatever is already waiting
+                    batch.append(work_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, work_queue):
+        while True:
+            batch = self._collect_batch(work_queue)
+            self._run_batch(batch)
+
+    def _forward(self, tensors):
+        model, classes = self.model_loader()
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = model(torch.stack(tensors))
+            probs = torch.softmax(outputs, dim=1)
+            confidence, predicted = torch.max(probs, 1)
+        forward_ms = round((time.perf_counter() - start) * 1000, 2)
+        return [
+            {
+                "label": classes[predicted[i].item()],
+                "confidence": round(confidence[i].item(), 4),
+                # Shared by the whole batch; reported in per-request timings
+                "forward_ms": forward_ms,
+                "batch_size": len(tensors)
+            }
+            for i in range(len(tensors))
+        ]
+
+    def predict_batch(self, tensors) -> list:
+        """
+        Runs an already-collected list of tensors as one forward pass on the
+        calling thread (used by the multi-image endpoint). Returns a list of
+        prediction dicts in the same order.
+        """
+        if not tensors:
+            return []
+        results = self._forward(list(tensors))
+        self.batches_run += 1
+        self.items_run += len(results)
+        return results
+
+    def _run_batch(self, batch):
+        tensors = [item[0] for item in batch]
+        futures = [item[1] for item in batch]
+
+        try:
+            results = self._forward(tensors)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.items_run += len(batch)
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
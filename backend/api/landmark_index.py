@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import uuid
+
+from .utils.spatial_index import SphericalIndex
+
+# ---------------- Config ----------------
+# How often a worker checks whether another worker changed the landmark table
+LANDMARK_INDEX_CHECK_S = float(os.getenv("LANDMARK_INDEX_CHECK_S", "2"))
+NEARBY_MAX_RESULTS = 100
+
+_VERSION_KEY = "landmarks:index-version"
+# Saves that only touch these fields don't move a landmark, so the index is kept
+_INDEXED_FIELDS = {"name", "latitude", "longitude"}
+
+
+class LandmarkSnapshot:
+    """An immutable copy of every landmark's position plus the k-d tree built over it."""
+
+    def __init__(self, rows, version):
+        self.rows = rows  # (id, name, lat, lon) tuples
+        self.version = version
+        self.index = SphericalIndex([r[2] for r in rows], [r[3] for r in rows])
+        self.built_at = time.time()
+
+    def _result(self, row, km):
+        landmark_id, name, lat, lon = self.rows[row]
+        return {"id": landmark_id, "name": name, "lat": lat, "lon": lon, "distance_km": round(km, 2)}
+
+    def nearest(self, lat, lon, k=10, max_km=None) -> list:
+        return [self._result(r, km) for r, km in self.index.nearest(lat, lon, k=k, max_km=max_km)]
+
+
+_snapshot = None
+_lock = threading.Lock()
+# Bumped by this process' signal handlers; the shared stamp covers other workers
+_local_version = 0
+_shared_version = None
+_shared_checked_at = 0.0
+
+
+def _read_shared_version():
+    global _shared_version, _shared_checked_at
+    now = time.monotonic()
+    if now - _shared_checked_at >= LANDMARK_INDEX_CHECK_S:
+        from django.core.cache import caches
+        _shared_version = caches["external"].get(_VERSION_KEY)
+        _shared_checked_at = now
+    return _shared_version
+
+
+def current_version():
+    return _local_version, _read_shared_version()
+
+
+def _build(version):
+    from .models import Landmark
+
+    start = time.perf_counter()
+    rows = list(Landmark.objects.order_by("id").values_list("id", "name", "latitude", "longitude"))
+    snapshot = LandmarkSnapshot(rows, version)
+    print(f"DEBUG: landmark index rebuilt with {len(rows)} landmarks in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return snapshot
+
+
+def get_landmark_index() -> LandmarkSnapshot:
+    """
+    The current snapshot, rebuilt first if landmarks changed since it was
+    built. Queries on a snapshot never touch the DB; only the first request
+    after a change pays for the rebuild, the rest keep reading the old one.
+    """
+    global _snapshot
+    version = current_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    # With a snapshot in hand, don't queue behind a rebuild that is already running;
+    # a snapshot a moment old is fine
+    if not _lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        version = current_version()
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _build(version)
+        return _snapshot
+    finally:
+        _lock.release()
+
+
+def mark_landmarks_changed():
+    """Makes this worker rebuild on its next query and tells the other workers to do the same."""
+    global _local_version, _shared_checked_at
+    from django.core.cache import caches
+
+    _local_version += 1
+    caches["external"].set(_VERSION_KEY, uuid.uuid4().hex, None)
+    # Re-read the stamp we just wrote, so this worker doesn't rebuild twice
+    _shared_checked_at = 0.0
+
+
+def _on_landmark_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields and not _INDEXED_FIELDS.intersection(update_fields):
+        return
+    from django.db import transaction
+    # After commit, so a rebuild on another thread can see the row
+    transaction.on_commit(mark_landmarks_changed)
+
+
+def _on_landmark_deleted(sender, instance, **kwargs):
+    from django.db import transaction
+    transaction.on_commit(mark_landmarks_changed)
+
+
+def connect_signals():
+    """
+    Called from ApiConfig.ready(). QuerySet.update() and bulk_create() send
+    no signals; code that moves landmarks that way must call
+    mark_landmarks_changed() itself.
+    """
+    from django.db.models.signals import post_delete, post_save
+    from .models import Landmark
+
+    post_save.connect(_on_landmark_saved, sender=Landmark, dispatch_uid="landmark_index_saved")
+    post_delete.connect(_on_landmark_deleted, sender=Landmark, dispatch_uid="landmark_index_deleted")
+
+
+def nearby_landmarks(lat, lon, radius_km=None, k=10) -> list:
+    """
+    Landmarks closest to (lat, lon), nearest first: the k nearest, or with
+    radius_km every landmark inside the radius (at most k of them).
+    """
+    k = max(1, min(int(k), NEARBY_MAX_RESULTS))
+    # A radius query is a bounded k-NN query, so the tree never visits points past the radius
+    return get_landmark_index().nearest(lat, lon, k=k, max_km=radius_km)
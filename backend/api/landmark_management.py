@@ -1,4 +1,7 @@
+import hashlib
+import os
 import requests
+from django.core.cache import caches
 from .models import Landmark
 from typing import Union # New import for Python 3.9 type hinting
 
@@ -8,7 +11,10 @@ HEADERS = {
 }
 
 # ---------------- Wikidata API ----------------
-WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+# Overridable so the fixture server (api/utils/wikidata_fixture_server.py) can stand in for it
+WIKIDATA_API = os.getenv("WIKIDATA_API", "https://www.wikidata.org/w/api.php")
+# wbgetentities accepts at most 50 pipe-separated ids per call
+WIKIDATA_MAX_IDS = 50
 
 ALIASES = {
     "pyramids_of_giza": [
@@ -17,84 +23,123 @@ ALIASES = {
     ]
 }
 
-def _get_coordinates(entity_id):
-    params = {
-        "action": "wbgetentities",
-        "ids": entity_id,
-        "props": "claims",
-        "format": "json"
-    }
+# Entities without a P625 claim are cached as this, so they are not looked up again
+_NO_COORDS = "none"
 
-    try:
-        resp = requests.get(
-            WIKIDATA_API,
-            params=params,
-            headers=HEADERS,
-            timeout=10
-        )
-        resp.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-        data = resp.json()
-        claims = data["entities"][entity_id].get("claims", {})
-
-        if "P625" not in claims:
-            return None
 
-        coord = claims["P625"][0]["mainsnak"]["datavalue"]["value"]
-        return {
-            "lat": coord["latitude"],
-            "lon": coord["longitude"]
-        }
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching coordinates from Wikidata for {entity_id}: {e}")
-        return None
+def _cache_key(*parts):
+    return "wikidata:" + hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _wikidata_get(params):
+    """GET against the Wikidata API. Raises requests exceptions; callers decide what to cache."""
+    resp = requests.get(
+        WIKIDATA_API,
+        params=params,
+        headers=HEADERS,
+        timeout=10
+    )
+    resp.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+    return resp.json()
+
+
+def _get_coordinates_many(entity_ids):
+    """
+    Resolves coordinates for many entities with one batched wbgetentities call
+    (ids are pipe-separated). Results, including "has no coordinates", are
+    kept in the persistent cache. Returns {entity_id: {"lat", "lon"} or None}.
+    """
+    cache = caches["external"]
+    keys = {entity_id: _cache_key("coords", entity_id) for entity_id in entity_ids}
+    cached = cache.get_many(list(keys.values()))
+
+    found = {}
+    missing = []
+    for entity_id, key in keys.items():
+        if key in cached:
+            found[entity_id] = None if cached[key] == _NO_COORDS else cached[key]
+        else:
+            missing.append(entity_id)
+
+    for start in range(0, len(missing), WIKIDATA_MAX_IDS):
+        chunk = missing[start:start + WIKIDATA_MAX_IDS]
+        try:
+            data = _wikidata_get({
+                "action": "wbgetentities",
+                "ids": "|".join(chunk),
+                "props": "claims",
+                "format": "json"
+            })
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching coordinates from Wikidata for {chunk}: {e}")
+            continue
+
+        to_cache = {}
+        for entity_id in chunk:
+            claims = data.get("entities", {}).get(entity_id, {}).get("claims", {})
+            coords = None
+            if "P625" in claims:
+                coord = claims["P625"][0]["mainsnak"]["datavalue"]["value"]
+                coords = {
+                    "lat": coord["latitude"],
+                    "lon": coord["longitude"]
+                }
+            found[entity_id] = coords
+            to_cache[keys[entity_id]] = coords or _NO_COORDS
+        cache.set_many(to_cache)
+
+    return found
+
+
+def _get_coordinates(entity_id):
+    return _get_coordinates_many([entity_id]).get(entity_id)
+
+
+def _search_results(query):
+    """wbsearchentities results for a query, from the persistent cache when possible."""
+    cache = caches["external"]
+    key = _cache_key("search", query)
+    results = cache.get(key)
+    if results is None:
+        results = _wikidata_get({
+            "action": "wbsearchentities",
+            "search": query,
+            "language": "en",
+            "type": "item",
+            "format": "json",
+            "limit": 10
+        }).get("search", [])
+        cache.set(key, results)
+    return results
+
 
 def _search_wikidata(landmark_name):
     query = landmark_name.replace("_", " ").lower()
 
-    params = {
-        "action": "wbsearchentities",
-        "search": query,
-        "language": "en",
-        "type": "item",
-        "format": "json",
-        "limit": 10
-    }
-
     try:
-        resp = requests.get(
-            WIKIDATA_API,
-            params=params,
-            headers=HEADERS,
-            timeout=10
-        )
-        resp.raise_for_status()
-        results = resp.json().get("search", [])
+        results = _search_results(query)
         if not results:
             return None
 
         query_words = set(query.split())
 
-        # 1️⃣ Exact label match
-        for r in results:
-            if r.get("label", "").lower() == query:
-                coords = _get_coordinates(r["id"])
-                if coords:
-                    return {"coords": coords, "wikidata_id": r["id"]}
-
-        # 2️⃣ Word containment match
-        for r in results:
-            label_words = set(r.get("label", "").lower().split())
-            if query_words.issubset(label_words):
-                coords = _get_coordinates(r["id"])
-                if coords:
-                    return {"coords": coords, "wikidata_id": r["id"]}
-
-        # 3️⃣ Substring fallback
-        for r in results:
-            if query in r.get("label", "").lower():
-                coords = _get_coordinates(r["id"])
-                if coords:
-                    return {"coords": coords, "wikidata_id": r["id"]}
+        # Candidates in priority order:
+        # 1️⃣ Exact label match, 2️⃣ word containment match, 3️⃣ substring fallback
+        candidates = []
+        for matches in (
+            lambda label: label == query,
+            lambda label: query_words.issubset(set(label.split())),
+            lambda label: query in label,
+        ):
+            for r in results:
+                if matches(r.get("label", "").lower()) and r["id"] not in candidates:
+                    candidates.append(r["id"])
+
+        # One batched lookup for every candidate, then take the best one that has coordinates
+        coords_by_id = _get_coordinates_many(candidates)
+        for entity_id in candidates:
+            if coords_by_id.get(entity_id):
+                return {"coords": coords_by_id[entity_id], "wikidata_id": entity_id}
 
     except requests.exceptions.RequestException as e:
         print(f"Error searching Wikidata for {landmark_name}: {e}")
@@ -108,7 +153,13 @@ def get_or_create_landmark(standardized_landmark_name: str) -> Union[Landmark, N
     Returns the Landmark object or None if it cannot be found/created.
     """
     try:
-        return Landmark.objects.get(name=standardized_landmark_name)
+        landmark = Landmark.objects.get(name=standardized_landmark_name)
+        if landmark.wikidata_id and not landmark.summary:
+            # Created earlier but not enriched yet; joins any in-flight task and
+            # respects the retry backoff after a failure
+            from .enrichment import maybe_enrich
+            maybe_enrich(landmark)
+        return landmark
     except Landmark.DoesNotExist:
         print(f"Landmark '{standardized_landmark_name}' not found in DB. Attempting to fetch from Wikidata...")
 
@@ -129,23 +180,22 @@ def get_or_create_landmark(standardized_landmark_name: str) -> Union[Landmark, N
                     break
 
         if coords:
-            # Fetch summary using the new utility function
-            summary = None
-            if wikidata_id:
-                from .utils.landmark_facts import get_landmark_facts # Import here to avoid circular dependency
-                facts = get_landmark_facts(standardized_landmark_name) # This uses Wikipedia, not Wikidata
-                if facts:
-                    from .utils.gemini_summary import generate_summary # Import here to avoid circular dependency
-                    summary = generate_summary(standardized_landmark_name, facts)
-
-            new_landmark = Landmark.objects.create(
+            # Create the row straight away; facts + summary are filled in by a
+            # background enrichment task so the caller never waits on Wikipedia / Gemini.
+            # get_or_create covers two requests creating the same landmark at once.
+            new_landmark, created = Landmark.objects.get_or_create(
                 name=standardized_landmark_name,
-                latitude=coords["lat"],
-                longitude=coords["lon"],
-                summary=summary,
-                wikidata_id=wikidata_id
+                defaults={
+                    "latitude": coords["lat"],
+                    "longitude": coords["lon"],
+                    "wikidata_id": wikidata_id
+                }
             )
-            print(f"Successfully created new landmark: {new_landmark.name}")
+            if created:
+                print(f"Successfully created new landmark: {new_landmark.name}")
+            if wikidata_id and not new_landmark.summary:
+                from .enrichment import maybe_enrich # Import here to avoid circular dependency
+                maybe_enrich(new_landmark)
             return new_landmark
         else:
             print(f"Could not find coordinates for '{standardized_landmark_name}' on Wikidata.")
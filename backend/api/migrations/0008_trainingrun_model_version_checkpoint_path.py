@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_remove_landmarkprediction_distance_km_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='checkpoint_path',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_trainingrun_model_version_checkpoint_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='current_epoch',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='metrics',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
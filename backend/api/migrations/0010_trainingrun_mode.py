@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_trainingrun_current_epoch_metrics_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='mode',
+            field=models.CharField(default='full', max_length=10),
+        ),
+    ]
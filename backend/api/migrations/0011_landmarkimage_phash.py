@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_trainingrun_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landmarkimage',
+            name='phash',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
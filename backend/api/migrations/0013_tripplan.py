@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-17 16:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0012_scrapejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(blank=True, max_length=255)),
+                ('start_latitude', models.FloatField()),
+                ('start_longitude', models.FloatField()),
+                ('stops', models.JSONField(default=list)),
+                ('return_to_start', models.BooleanField(default=False)),
+                ('objective', models.CharField(default='distance', max_length=20)),
+                ('method', models.CharField(max_length=20)),
+                ('total_distance_km', models.FloatField()),
+                ('estimated_cost', models.FloatField()),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('landmarks', models.ManyToManyField(related_name='trip_plans', to='api.landmark')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import torch
+
+# ---------------- Paths ----------------
+# models/
+#   versions/<version>/landmark_resnet18.pth   (immutable once written)
+#   versions/<version>/class_names.json
+#   versions/<version>/test_split.json         (held-out images, as <class>/<file>)
+#   active.json                                (pointer to the live version)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+ACTIVE_POINTER_PATH = os.path.join(MODEL_DIR, "active.json")
+CHECKPOINT_NAME = "landmark_resnet18.pth"
+CLASS_NAMES_NAME = "class_names.json"
+TEST_SPLIT_NAME = "test_split.json"
+
+
+def version_dir(version) -> str:
+    return os.path.join(VERSIONS_DIR, str(version))
+
+
+def _write_json_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+# ---------------- Writing artifacts (training side) ----------------
+def save_artifact(version, state_dict, class_names, test_files=None) -> str:
+    """
+    Writes a checkpoint + class names (and the held-out test files, if given)
+    as a new immutable version directory. Files are written to a temp dir and
+    renamed into place, so readers never see a half-written version. Returns
+    the checkpoint path.
+    """
+    target_dir = version_dir(version)
+    if os.path.exists(target_dir):
+        raise FileExistsError(f"Model version {version} already exists at {target_dir}")
+
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=VERSIONS_DIR, prefix=f".{version}-")
+    try:
+        torch.save({
+            "model_state_dict": state_dict,
+            "classes": class_names
+        }, os.path.join(tmp_dir, CHECKPOINT_NAME))
+        with open(os.path.join(tmp_dir, CLASS_NAMES_NAME), "w") as f:
+            json.dump(class_names, f)
+        if test_files is not None:
+            with open(os.path.join(tmp_dir, TEST_SPLIT_NAME), "w") as f:
+                json.dump(test_files, f)
+        os.rename(tmp_dir, target_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return os.path.join(target_dir, CHECKPOINT_NAME)
+
+
+def publish(version):
+    """Atomically points active.json at an existing version."""
+    checkpoint = os.path.join(version_dir(version), CHECKPOINT_NAME)
+    if not os.path.exists(checkpoint):
+        raise FileNotFoundError(f"No checkpoint for model version {version}")
+    _write_json_atomic(ACTIVE_POINTER_PATH, {
+        "version": str(version),
+        "checkpoint": checkpoint,
+        "published_at": time.time()
+    })
+
+
+def read_active():
+    """Returns the active.json entry, or None when no version has been published yet."""
+    try:
+        with open(ACTIVE_POINTER_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def read_test_split(version):
+    """The <class>/<file> names held out when the version was trained, or None if not recorded."""
+    try:
+        with open(os.path.join(version_dir(version), TEST_SPLIT_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ---------------- Serving side ----------------
+class ModelHolder:
+    """
+    Holds the live (version, model, classes) tuple for this process and swaps
+    it when a new version is published.
+
+    The whole tuple is replaced in one assignment, so a reader always gets
+    weights and class names from the same version. New versions are loaded
+    and warmed on a background thread; requests keep using the old model
+    until the swap.
+    """
+
+    def __init__(self, loader, warmup=None, poll_interval=10.0):
+        # loader(entry) -> (model, classes); entry is read_active() or None
+        self.loader = loader
+        self.warmup = warmup
+        self.poll_interval = poll_interval
+
+        self._current = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._failed_version = None
+
+    def current(self, start_watcher=True):
+        """Returns (version, model, classes), loading the active version on first use."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._load(read_active())
+                current = self._current
+        if start_watcher and self.poll_interval > 0:
+            self._ensure_watcher()
+        return current
+
+    def _load(self, entry):
+        version = entry["version"] if entry else "legacy"
+        model, classes = self.loader(entry)
+        return version, model, classes
+
+    def _ensure_watcher(self):
+        # Like the batching engine, the watcher must be (re)started per worker after fork
+        pid = os.getpid()
+        if self._watcher_pid == pid and self._watcher is not None and self._watcher.is_alive():
+            return
+        with self._lock:
+            if self._watcher_pid == pid and self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher_pid = pid
+            self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            entry = read_active()
+            if entry is None or self._current is None:
+                continue
+            if entry["version"] in (self._current[0], self._failed_version):
+                continue
+            try:
+                new = self._load(entry)
+                if self.warmup:
+                    self.warmup(new[1])
+                self._current = new
+                print(f"Model hot-swapped to version {new[0]} (pid {os.getpid()})")
+            except Exception as e:
+                # Keep serving the old version until a newer one is published
+                self._failed_version = entry["version"]
+                print(f"Failed to load model version {entry.get('version')}: {e}")
@@ -21,6 +21,8 @@ class LandmarkImage(models.Model):
     source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # 64-bit average hash (signed), used to reject near-duplicates at ingest
+    phash = models.BigIntegerField(null=True, blank=True, db_index=True)
 
 # 3. PREDICTIONS (The "Report" history)
 class LandmarkPrediction(models.Model):
@@ -39,15 +41,56 @@ class TrainingRun(models.Model):
     model_name = models.CharField(max_length=100)
     image_count = models.IntegerField(null=True, blank=True)
     epochs = models.IntegerField()
+    mode = models.CharField(max_length=10, default='full') # full (fine-tune) or fast (head only)
     accuracy = models.FloatField(null=True, blank=True)
     loss = models.FloatField(null=True, blank=True)
-    status = models.CharField(max_length=20, default='processing') # processing, success, failed
+    status = models.CharField(max_length=20, default='processing') # queued, processing, success, failed
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Immutable checkpoint produced by this run (models/versions/<model_version>/)
+    model_version = models.CharField(max_length=50, null=True, blank=True)
+    checkpoint_path = models.CharField(max_length=500, null=True, blank=True)
+    # Live progress, written by the background training job after every epoch
+    current_epoch = models.IntegerField(default=0)
+    metrics = models.JSONField(default=list, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+# 4b. SCRAPE JOBS (Background image scraping with resumable progress)
+class ScrapeJob(models.Model):
+    landmark = models.ForeignKey(Landmark, on_delete=models.CASCADE, related_name='scrape_jobs')
+    search_query = models.CharField(max_length=500, null=True, blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, default='queued') # queued, processing, success, failed
+    target = models.IntegerField()
+    saved_count = models.IntegerField(default=0)
+    # Every URL already downloaded/rejected, so a resumed job never refetches them
+    attempted_urls = models.JSONField(default=list, blank=True)
+    error = models.TextField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
 # 5. CHAT (AI Interaction history)
 class ChatMessage(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     question = models.TextField()
     answer = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True)
+# 6. TRIP PLANS (Optimised multi-landmark routes, see trip_planner.py)
+class TripPlan(models.Model):
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    origin = models.CharField(max_length=255, blank=True)  # as typed, e.g. "Toronto" or "Lat: 42.3, Lon: -83.0"
+    start_latitude = models.FloatField()
+    start_longitude = models.FloatField()
+    landmarks = models.ManyToManyField(Landmark, related_name='trip_plans')
+    # Visiting order with per-leg distance/cost: [{"id", "name", "lat", "lon", "leg_km", "leg_cost"}, ...]
+    stops = models.JSONField(default=list)
+    return_to_start = models.BooleanField(default=False)
+    objective = models.CharField(max_length=20, default='distance') # distance, cost
+    method = models.CharField(max_length=20) # exact, heuristic
+    total_distance_km = models.FloatField()
+    estimated_cost = models.FloatField()
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
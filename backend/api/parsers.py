@@ -0,0 +1,15 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.parsers import MultiPartParser
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    """
+    Multipart parser that streams every uploaded file straight to a temp file
+    on disk. Django's default keeps files under 2.5 MB in memory, so a
+    request with hundreds of photos would hold them all in RAM at once.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        django_request = parser_context['request']._request
+        django_request.upload_handlers = [TemporaryFileUploadHandler(django_request)]
+        return super().parse(stream, media_type, parser_context)
@@ -1,63 +1,177 @@
-import io
 import json
-from PIL import Image
 import torch
 import torch.nn as nn
-from torchvision import models, transforms
+from torchvision import models
 import os
+import time
+from . import export_model, model_registry
+from .inference_engine import BatchingInferenceEngine
+from .preprocessing import preprocess_in_pool, preprocess_many
+from .utils import worker_metrics
 
 # ---------------- Paths and Model Loading ----------------
 # Adjusted BASE_DIR for predict.py being in backend/api/
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Legacy un-versioned checkpoint, used only until the first version is published
 MODEL_PATH = os.path.join(BASE_DIR, "models", "landmark_resnet18.pth")
 CLASS_NAMES_PATH = os.path.join(BASE_DIR, "models", "class_names.json")
 
 device = torch.device("cpu") # Consider using "cuda" if a GPU is available
 
-model = None
-classes = None
+# "classifier" (trained ResNet head) or "knn" (nearest reference images, see embedding_index)
+PREDICTION_ENGINE = os.getenv("PREDICTION_ENGINE", "classifier")
+PREDICTION_ENGINES = ("classifier", "knn")
 
-# ---------------- Transforms ----------------
-transform = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(
-        mean=[0.485, 0.456, 0.406],
-        std=[0.229, 0.224, 0.225]
-    )
-])
+# "fp32" (eager checkpoint) or "int8" (quantized TorchScript export, see export_model)
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "fp32")
 
-# ---------------- Load model and class names once ----------------
-def load_model_and_classes():
-    global model, classes
-    if model is None or classes is None:
-        # Load class names
+# How often each worker checks models/active.json for a newly trained version
+MODEL_POLL_INTERVAL_S = float(os.getenv("MODEL_POLL_INTERVAL_S", "10"))
+
+# ---------------- Batching config ----------------
+# How long a request waits for others to share its forward pass, and the
+# largest batch we will run at once. Set the window to 0 to only batch
+# requests that are already queued.
+PREDICT_BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "5"))
+PREDICT_MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "16"))
+
+# ---------------- Load model and class names ----------------
+def _build_model(state_dict, num_classes):
+    # Build on the meta device and adopt the checkpoint tensors directly
+    # (assign=True): no random init work and no second copy of the weights.
+    # With mmap=True below those tensors are backed by the page cache, so
+    # every worker on the box shares one read-only copy.
+    with torch.device("meta"):
+        net = models.resnet18(weights=None)
+        net.fc = nn.Linear(net.fc.in_features, num_classes)
+    net.load_state_dict(state_dict, assign=True)
+    net.eval()
+    return net
+
+def _load_version(entry):
+    """Loads the model for a registry entry (or the legacy files when entry is None)."""
+    start = time.perf_counter()
+    if entry and MODEL_VARIANT == "int8":
+        if os.path.exists(export_model.quantized_path(entry["version"])):
+            with open(os.path.join(model_registry.version_dir(entry["version"]), model_registry.CLASS_NAMES_NAME)) as f:
+                loaded_classes = json.load(f)
+            net = export_model.load_int8(entry["version"])
+            worker_metrics.record_model_load(time.perf_counter() - start)
+            return net, loaded_classes
+        print(f"No INT8 export for model version {entry['version']}; serving FP32")
+
+    if entry:
+        checkpoint_path = os.path.join(model_registry.version_dir(entry["version"]), model_registry.CHECKPOINT_NAME)
+        checkpoint = torch.load(checkpoint_path, map_location=device, mmap=True)
+        # Class names travel inside the checkpoint, so they always match the weights
+        loaded_classes = checkpoint["classes"]
+    else:
         with open(CLASS_NAMES_PATH) as f:
-            classes = json.load(f)
+            loaded_classes = json.load(f)
+        checkpoint = torch.load(MODEL_PATH, map_location=device, mmap=True)
+
+    net = _build_model(checkpoint["model_state_dict"], len(loaded_classes))
+    worker_metrics.record_model_load(time.perf_counter() - start)
+    return net, loaded_classes
+
+def _warmup(net):
+    with torch.no_grad():
+        net(torch.zeros(1, 3, 224, 224))
+
+registry = model_registry.ModelHolder(_load_version, warmup=_warmup, poll_interval=MODEL_POLL_INTERVAL_S)
 
-        checkpoint = torch.load(MODEL_PATH, map_location=device)
-        num_classes = len(classes)
+def load_model_and_classes():
+    """Returns (model, classes) for the live version; both always come from the same checkpoint."""
+    _, net, names = registry.current()
+    return net, names
+
+def current_model_version():
+    return registry.current(start_watcher=False)[0]
+
+def preload_model():
+    """
+    Loads the model in the gunicorn master before workers fork (see
+    gunicorn.conf.py), so workers start with the weights already mapped.
+    """
+    try:
+        # No watcher thread in the master: threads do not survive the fork
+        version = registry.current(start_watcher=False)[0]
+        worker_metrics.mark_model_preloaded()
+        print(f"Model version {version} preloaded")
+    except FileNotFoundError:
+        print("No trained model found; skipping preload.")
 
-        model = models.resnet18(weights=None)
-        model.fc = nn.Linear(model.fc.in_features, num_classes)
-        model.load_state_dict(checkpoint["model_state_dict"])
-        model.eval()
-    return model, classes
+def warmup_model():
+    """
+    Runs one dummy forward pass so the first real request does not pay for
+    lazy allocator / kernel setup. Call after fork, before taking traffic.
+    """
+    try:
+        net, _ = load_model_and_classes()
+    except FileNotFoundError:
+        return
+    start = time.perf_counter()
+    _warmup(net)
+    worker_metrics.record_warmup(time.perf_counter() - start)
+
+# ---------------- Batching engine ----------------
+batcher = BatchingInferenceEngine(
+    load_model_and_classes,
+    max_batch_size=PREDICT_MAX_BATCH_SIZE,
+    batch_window_ms=PREDICT_BATCH_WINDOW_MS
+)
 
 # ---------------- Prediction function ----------------
-def predict_image(image_bytes: bytes):
-    model, classes = load_model_and_classes()
+def _with_timings(prediction, timings):
+    # Move the engine's batch stats into the per-stage timings block
+    result = dict(prediction)
+    timings = dict(timings or {})
+    for key in ("forward_ms", "batch_size"):
+        if key in result:
+            timings[key] = result.pop(key)
+    result["timings"] = timings
+    return result
 
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    img_tensor = transform(image).unsqueeze(0)
+def predict_image(image_bytes: bytes, engine: str = None):
+    """
+    Raises preprocessing.InvalidImageError for corrupt or oversized uploads.
+    The result carries per-stage timings (decode_ms, transform_ms, forward_ms, total_ms).
+    """
+    engine_name = engine or PREDICTION_ENGINE
+    if engine_name == "knn":
+        # Imported lazily: the k-NN engine needs the DB and its own backbone
+        from .embedding_index import predict_image_knn
+        return predict_image_knn(image_bytes)
 
-    with torch.no_grad():
-        outputs = model(img_tensor)
-        probs = torch.softmax(outputs, dim=1)
-        confidence, predicted = torch.max(probs, 1)
+    start = time.perf_counter()
+    img_tensor, timings = preprocess_in_pool(image_bytes)
+
+    # Concurrent requests are merged into one forward pass by the batcher
+    infer_start = time.perf_counter()
+    prediction = batcher.predict(img_tensor)
+    worker_metrics.record_prediction(time.perf_counter() - infer_start)
+
+    timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return _with_timings(prediction, timings)
+
+
+# ---------------- Multi-image prediction ----------------
+def predict_images(images: list, engine: str = None) -> list:
+    """
+    Predicts many images in one go: decodes them in parallel, then runs all
+    readable ones through a single batched forward pass. Returns one dict per
+    input, in input order; unreadable images get {'error': ...}.
+    """
+    decoded = preprocess_many(images)
+    tensors = [tensor for tensor, _, _ in decoded if tensor is not None]
 
-    return {
-        "label": classes[predicted.item()],
-        "confidence": round(confidence.item(), 4)
-    }
+    if (engine or PREDICTION_ENGINE) == "knn":
+        from .embedding_index import predict_tensors_knn
+        predictions = iter(predict_tensors_knn(tensors) if tensors else [])
+    else:
+        predictions = iter(batcher.predict_batch(tensors))
 
+    return [
+        _with_timings(next(predictions), timings) if tensor is not None else {"error": error}
+        for tensor, timings, error in decoded
+    ]
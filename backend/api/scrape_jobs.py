@@ -0,0 +1,118 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+# ---------------- Config ----------------
+# Scraping is network-bound, so jobs run on threads inside the web worker
+MAX_CONCURRENT_SCRAPE_JOBS = int(os.getenv("MAX_CONCURRENT_SCRAPE_JOBS", "2"))
+# A 'processing' job with no progress for this long is treated as interrupted and may be resumed
+SCRAPE_STALE_SECONDS = int(os.getenv("SCRAPE_STALE_SECONDS", "300"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Threads do not survive a fork, so each gunicorn worker gets its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SCRAPE_JOBS, thread_name_prefix="scrape-job")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def run_scrape_job(job_id):
+    """
+    Scrapes for a ScrapeJob. Every batch of saved images is committed as
+    LandmarkImage rows together with the URLs attempted so far, so an
+    interrupted job keeps its images and resumes where it stopped.
+    """
+    from django.db import close_old_connections, transaction
+    from django.db.models import F
+    from django.utils import timezone
+    from . import dedup_index
+    from .models import LandmarkImage, ScrapeJob
+    from .scraping_service import scrape_images_for_landmark
+
+    close_old_connections()
+    try:
+        # Claim the job with one conditional UPDATE: a copy queued twice (e.g. by
+        # resume_scrape while this one waited for a pool thread) finds it taken and stops
+        claimed = ScrapeJob.objects.filter(pk=job_id, status='queued').update(
+            status='processing', error=None, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        job = ScrapeJob.objects.select_related('landmark').get(pk=job_id)
+        attempted = list(job.attempted_urls)
+        landmark = job.landmark
+
+        def on_batch(batch_urls, batch_saved):
+            attempted.extend(batch_urls)
+            try:
+                with transaction.atomic():
+                    LandmarkImage.objects.bulk_create([
+                        LandmarkImage(
+                            landmark=landmark,
+                            image=f"data/raw/{landmark.name}/{fname}",
+                            source='SCRAPED',
+                            user_id=job.user_id,
+                            phash=phash
+                        ) for fname, phash in batch_saved
+                    ])
+                    ScrapeJob.objects.filter(pk=job_id).update(
+                        saved_count=F('saved_count') + len(batch_saved),
+                        attempted_urls=attempted,
+                        updated_at=timezone.now()
+                    )
+            except Exception:
+                # No rows were written, so a retry must not see these images as duplicates
+                for _, phash in batch_saved:
+                    dedup_index.release(landmark.name, phash)
+                raise
+            # on_batch runs on a pipeline thread; don't leave its connection open
+            close_old_connections()
+
+        try:
+            scrape_images_for_landmark(
+                landmark.name,
+                job.search_query,
+                images_to_scrape=job.target - job.saved_count,
+                skip_urls=attempted,
+                on_batch=on_batch
+            )
+        except Exception as e:
+            ScrapeJob.objects.filter(pk=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+            return
+
+        ScrapeJob.objects.filter(pk=job_id).update(status='success', finished_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+def enqueue_scrape(job_id):
+    """Queues a ScrapeJob (already created with status 'queued') and returns immediately."""
+    return _get_executor().submit(run_scrape_job, job_id)
+
+
+def resume_scrape(job_id):
+    """
+    Re-queues a failed or interrupted job. Returns False if the job is
+    finished or still making progress somewhere.
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+    from .models import ScrapeJob
+
+    stale_before = timezone.now() - timedelta(seconds=SCRAPE_STALE_SECONDS)
+    # A single conditional UPDATE, so two resume calls cannot both win
+    claimed = ScrapeJob.objects.filter(pk=job_id).filter(
+        Q(status='failed') | Q(status__in=['queued', 'processing'], updated_at__lt=stale_before)
+    ).update(status='queued', finished_at=None, updated_at=timezone.now())
+    if not claimed:
+        return False
+    enqueue_scrape(job_id)
+    return True
@@ -1,4 +1,7 @@
+import asyncio
 import os
+from collections import defaultdict
+import httpx
 import requests
 import re
 import urllib.parse
@@ -7,6 +10,10 @@ from PIL import Image
 from io import BytesIO
 from bs4 import BeautifulSoup
 
+from . import dedup_index
+from .dedup_index import image_phash
+from api.utils.image_store import store_image_bytes
+
 # --- 1. CONFIGURATION & CONSTANTS ---
 
 HEADERS = {
@@ -38,120 +45,257 @@ DEFAULT_KEYWORDS = {
     "burj_khalifa": ["Burj Khalifa Dubai", "Burj Khalifa UAE"]
 }
 
+# Download pipeline limits
+DOWNLOAD_CONCURRENCY = 32          # concurrent downloads overall (also the connection pool size)
+PER_HOST_CONCURRENCY = 4           # so one slow or strict host cannot hog the pool
+GLOBAL_RATE_PER_SEC = 50           # request starts per second across all hosts
+DOWNLOAD_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+SAVE_WORKERS = 4                   # threads for PIL validation + saving
+PROGRESS_BATCH_SIZE = 10           # saved images per on_batch() call (background jobs commit these)
+PROGRESS_HEARTBEAT_S = 30          # also call on_batch this often while URLs are attempted but nothing is saved
+MIN_IMAGE_SIZE = 100
+
 # --- 2. UTILITY FUNCTIONS ---
 
 def _is_valid_url(url):
     return re.match(URL_REGEX, url) is not None
 
+
+def _validate_and_save(content, folder, landmark_name=None):
+    """
+    PIL validation, near-duplicate check + save. Returns (filename, phash),
+    or None if the image is rejected. Duplicates are never written to disk.
+    """
+    phash = None
+    try:
+        img = Image.open(BytesIO(content))
+        if img.width < MIN_IMAGE_SIZE or img.height < MIN_IMAGE_SIZE:
+            return None
+        if landmark_name:
+            phash = image_phash(img)
+            if not dedup_index.claim(landmark_name, phash, sync_db=False):
+                print("Skipping image: near-duplicate of an existing image")
+                phash = None  # not ours to release
+                return None
+            img = Image.open(BytesIO(content))  # draft() in image_phash shrank the decode
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        buf = BytesIO()
+        img.save(buf, format='JPEG')
+        # Content-addressed name: no directory scan, and parallel saves never collide
+        return store_image_bytes(folder, buf.getvalue(), '.jpg'), phash
+    except Exception as e:
+        print(f"Skipping image: {e}")
+        if landmark_name:
+            dedup_index.release(landmark_name, phash)
+        return None
+
+
+class _AsyncRateLimiter:
+    """Spaces request starts evenly so the whole pipeline stays under `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def _download_pipeline(urls, folder, target, headers=None, landmark_name=None, on_batch=None):
+    """
+    Two overlapping stages:
+      1. download  - pooled httpx connections, per-host + global rate limits
+      2. validate  - PIL check + save, in worker threads
+    Stops as soon as `target` images are saved. Returns (filename, phash) pairs.
+
+    on_batch(attempted_urls, saved_items) is called (in a thread) every
+    PROGRESS_BATCH_SIZE saves, at least every PROGRESS_HEARTBEAT_S while URLs
+    are being attempted, and once at the end. A URL counts as attempted once
+    it has failed, been rejected or been saved.
+    """
+    url_queue = asyncio.Queue()
+    for url in dict.fromkeys(urls):  # de-duplicate, keep order
+        url_queue.put_nowait(url)
+    content_queue = asyncio.Queue(maxsize=DOWNLOAD_CONCURRENCY)
+
+    host_limits = defaultdict(lambda: asyncio.Semaphore(PER_HOST_CONCURRENCY))
+    rate_limiter = _AsyncRateLimiter(GLOBAL_RATE_PER_SEC)
+    target_reached = asyncio.Event()
+    saved = []
+    reserved = 0  # saves in flight + done, so we never save more than target
+
+    pending_urls, pending_saved = [], []
+    report_lock = asyncio.Lock()
+    loop = asyncio.get_running_loop()
+    last_report = loop.time()
+
+    async def report(force=False):
+        # Hands finished work to on_batch in order; the lock keeps batches from interleaving
+        nonlocal last_report
+        if on_batch is None:
+            return
+        async with report_lock:
+            # A run of rejected URLs still reports now and then, so a live job never looks stale
+            due = len(pending_saved) >= PROGRESS_BATCH_SIZE or loop.time() - last_report >= PROGRESS_HEARTBEAT_S
+            if not pending_urls or not (due or force):
+                return
+            batch_urls, batch_saved = pending_urls[:], pending_saved[:]
+            del pending_urls[:], pending_saved[:]
+            last_report = loop.time()
+            await asyncio.to_thread(on_batch, batch_urls, batch_saved)
+
+    limits = httpx.Limits(max_connections=DOWNLOAD_CONCURRENCY, max_keepalive_connections=DOWNLOAD_CONCURRENCY)
+    async with httpx.AsyncClient(headers=headers, timeout=DOWNLOAD_TIMEOUT, limits=limits, follow_redirects=True) as client:
+
+        async def downloader():
+            while not target_reached.is_set():
+                try:
+                    url = url_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                response = None
+                async with host_limits[urllib.parse.urlparse(url).hostname]:
+                    await rate_limiter.acquire()
+                    try:
+                        response = await client.get(url)
+                        response.raise_for_status()
+                    except Exception as e:
+                        print(f"Skipping image: {e}")
+                        response = None
+                if response is None:
+                    pending_urls.append(url)
+                    await report()
+                    continue
+                await content_queue.put((url, response.content))
+
+        async def saver():
+            nonlocal reserved
+            while True:
+                item = await content_queue.get()
+                if item is None:
+                    return
+                if reserved >= target:
+                    continue  # not marked attempted, so a resumed job may still use it
+                url, content = item
+                reserved += 1
+                result = await asyncio.to_thread(_validate_and_save, content, folder, landmark_name)
+                pending_urls.append(url)
+                if result:
+                    saved.append(result)
+                    pending_saved.append(result)
+                    if len(saved) >= target:
+                        target_reached.set()
+                else:
+                    reserved -= 1
+                await report()
+
+        downloaders = [asyncio.create_task(downloader()) for _ in range(DOWNLOAD_CONCURRENCY)]
+        savers = [asyncio.create_task(saver()) for _ in range(SAVE_WORKERS)]
+
+        # Wait until every URL is tried or the target is hit, whichever is first
+        all_downloaded = asyncio.gather(*downloaders)
+        stop = asyncio.create_task(target_reached.wait())
+        await asyncio.wait([all_downloaded, stop], return_when=asyncio.FIRST_COMPLETED)
+        for task in downloaders:
+            task.cancel()
+        stop.cancel()
+        await asyncio.gather(all_downloaded, stop, return_exceptions=True)
+
+        for _ in savers:
+            await content_queue.put(None)
+        await asyncio.gather(*savers)
+        await report(force=True)
+
+    return saved
+
+
+def download_images(urls, folder, target, headers=None, landmark_name=None, skip_urls=None, on_batch=None) -> list:
+    """
+    Synchronous entry point to the download pipeline. Returns (filename, phash)
+    pairs. With landmark_name set, near-duplicates of that landmark's images are
+    skipped. URLs in skip_urls (already attempted by an earlier run) are not fetched.
+    """
+    if skip_urls:
+        urls = [u for u in urls if u not in skip_urls]
+    if target <= 0 or not urls:
+        return []
+    os.makedirs(folder, exist_ok=True)
+    if landmark_name:
+        # Load the landmark's hashes here, so the save threads never touch the DB
+        dedup_index.sync(landmark_name)
+    return asyncio.run(_download_pipeline(urls, folder, target, headers, landmark_name, on_batch))
+
 # --- 3. MAIN SCRAPING FUNCTIONS ---
 
-def scrape_images_from_url_and_save(target_url: str, landmark_name: str, images_to_scrape: int) -> list:
+def scrape_images_from_url_and_save(target_url: str, landmark_name: str, images_to_scrape: int,
+                                    skip_urls=None, on_batch=None) -> list:
     """
-    Scrapes images from a single URL. Returns list of saved filenames.
+    Scrapes images from a single URL. Returns a list of (filename, phash) pairs.
     """
     print(f"\n--- Scraping images from URL: {target_url} for {landmark_name} ---")
     folder = os.path.join(SAVE_ROOT, landmark_name)
     os.makedirs(folder, exist_ok=True)
 
-    initial_count = len(os.listdir(folder))
-    count = initial_count
-    image_idx = initial_count
-    saved_filenames = []
-
     try:
         response = requests.get(target_url, timeout=15, headers=HEADERS)
         response.raise_for_status() 
         soup = BeautifulSoup(response.text, 'html.parser')
-        
-        img_tags = soup.find_all('img')
-        for img_tag in img_tags:
-            if count - initial_count >= images_to_scrape:
-                break
-
-            img_url = img_tag.get('src')
-            if not img_url: continue
-            
-            if not img_url.startswith(('http://', 'https://')):
-                img_url = urllib.parse.urljoin(target_url, img_url)
-
-            try:
-                img_response = requests.get(img_url, timeout=15, headers=HEADERS)
-                img_response.raise_for_status()
-                
-                img = Image.open(BytesIO(img_response.content))
-                if img.mode == 'RGBA': img = img.convert('RGB')
-                if img.width < 100 or img.height < 100: continue
-                
-                base_name = f"{image_idx}.jpg"
-                filename = os.path.join(folder, base_name)
-                while os.path.exists(filename):
-                    image_idx += 1
-                    base_name = f"{image_idx}.jpg"
-                    filename = os.path.join(folder, base_name)
-
-                img.save(filename)
-                saved_filenames.append(base_name)
-                count += 1
-                image_idx += 1
-            except Exception as e:
-                print(f"Skipping image: {e}")
-                continue
     except Exception as e:
         print(f"Error scraping URL {target_url}: {e}")
         return []
 
-    return saved_filenames
+    img_urls = []
+    for img_tag in soup.find_all('img'):
+        img_url = img_tag.get('src')
+        if not img_url: continue
+        if not img_url.startswith(('http://', 'https://')):
+            img_url = urllib.parse.urljoin(target_url, img_url)
+        img_urls.append(img_url)
 
+    return download_images(
+        img_urls, folder, images_to_scrape, headers=HEADERS, landmark_name=landmark_name,
+        skip_urls=skip_urls, on_batch=on_batch
+    )
 
-def scrape_images_for_landmark(landmark_name: str, source_input: str = None, images_to_scrape: int = IMAGES_PER_CLASS_TARGET) -> list:
+
+def scrape_images_for_landmark(landmark_name: str, source_input: str = None, images_to_scrape: int = IMAGES_PER_CLASS_TARGET,
+                               skip_urls=None, on_batch=None) -> list:
     """
-    Scrapes images using URL or Search Engine. Returns list of saved filenames.
+    Scrapes images using URL or Search Engine. Returns a list of (filename, phash) pairs.
+    skip_urls / on_batch are passed to download_images() so background jobs can
+    commit progress as they go and resume without refetching.
     """
+    skip_urls = set(skip_urls or ())
     if source_input and _is_valid_url(source_input):
-        return scrape_images_from_url_and_save(source_input, landmark_name, images_to_scrape)
+        return scrape_images_from_url_and_save(source_input, landmark_name, images_to_scrape, skip_urls, on_batch)
     else:
         folder = os.path.join(SAVE_ROOT, landmark_name)
         os.makedirs(folder, exist_ok=True)
-
-        initial_count = len(os.listdir(folder))
-        count = initial_count
-        image_idx = initial_count
         saved_filenames = []
 
-        search_keywords = DEFAULT_KEYWORDS.get(landmark_name, [landmark_name.replace("_", " ")])
+        search_keywords = list(DEFAULT_KEYWORDS.get(landmark_name, [landmark_name.replace("_", " ")]))
         if source_input: search_keywords.insert(0, source_input)
         
-        unique_keywords = list(set(search_keywords))
+        unique_keywords = list(dict.fromkeys(search_keywords))
 
         with DDGS() as ddgs:
             for kw in unique_keywords:
-                if count - initial_count >= images_to_scrape: break
+                remaining = images_to_scrape - len(saved_filenames)
+                if remaining <= 0: break
                 
-                remaining = images_to_scrape - (count - initial_count)
-                results = ddgs.images(query=kw, max_results=remaining, safesearch="off")
-
-                for r in results:
-                    if count - initial_count >= images_to_scrape: break
-                    try:
-                        img_url = r.get("image")
-                        if not img_url: continue
-
-                        response = requests.get(img_url, timeout=15)
-                        img = Image.open(BytesIO(response.content))
-                        if img.mode == 'RGBA': img = img.convert('RGB')
-                        if img.width < 100 or img.height < 100: continue
-                        
-                        base_name = f"{image_idx}.jpg"
-                        filename = os.path.join(folder, base_name)
-                        while os.path.exists(filename):
-                            image_idx += 1
-                            base_name = f"{image_idx}.jpg"
-                            filename = os.path.join(folder, base_name)
-
-                        img.save(filename)
-                        saved_filenames.append(base_name)
-                        count += 1
-                        image_idx += 1
-                    except Exception as e:
-                        continue
-        return saved_filenames
\ No newline at end of file
+                # Ask for extra results when resuming, since attempted URLs get filtered out
+                results = ddgs.images(query=kw, max_results=remaining + len(skip_urls), safesearch="off")
+                img_urls = [r.get("image") for r in results if r.get("image")]
+                saved_filenames += download_images(
+                    img_urls, folder, remaining, landmark_name=landmark_name,
+                    skip_urls=skip_urls, on_batch=on_batch
+                )
+        return saved_filenames
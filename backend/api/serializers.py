@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Landmark, LandmarkPrediction, LandmarkImage, TrainingRun, ChatMessage
+from .models import Landmark, LandmarkPrediction, LandmarkImage, TrainingRun, ChatMessage, ScrapeJob
 
 # 1. LANDMARK SERIALIZER
 class LandmarkSerializer(serializers.ModelSerializer):
@@ -24,10 +24,26 @@ class TrainingRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainingRun
         fields = [
-            'id', 'model_name', 'image_count', 'epochs', 'accuracy', 
-            'loss', 'status', 'started_at', 'finished_at'
+            'id', 'model_name', 'image_count', 'epochs', 'mode', 'accuracy', 
+            'loss', 'status', 'started_at', 'finished_at', 'model_version',
+            'current_epoch', 'metrics', 'error'
         ]
 
+# 4. SCRAPE JOB SERIALIZER (Progress of background scraping)
+class ScrapeJobSerializer(serializers.ModelSerializer):
+    landmark = serializers.CharField(source='landmark.name', read_only=True)
+    attempted_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ScrapeJob
+        fields = [
+            'id', 'landmark', 'search_query', 'status', 'target', 'saved_count',
+            'attempted_count', 'error', 'started_at', 'updated_at', 'finished_at'
+        ]
+
+    def get_attempted_count(self, obj):
+        return len(obj.attempted_urls)
+
 # 5. CHAT MESSAGE SERIALIZER
 class ChatMessageSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -3,20 +3,31 @@ from pathlib import Path
 import torch
 from torch import nn, optim
 from torch.utils.data import DataLoader, random_split
-from torchvision import datasets, transforms, models
-import json
+from torchvision import transforms, models
+import time
+from . import model_registry
+from .dataset_cache import CachedImageDataset, image_files
+from .export_model import EXPORT_INT8, export_int8
+from .embedding_cache import EMBED_DIM, EmbeddingCache, backbone_state_dict
 
 # ---------------- Config ----------------
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 BASE_DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
-CLASS_NAMES_PATH = os.path.join(MODEL_DIR, "class_names.json")
 BATCH_SIZE = 16
 EPOCHS = 5
 LR = 1e-3
 IMG_SIZE = 224
+# Decoding now happens once in the cache, so workers only slice memmaps + normalise
+NUM_WORKERS = int(os.getenv("TRAIN_DATALOADER_WORKERS", str(min(4, os.cpu_count() or 1))))
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Fast mode: frozen ImageNet backbone, only the fc head is trained on cached embeddings
+HEAD_EPOCHS = 30
+HEAD_BATCH_SIZE = 256
+HEAD_LR = 1e-2
+TRAINING_MODES = ('full', 'fast')
+
 # ---------------- Transforms ----------------
 data_transforms = transforms.Compose([
     transforms.Resize((IMG_SIZE, IMG_SIZE)),
@@ -25,15 +36,51 @@ data_transforms = transforms.Compose([
                          [0.229, 0.224, 0.225])  # std
 ])
 
-def train_model(landmark_name: str):
+def _save_and_publish(version, state_dict, classes, test_files=None):
+    # Each run gets its own checkpoint directory; publishing flips the
+    # active pointer so serving workers hot-swap to it.
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    model_save_path = model_registry.save_artifact(version, state_dict, classes, test_files)
+    if EXPORT_INT8:
+        try:
+            export_int8(version, BASE_DATA_DIR)
+        except Exception as e:
+            # Serving falls back to FP32 when the INT8 variant is missing
+            print(f"INT8 export failed for version {version}: {e}")
+    model_registry.publish(version)
+    print(f"Training complete! Model version {version} saved at {model_save_path}")
+    return version, model_save_path
+
+def _split_lengths(total_len):
+    train_len = int(0.7 * total_len)
+    val_len = int(0.15 * total_len)
+    return train_len, val_len, total_len - train_len - val_len
+
+def train_model(landmark_name: str, version: str = None, on_epoch=None, mode: str = 'full'):
+    """
+    Trains on everything in data/raw and publishes the result as a new
+    immutable model version (see model_registry). Running workers pick it up
+    without a restart.
+
+    mode='full' fine-tunes the whole ResNet-18; mode='fast' only retrains the
+    fc head on cached backbone embeddings (see train_head).
+    on_epoch(metrics) is called after every epoch with {'epoch', 'loss', 'accuracy'}.
+    """
+    if mode == 'fast':
+        return train_head(landmark_name, version=version, on_epoch=on_epoch)
+
     print(f"Starting training for landmark: {landmark_name}")
 
     # DEBUG: See exactly what Python sees on the disk
     disk_folders = [f for f in os.listdir(BASE_DATA_DIR) if os.path.isdir(os.path.join(BASE_DATA_DIR, f))]
     print(f"Folders found on disk: {disk_folders}")
-    # ImageFolder automatically expects subdirectories as classes
-    # e.g., BASE_DATA_DIR/landmark1/, BASE_DATA_DIR/landmark2/
-    full_dataset = datasets.ImageFolder(BASE_DATA_DIR, transform=data_transforms)
+    # Subdirectories are classes, e.g. BASE_DATA_DIR/landmark1/, BASE_DATA_DIR/landmark2/.
+    # Images are decoded and resized once into data/cache/preprocessed; only
+    # files added since the last run are decoded here.
+    cache_start = time.perf_counter()
+    full_dataset = CachedImageDataset(BASE_DATA_DIR)
+    cache_seconds = time.perf_counter() - cache_start
+    print(f"Preprocessed cache synced in {cache_seconds:.1f}s")
     print(f"Classes recognized by PyTorch: {full_dataset.classes}")
     num_classes = len(full_dataset.classes)
     print(f"Total classes to train: {num_classes}") 
@@ -54,9 +101,7 @@ def train_model(landmark_name: str):
         return {'status': 'error', 'message': f'Insufficient image data in {BASE_DATA_DIR}. Need at least 2 images across all landmarks for training.'}
 
     total_len = len(full_dataset)
-    train_len = int(0.7 * total_len)
-    val_len = int(0.15 * total_len)
-    test_len = total_len - train_len - val_len
+    train_len, val_len, test_len = _split_lengths(total_len)
 
     if train_len == 0 or val_len == 0: # Ensure there's data for both train and val
         return {'status': 'error', 'message': f'Not enough data to create proper training and validation sets. Adjust total images or split ratios.'}
@@ -66,8 +111,9 @@ def train_model(landmark_name: str):
         generator=torch.Generator().manual_seed(42)
     )
 
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
+    loader_kwargs = {'num_workers': NUM_WORKERS, 'persistent_workers': NUM_WORKERS > 0}
+    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True, **loader_kwargs)
+    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False, **loader_kwargs)
 
     num_classes = len(full_dataset.classes)
     model = models.resnet18(pretrained=True)
@@ -80,6 +126,7 @@ def train_model(landmark_name: str):
     training_metrics = []
 
     for epoch in range(EPOCHS):
+        epoch_start = time.perf_counter()
         model.train()
         running_loss = 0.0
         for imgs, labels in train_loader:
@@ -105,23 +152,16 @@ def train_model(landmark_name: str):
         training_metrics.append({
             'epoch': epoch + 1,
             'loss': round(epoch_loss, 4),
-            'accuracy': round(val_acc, 4)
+            'accuracy': round(val_acc, 4),
+            'seconds': round(time.perf_counter() - epoch_start, 2)
         })
-        print(f"Epoch [{epoch+1}/{EPOCHS}] Loss: {epoch_loss:.4f} Val Acc: {val_acc:.4f}")
-
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    model_save_path = os.path.join(MODEL_DIR, "landmark_resnet18.pth")
-    torch.save({
-        "model_state_dict": model.state_dict(),
-        "classes": full_dataset.classes
-    }, model_save_path)
-
-    # Save class names to a JSON file
-    with open(CLASS_NAMES_PATH, 'w') as f:
-        json.dump(full_dataset.classes, f)
+        if on_epoch:
+            on_epoch(training_metrics[-1])
+        print(f"Epoch [{epoch+1}/{EPOCHS}] Loss: {epoch_loss:.4f} Val Acc: {val_acc:.4f} Time: {training_metrics[-1]['seconds']}s")
 
-    print(f"Training complete! Model saved at {model_save_path}")
-    print(f"Class names saved at {CLASS_NAMES_PATH}")
+    # The held-out files are recorded so benchmarks can evaluate on exactly them later
+    test_files = [full_dataset.files[i] for i in test_dataset.indices]
+    version, model_save_path = _save_and_publish(version, model.state_dict(), full_dataset.classes, test_files)
 
     final_metrics = {
         'status': 'Complete',
@@ -129,6 +169,109 @@ def train_model(landmark_name: str):
         'total_images_processed': total_len,
         'final_accuracy': training_metrics[-1]['accuracy'] if training_metrics else 0,
         'final_loss': training_metrics[-1]['loss'] if training_metrics else 0,
-        'detailed_metrics': training_metrics
+        'detailed_metrics': training_metrics,
+        'cache_sync_seconds': round(cache_seconds, 2),
+        'model_version': version,
+        'checkpoint_path': model_save_path
     }
     return final_metrics
+
+
+def train_head(landmark_name: str, version: str = None, on_epoch=None):
+    """
+    Fast training mode. The ImageNet backbone stays frozen, so each image's
+    512-d embedding is computed once and cached by file content hash. Adding
+    a landmark only embeds its new images and retrains the linear fc head,
+    which takes seconds instead of a full fine-tune.
+    """
+    print(f"Starting fast (head-only) training for landmark: {landmark_name}")
+
+    paths, path_classes, names = [], [], []
+    for class_name in sorted(os.listdir(BASE_DATA_DIR)):
+        folder = os.path.join(BASE_DATA_DIR, class_name)
+        if not os.path.isdir(folder):
+            continue
+        for fname in image_files(folder):
+            paths.append(os.path.join(folder, fname))
+            path_classes.append(class_name)
+            names.append(f"{class_name}/{fname}")
+
+    embed_start = time.perf_counter()
+    embeddings, ok = EmbeddingCache().embed_files(paths)
+    embed_seconds = time.perf_counter() - embed_start
+    print(f"Embeddings ready in {embed_seconds:.1f}s")
+
+    path_classes = [c for c, good in zip(path_classes, ok) if good]
+    names = [n for n, good in zip(names, ok) if good]
+    classes = sorted(set(path_classes))
+    if landmark_name not in classes:
+        return {
+            'status': 'error',
+            'message': f'Landmark "{landmark_name}" has no readable images in {BASE_DATA_DIR}.'
+        }
+
+    total_len = len(path_classes)
+    train_len, val_len, _ = _split_lengths(total_len)
+    if train_len == 0 or val_len == 0:
+        return {'status': 'error', 'message': f'Not enough data to create proper training and validation sets. Adjust total images or split ratios.'}
+
+    class_to_idx = {c: i for i, c in enumerate(classes)}
+    X = torch.from_numpy(embeddings[ok])
+    y = torch.tensor([class_to_idx[c] for c in path_classes])
+    perm = torch.randperm(total_len, generator=torch.Generator().manual_seed(42))
+    train_idx, val_idx = perm[:train_len], perm[train_len:train_len + val_len]
+
+    head = nn.Linear(EMBED_DIM, len(classes))
+    criterion = nn.CrossEntropyLoss()
+    optimizer = optim.Adam(head.parameters(), lr=HEAD_LR)
+    training_metrics = []
+
+    for epoch in range(HEAD_EPOCHS):
+        epoch_start = time.perf_counter()
+        head.train()
+        running_loss = 0.0
+        shuffled = train_idx[torch.randperm(train_len)]
+        for start in range(0, train_len, HEAD_BATCH_SIZE):
+            batch = shuffled[start:start + HEAD_BATCH_SIZE]
+            optimizer.zero_grad()
+            loss = criterion(head(X[batch]), y[batch])
+            loss.backward()
+            optimizer.step()
+            running_loss += loss.item() * len(batch)
+        epoch_loss = running_loss / train_len
+
+        head.eval()
+        with torch.no_grad():
+            val_acc = (head(X[val_idx]).argmax(1) == y[val_idx]).float().mean().item()
+
+        training_metrics.append({
+            'epoch': epoch + 1,
+            'loss': round(epoch_loss, 4),
+            'accuracy': round(val_acc, 4),
+            'seconds': round(time.perf_counter() - epoch_start, 3)
+        })
+        if on_epoch:
+            on_epoch(training_metrics[-1])
+
+    print(f"Head trained: Loss: {training_metrics[-1]['loss']:.4f} Val Acc: {training_metrics[-1]['accuracy']:.4f}")
+
+    # Frozen backbone + new head = a regular ResNet-18 checkpoint, so the
+    # predict path loads it exactly like a fully fine-tuned one.
+    state_dict = backbone_state_dict()
+    state_dict['fc.weight'] = head.weight.detach().clone()
+    state_dict['fc.bias'] = head.bias.detach().clone()
+    test_files = [names[i] for i in perm[train_len + val_len:].tolist()]
+    version, model_save_path = _save_and_publish(version, state_dict, classes, test_files)
+
+    return {
+        'status': 'Complete',
+        'mode': 'fast',
+        'epochs_run': HEAD_EPOCHS,
+        'total_images_processed': total_len,
+        'final_accuracy': training_metrics[-1]['accuracy'],
+        'final_loss': training_metrics[-1]['loss'],
+        'detailed_metrics': training_metrics,
+        'embedding_seconds': round(embed_seconds, 2),
+        'model_version': version,
+        'checkpoint_path': model_save_path
+    }
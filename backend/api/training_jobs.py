@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from filelock import FileLock, Timeout
+
+# ---------------- Config ----------------
+# Training is CPU-bound and memory hungry, so only this many runs may train
+# at once on a host. Extra requests wait in the queue with status 'queued'.
+MAX_CONCURRENT_TRAINING_JOBS = int(os.getenv("MAX_CONCURRENT_TRAINING_JOBS", "1"))
+SLOT_POLL_SECONDS = 5
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SLOT_LOCK_DIR = os.path.join(BASE_DIR, "models")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    # Runs once in each spawned training process
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # "spawn" keeps the training process clear of the web worker's
+            # threads (batching engine, model watcher) and torch thread pools.
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_CONCURRENT_TRAINING_JOBS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return _executor
+
+
+def _acquire_slot():
+    """
+    Blocks until one of the host-wide training slots is free. The process
+    pool caps jobs per web worker; the slot lock files cap them across all
+    gunicorn workers.
+    """
+    os.makedirs(SLOT_LOCK_DIR, exist_ok=True)
+    while True:
+        for i in range(MAX_CONCURRENT_TRAINING_JOBS):
+            lock = FileLock(os.path.join(SLOT_LOCK_DIR, f".train_slot_{i}.lock"))
+            try:
+                lock.acquire(timeout=0)
+                return lock
+            except Timeout:
+                continue
+        time.sleep(SLOT_POLL_SECONDS)
+
+
+def run_training_job(run_id):
+    """
+    Executes in a training process: trains, streams per-epoch metrics to the
+    run row. Returns the final status written to it, 'success' or 'failed'.
+    """
+    from django.db import close_old_connections
+    from django.utils import timezone
+    from .models import TrainingRun
+    from .train_landmarks import train_model
+
+    close_old_connections()
+    run = TrainingRun.objects.get(pk=run_id)
+
+    slot = _acquire_slot()
+    try:
+        TrainingRun.objects.filter(pk=run_id).update(status='processing')
+        history = []
+
+        def on_epoch(epoch_metrics):
+            history.append(epoch_metrics)
+            TrainingRun.objects.filter(pk=run_id).update(
+                current_epoch=epoch_metrics['epoch'],
+                accuracy=epoch_metrics['accuracy'],
+                loss=epoch_metrics['loss'],
+                metrics=history
+            )
+
+        try:
+            results = train_model(run.model_name, version=f"run_{run_id}", on_epoch=on_epoch, mode=run.mode)
+        except Exception as e:
+            TrainingRun.objects.filter(pk=run_id).update(
+                status='failed', error=str(e), finished_at=timezone.now()
+            )
+            return 'failed'
+
+        if results.get('status') == 'Complete':
+            TrainingRun.objects.filter(pk=run_id).update(
+                status='success',
+                accuracy=results.get('final_accuracy'),
+                loss=results.get('final_loss'),
+                image_count=results.get('total_images_processed'),
+                model_version=results.get('model_version'),
+                checkpoint_path=results.get('checkpoint_path'),
+                finished_at=timezone.now()
+            )
+            return 'success'
+        TrainingRun.objects.filter(pk=run_id).update(
+            status='failed', error=results.get('message'), finished_at=timezone.now()
+        )
+        return 'failed'
+    finally:
+        slot.release()
+
+
+def enqueue_training(run_id):
+    """Queues a TrainingRun (already created with status 'queued') and returns immediately."""
+    future = _get_executor().submit(run_training_job, run_id)
+
+    def _on_done(f):
+        if f.exception() is None:
+            if f.result() != 'success':
+                return
+            # Have summaries ready for every landmark the new model can predict
+            from django.db import close_old_connections
+            from .enrichment import precompute_summaries
+            try:
+                precompute_summaries()
+            finally:
+                close_old_connections()
+            return
+        # The job records its own failures; this catches a crashed process
+        from django.utils import timezone
+        from .models import TrainingRun
+        TrainingRun.objects.filter(pk=run_id).exclude(status__in=['success', 'failed']).update(
+            status='failed', error=str(f.exception()), finished_at=timezone.now()
+        )
+
+    future.add_done_callback(_on_done)
+    return future
@@ -0,0 +1,234 @@
+import os
+import random
+import time
+
+import numpy as np
+
+from .utils.great_circle import haversine_matrix, travel_costs
+
+# ---------------- Config ----------------
+# Up to this many stops the order is solved exactly (Held-Karp, O(2^n * n^2))
+EXACT_MAX_STOPS = int(os.getenv("TRIP_EXACT_MAX_STOPS", "12"))
+# Wall-clock budget for the heuristic on larger trips
+TRIP_TIME_BUDGET_S = float(os.getenv("TRIP_TIME_BUDGET_S", "1.0"))
+# Most a client may ask for per request
+TRIP_MAX_TIME_BUDGET_S = 10.0
+TRIP_MAX_STOPS = 500
+# Iterated local search gives up after this many perturbations in a row find nothing better
+MAX_FAILED_KICKS = 50
+
+_EPS = 1e-9
+
+
+def leg_matrices(lats, lons):
+    """
+    Pairwise distance (km) and travel cost matrices between all points,
+    from the same vectorised haversine and cost model as the distance endpoints.
+    """
+    distances = haversine_matrix(lats, lons, lats, lons)
+    np.fill_diagonal(distances, 0.0)
+    return distances, travel_costs(distances).astype(np.float64)
+
+
+def _path_length(route, weights):
+    route = np.asarray(route)
+    return float(weights[route[:-1], route[1:]].sum())
+
+
+# ── Exact: Held-Karp ─────────────────────────────────────────────────────────
+
+def _held_karp(weights, closed):
+    """
+    Optimal order for node 0 followed by every other node, by dynamic
+    programming over subsets. Each subset-size layer is filled with one
+    NumPy operation per end node. Returns the route as node indices.
+    """
+    n = len(weights) - 1
+    if n == 0:
+        return [0]
+    stops = weights[1:, 1:]
+    full = (1 << n) - 1
+    cost = np.full((1 << n, n), np.inf)
+    parent = np.full((1 << n, n), -1, dtype=np.int16)
+    bits = 1 << np.arange(n)
+    cost[bits, np.arange(n)] = weights[0, 1:]
+
+    masks = np.arange(1 << n)
+    sizes = np.array([bin(m).count("1") for m in range(1 << n)])
+    for size in range(1, n):
+        layer = masks[sizes == size]
+        for j in range(n):
+            sel = layer[(layer & bits[j]) == 0]
+            if not len(sel):
+                continue
+            # cost of ending at i, then moving on to j, for every i in each subset
+            candidates = cost[sel] + stops[:, j]
+            best = np.argmin(candidates, axis=1)
+            cost[sel | bits[j], j] = candidates[np.arange(len(sel)), best]
+            parent[sel | bits[j], j] = best
+
+    final = cost[full] + (weights[1:, 0] if closed else 0.0)
+    j = int(np.argmin(final))
+    order, mask = [], full
+    while j >= 0:
+        order.append(j + 1)
+        mask, j = mask ^ (1 << j), int(parent[mask, j])
+    return [0] + order[::-1]
+
+
+# ── Heuristic: nearest neighbour + 2-opt / Or-opt ────────────────────────────
+
+def _nearest_neighbour(weights):
+    n = len(weights)
+    route, visited = [0], np.zeros(n, dtype=bool)
+    visited[0] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, weights[route[-1]])
+        nxt = int(np.argmin(row))
+        route.append(nxt)
+        visited[nxt] = True
+    return route
+
+
+def _two_opt(r, w, deadline):
+    """
+    Reverses r[i..j] whenever that shortens the route. r starts at node 0 and
+    ends with a sentinel (0 again for a round trip, a zero-cost virtual node
+    for an open one), and neither end ever moves. Vectorised over j.
+    """
+    last = len(r) - 2  # last movable position
+    improved_any, improved = False, True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, last):
+            a, b = r[i - 1], r[i]
+            c, d = r[i + 1:last + 1], r[i + 2:last + 2]
+            delta = w[a, c] + w[b, d] - w[a, b] - w[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -_EPS:
+                j = i + 1 + k
+                r[i:j + 1] = r[i:j + 1][::-1].copy()
+                improved = improved_any = True
+    return improved_any
+
+
+def _or_opt(r, w, deadline, max_segment=3):
+    """
+    Moves a run of 1..max_segment consecutive stops (optionally reversed)
+    to the cheapest other place in the route. Vectorised over insert positions.
+    """
+    last = len(r) - 2
+    improved_any, improved = False, True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length - 1 <= last:
+                s0, s1 = r[i], r[i + length - 1]
+                p, q = r[i - 1], r[i + length]
+                removed = w[p, s0] + w[s1, q] - w[p, q]
+                rest = np.concatenate((r[:i], r[i + length:]))
+                # Insert between rest[k] and rest[k+1], never after the end sentinel
+                a, b = rest[:-1], rest[1:]
+                forward = w[a, s0] + w[s1, b] - w[a, b]
+                backward = w[a, s1] + w[s0, b] - w[a, b]
+                both = np.minimum(forward, backward)
+                k = int(np.argmin(both))
+                if both[k] - removed < -_EPS:
+                    segment = r[i:i + length].copy()
+                    if backward[k] < forward[k]:
+                        segment = segment[::-1]
+                    r[:] = np.concatenate((rest[:k + 1], segment, rest[k + 1:]))
+                    improved = improved_any = True
+                i += 1
+            if time.perf_counter() >= deadline:
+                break
+    return improved_any
+
+
+def _local_search(r, w, deadline):
+    while time.perf_counter() < deadline:
+        moved = _two_opt(r, w, deadline)
+        moved = _or_opt(r, w, deadline) or moved
+        if not moved:
+            break
+    return r
+
+
+def _double_bridge(r, rng):
+    """Cuts the movable part into four pieces A B C D and reorders them A C B D."""
+    last = len(r) - 2
+    i, j, k = sorted(rng.sample(range(2, last + 1), 3))
+    return np.concatenate((r[:i], r[j:k], r[i:j], r[k:]))
+
+
+def _heuristic(weights, closed, deadline, seed=0):
+    """
+    Nearest neighbour, then 2-opt and Or-opt to a local optimum, then
+    iterated local search (double-bridge kicks) until the deadline or
+    MAX_FAILED_KICKS kicks in a row bring nothing better.
+    """
+    n = len(weights)
+    # Sentinel at the end of the route: back to 0, or a virtual node every stop reaches for free
+    w = np.zeros((n + 1, n + 1))
+    w[:n, :n] = weights
+    sentinel = 0 if closed else n
+
+    r = np.array(_nearest_neighbour(weights) + [sentinel])
+    _local_search(r, w, deadline)
+    best, best_len = r.copy(), _path_length(r, w)
+
+    rng = random.Random(seed)
+    failed = 0
+    while n >= 8 and failed < MAX_FAILED_KICKS and time.perf_counter() < deadline:
+        candidate = _double_bridge(best, rng)
+        _local_search(candidate, w, deadline)
+        length = _path_length(candidate, w)
+        if length < best_len - _EPS:
+            best, best_len, failed = candidate, length, 0
+        else:
+            failed += 1
+    return best[:-1].tolist()
+
+
+def plan_route(start, stops, return_to_start=False, objective="distance", time_budget_s=None, seed=0):
+    """
+    Near-optimal order to visit `stops` ((lat, lon) pairs) from `start`.
+    Up to EXACT_MAX_STOPS stops are solved exactly; larger trips use the
+    heuristic within time_budget_s. `objective` picks what is minimised:
+    total km or the summed per-leg cost estimate.
+
+    Returns {"order": indices into stops, "legs": [(km, cost), ...],
+    "total_distance_km", "estimated_cost", "method", "elapsed_ms",
+    "nearest_neighbour_total"} where the last is the plain greedy
+    route's objective, for comparison.
+    """
+    if objective not in ("distance", "cost"):
+        raise ValueError("objective must be 'distance' or 'cost'")
+    if len(stops) > TRIP_MAX_STOPS:
+        raise ValueError(f"At most {TRIP_MAX_STOPS} stops per trip")
+
+    started = time.perf_counter()
+    budget = TRIP_TIME_BUDGET_S if time_budget_s is None else time_budget_s
+    points = [start] + list(stops)
+    distances, costs = leg_matrices([p[0] for p in points], [p[1] for p in points])
+    weights = distances if objective == "distance" else costs
+
+    if len(stops) <= EXACT_MAX_STOPS:
+        route, method = _held_karp(weights, return_to_start), "exact"
+    else:
+        route, method = _heuristic(weights, return_to_start, started + budget, seed), "heuristic"
+
+    path = route + [0] if return_to_start else route
+    legs = [(float(distances[a, b]), float(costs[a, b])) for a, b in zip(path[:-1], path[1:])]
+    greedy = _nearest_neighbour(weights)
+    greedy = greedy + [0] if return_to_start else greedy
+    return {
+        "order": [node - 1 for node in route[1:]],
+        "legs": legs,
+        "total_distance_km": round(sum(km for km, _ in legs), 2),
+        "estimated_cost": round(sum(cost for _, cost in legs), 2),
+        "method": method,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "nearest_neighbour_total": round(_path_length(greedy, weights), 2),
+    }
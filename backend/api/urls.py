@@ -1,14 +1,25 @@
 from django.urls import path
-from .views import LandmarkPredictionView, DistanceCalculatorView, LandmarkListView, ScrapeLandmarkView, BulkImageUploadView, TrainModelView, TrainingHistoryView, LandmarkChatView, FlightDealsView
+from .views import LandmarkPredictionView, DistanceCalculatorView, LandmarkListView, ScrapeLandmarkView, BulkImageUploadView, TrainModelView, TrainingHistoryView, LandmarkChatView, FlightDealsView, ModelStatusView, TrainingRunStatusView, BatchPredictionView, ScrapeJobStatusView, ScrapeJobResumeView, LandmarkSummaryView, FlightCacheStatsView, FlightCalendarView, DistanceMatrixView, NearbyLandmarksView, TripPlanView
 
 urlpatterns = [
     path('predict/', LandmarkPredictionView.as_view(), name='predict_landmark'),
+    path('predict/batch/', BatchPredictionView.as_view(), name='predict_batch'),
+    path('model-status/', ModelStatusView.as_view(), name='model_status'),
     path('distance/', DistanceCalculatorView.as_view(), name='distance_calculator'),
+    path('distance/matrix/', DistanceMatrixView.as_view(), name='distance_matrix'),
+    path('trip-plan/', TripPlanView.as_view(), name='trip_plan'),
     path('landmarks/', LandmarkListView.as_view(), name='landmark_list'),
+    path('landmarks/nearby/', NearbyLandmarksView.as_view(), name='nearby_landmarks'),
+    path('landmarks/<int:landmark_id>/summary/', LandmarkSummaryView.as_view(), name='landmark_summary'),
     path('scrape/', ScrapeLandmarkView.as_view(), name='scrape_landmark'), 
+    path('scrape/<int:job_id>/', ScrapeJobStatusView.as_view(), name='scrape_job_status'),
+    path('scrape/<int:job_id>/resume/', ScrapeJobResumeView.as_view(), name='scrape_job_resume'),
     path('bulk-upload/', BulkImageUploadView.as_view(), name='bulk_image_upload'),
     path('train/', TrainModelView.as_view(), name='train_model'),
+    path('train/<int:run_id>/', TrainingRunStatusView.as_view(), name='training_run_status'),
     path('training-history/', TrainingHistoryView.as_view(), name='training_history'),
     path('chat/', LandmarkChatView.as_view(), name='landmark_chat'),  
     path('flight-deals/', FlightDealsView.as_view(), name='flight_deals'),
+    path('flight-deals/calendar/', FlightCalendarView.as_view(), name='flight_calendar'),
+    path('flight-deals/cache-stats/', FlightCacheStatsView.as_view(), name='flight_cache_stats'),
 ]
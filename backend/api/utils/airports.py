@@ -0,0 +1,86 @@
+import csv
+import os
+import threading
+
+from .prefix_index import PrefixIndex, normalise_name
+from .spatial_index import SphericalIndex
+
+# ---------------- Config ----------------
+AIRPORTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "airports.csv")
+
+
+class AirportIndex:
+    """
+    Bundled offline airport list (api/data/airports.csv) with a spatial index
+    for nearest-airport queries and a prefix index over IATA codes, cities and
+    airport names. Rows earlier in the file win ties, so major hubs come first.
+    """
+
+    def __init__(self, path=AIRPORTS_PATH):
+        self.codes, self.names, self.cities, self.country_codes, self.countries = [], [], [], [], []
+        lats, lons = [], []
+        index_names, index_rows = [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row_id, row in enumerate(csv.DictReader(f)):
+                self.codes.append(row["iata"].upper())
+                self.names.append(row["name"])
+                self.cities.append(row["city"])
+                self.country_codes.append(row["country_code"].lower())
+                self.countries.append(normalise_name(row.get("country") or ""))
+                lats.append(float(row["lat"]))
+                lons.append(float(row["lon"]))
+                for name in (row["iata"], row["city"], row["name"]):
+                    index_names.append(name)
+                    index_rows.append(row_id)
+        self.coords = list(zip(lats, lons))
+        self._rows_by_code = {}
+        for row_id, code in enumerate(self.codes):
+            self._rows_by_code.setdefault(code, row_id)
+        self.spatial = SphericalIndex(lats, lons)
+        self.keywords = PrefixIndex(index_names, index_rows)
+
+    def nearest(self, lat, lon, k=1, max_km=None) -> list:
+        """Up to k (iata, km) pairs closest to (lat, lon), nearest first."""
+        return [(self.codes[r], km) for r, km in self.spatial.nearest(lat, lon, k=k, max_km=max_km)]
+
+    def nearby(self, iata, radius_km, limit=None) -> list:
+        """
+        The airport itself plus other bundled airports within radius_km, as
+        (iata, km) pairs nearest first. Unknown codes come back on their own.
+        """
+        row = self._rows_by_code.get((iata or "").upper())
+        if row is None:
+            return [(iata, 0.0)]
+        found = [(self.codes[r], km) for r, km in self.spatial.within(*self.coords[row], radius_km)]
+        return found[:limit]
+
+    def lookup(self, keyword):
+        """
+        IATA code for an airport code, city or airport name ("Paris", "CDG",
+        "London Heathrow", "Toronto, Canada"), or None. Anything after the first
+        comma must name the country or its code, as in the city gazetteer. Exact
+        matches beat prefixes and the earliest (busiest) matching airport wins.
+        """
+        name, _, hint = keyword.partition(",")
+        hint = normalise_name(hint)
+
+        rows = self.keywords.exact(name)
+        if not rows and len(normalise_name(name)) >= 4:
+            rows = self.keywords.prefix(name, limit=None)
+
+        if hint:
+            rows = [r for r in rows if hint in (self.country_codes[r], self.countries[r])]
+        return self.codes[min(rows)] if rows else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_airport_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AirportIndex()
+    return _index
@@ -0,0 +1,117 @@
+"""
+🛠️ PREDICTION BATCHING BENCHMARK
+
+PURPOSE:
+Measures throughput and latency (p50 / p99) of the batching inference engine
+behind predict_image() for a range of batch windows, against a plain
+one-forward-pass-per-request baseline.
+
+WHEN TO RUN THIS:
+1. Before changing PREDICT_BATCH_WINDOW_MS / PREDICT_MAX_BATCH_SIZE in production.
+2. After upgrading torch or moving to different hardware.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_batching --clients 16 --requests 20
+
+⚠️ CAUTION:
+- Uses a randomly initialised ResNet-18, so no trained checkpoint is needed.
+  Only speed is measured, not accuracy.
+- Keep other heavy processes off the machine while it runs.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from api.inference_engine import BatchingInferenceEngine
+
+NUM_CLASSES = 11
+
+
+def _build_model():
+    model = models.resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
+    model.eval()
+    return model, [f"class_{i}" for i in range(NUM_CLASSES)]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _run_clients(predict_fn, clients, requests_per_client):
+    """Hammers predict_fn from `clients` threads. Returns (latencies_s, wall_s)."""
+    latencies = []
+    lock = threading.Lock()
+    img = torch.rand(3, 224, 224)
+
+    def client():
+        local = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            predict_fn(img)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - start
+
+
+def _report(label, latencies, wall):
+    print(
+        f"{label:<22} throughput={len(latencies) / wall:8.1f} img/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p99={_percentile(latencies, 99) * 1000:7.1f} ms"
+    )
+
+
+def run_benchmark(clients, requests_per_client, windows, max_batch_size):
+    model, classes = _build_model()
+
+    def baseline(img):
+        with torch.no_grad():
+            probs = torch.softmax(model(img.unsqueeze(0)), dim=1)
+            return torch.max(probs, 1)
+
+    # Warm up once so the first measured run does not pay allocator costs
+    baseline(torch.rand(3, 224, 224))
+
+    print(f"\nclients={clients} requests/client={requests_per_client} max_batch={max_batch_size}\n")
+    latencies, wall = _run_clients(baseline, clients, requests_per_client)
+    _report("batch=1 (baseline)", latencies, wall)
+
+    for window in windows:
+        engine = BatchingInferenceEngine(
+            lambda: (model, classes),
+            max_batch_size=max_batch_size,
+            batch_window_ms=window
+        )
+        latencies, wall = _run_clients(engine.predict, clients, requests_per_client)
+        avg_batch = engine.items_run / max(engine.batches_run, 1)
+        _report(f"window={window:g} ms", latencies, wall)
+        print(f"{'':<22} avg batch size={avg_batch:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the batching inference engine")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10, 20])
+    args = parser.parse_args()
+
+    run_benchmark(args.clients, args.requests, args.windows, args.max_batch)
@@ -0,0 +1,84 @@
+"""
+🛠️ TRAINING DATA LOADING BENCHMARK
+
+PURPOSE:
+Compares one epoch of data loading the old way (datasets.ImageFolder decoding
+every JPEG, single-process DataLoader) against the preprocessed uint8 cache
+read through a multi-worker DataLoader. Optionally includes the ResNet-18
+forward/backward pass so the speed-up per training epoch is visible too.
+
+WHEN TO RUN THIS:
+1. After scraping / uploading a large batch of images, to size TRAIN_DATALOADER_WORKERS.
+2. When training epochs feel slow and you want to know if data loading is the bottleneck.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_dataset_cache --epochs 2 --workers 4 [--with-model]
+
+⚠️ CAUTION:
+- Reads the real images under data/raw and builds data/cache/preprocessed if missing.
+- Cache build / sync time is reported separately and is not counted in the cached epochs.
+"""
+
+import argparse
+import time
+
+import torch
+from torch import nn, optim
+from torch.utils.data import DataLoader
+from torchvision import datasets, models
+
+from api.dataset_cache import CachedImageDataset
+from api.train_landmarks import BASE_DATA_DIR, BATCH_SIZE, data_transforms
+
+
+def _run_epoch(loader, model=None, optimizer=None, criterion=None):
+    start = time.perf_counter()
+    images = 0
+    for imgs, labels in loader:
+        if model is not None:
+            optimizer.zero_grad()
+            loss = criterion(model(imgs), labels)
+            loss.backward()
+            optimizer.step()
+        images += imgs.size(0)
+    return time.perf_counter() - start, images
+
+
+def run_benchmark(epochs, workers, with_model):
+    sync_start = time.perf_counter()
+    cached = CachedImageDataset(BASE_DATA_DIR)
+    print(f"Cache sync: {time.perf_counter() - sync_start:.2f}s ({len(cached)} images, {len(cached.classes)} classes)")
+
+    folder = datasets.ImageFolder(BASE_DATA_DIR, transform=data_transforms)
+
+    setups = [
+        ("ImageFolder, workers=0", DataLoader(folder, batch_size=BATCH_SIZE, shuffle=True)),
+        (f"Cache, workers={workers}", DataLoader(
+            cached, batch_size=BATCH_SIZE, shuffle=True,
+            num_workers=workers, persistent_workers=workers > 0
+        )),
+    ]
+
+    for label, loader in setups:
+        model = optimizer = criterion = None
+        if with_model:
+            model = models.resnet18(weights=None)
+            model.fc = nn.Linear(model.fc.in_features, len(cached.classes))
+            optimizer = optim.Adam(model.parameters(), lr=1e-3)
+            criterion = nn.CrossEntropyLoss()
+
+        for epoch in range(epochs):
+            seconds, images = _run_epoch(loader, model, optimizer, criterion)
+            print(f"{label:<24} epoch {epoch + 1}: {seconds:7.2f}s  ({images / seconds:7.1f} img/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the preprocessed training cache")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--with-model", action="store_true")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    run_benchmark(args.epochs, args.workers, args.with_model)
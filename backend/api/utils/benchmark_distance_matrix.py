@@ -0,0 +1,89 @@
+"""
+🛠️ DISTANCE MATRIX BENCHMARK
+
+PURPOSE:
+Compares the per-landmark Python loop (distance.haversine +
+calculate_travel_cost, then a sort) with the vectorised great_circle.py path
+used by /api/distance/matrix/, at 10k and 1M landmarks. It also checks that
+both give the same distances, costs and ordering.
+
+WHEN TO RUN THIS:
+1. After changing utils/great_circle.py or the travel cost model in distance.py.
+2. When the landmark catalogue grows by an order of magnitude.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_distance_matrix
+    python -m api.utils.benchmark_distance_matrix --sizes 10000 1000000 --origins 1 5 --limit 20
+
+⚠️ CAUTION:
+- Landmarks are random points, so only speed and agreement are meaningful.
+- The scalar loop at 1M landmarks and several origins takes a while; it is
+  timed on the first origin only and scaled up.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from api.utils.distance import haversine, calculate_travel_cost
+from api.utils.great_circle import haversine_matrix, travel_costs, nearest_first
+
+
+def _scalar(origin, lats, lons, limit):
+    rows = []
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        d = haversine(origin[0], origin[1], lat, lon)
+        rows.append((d, calculate_travel_cost(d), i))
+    rows.sort()
+    return rows[:limit] if limit else rows
+
+
+def _vectorised(origins, lats, lons, limit):
+    distances = haversine_matrix(origins[:, 0], origins[:, 1], lats, lons)
+    costs = travel_costs(distances)
+    orders = [nearest_first(distances[r], limit) for r in range(len(origins))]
+    return distances, costs, orders
+
+
+def run(size, n_origins, limit, rng):
+    lats = rng.uniform(-60, 70, size)
+    lons = rng.uniform(-180, 180, size)
+    origins = np.column_stack((rng.uniform(-60, 70, n_origins), rng.uniform(-180, 180, n_origins)))
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+
+    start = time.perf_counter()
+    scalar = _scalar(origins[0].tolist(), lat_list, lon_list, limit)
+    scalar_s = (time.perf_counter() - start) * n_origins
+
+    start = time.perf_counter()
+    distances, costs, orders = _vectorised(origins, lats, lons, limit)
+    vector_s = time.perf_counter() - start
+
+    # Agreement on the first origin
+    top = orders[0][:len(scalar)]
+    max_km_diff = float(np.max(np.abs(distances[0, top] - [r[0] for r in scalar])))
+    costs_match = all(int(costs[0, i]) == r[1] for i, r in zip(top.tolist(), scalar))
+    order_match = top.tolist() == [r[2] for r in scalar]
+
+    print(
+        f"{size:>9,} landmarks x {n_origins:>2} origin(s)  scalar {scalar_s * 1000:>10.1f} ms  "
+        f"numpy {vector_s * 1000:>8.1f} ms  speedup {scalar_s / vector_s:>6.1f}x  "
+        f"max diff {max_km_diff:.1e} km  costs {'ok' if costs_match else 'MISMATCH'}  "
+        f"order {'ok' if order_match else 'MISMATCH'}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs vectorised distance matrix")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--origins", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--limit", type=int, default=None, help="Only sort the closest N (as the endpoint's 'limit')")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        for n_origins in args.origins:
+            run(size, n_origins, args.limit, rng)
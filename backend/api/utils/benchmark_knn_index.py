@@ -0,0 +1,89 @@
+"""
+🛠️ K-NN INDEX BENCHMARK
+
+PURPOSE:
+Measures query latency of the embedding nearest-neighbour index (the "knn"
+prediction engine) at 10k, 100k and 1M reference vectors, for brute-force
+(flat) search and IVF-partitioned search. For IVF it also reports recall@k
+against the exact flat results, so speed can be traded against accuracy
+with KNN_IVF_PROBES.
+
+WHEN TO RUN THIS:
+1. Before raising or lowering KNN_IVF_MIN_VECTORS / KNN_IVF_PROBES.
+2. When the reference image catalogue grows by an order of magnitude.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_knn_index --sizes 10000 100000 1000000 --queries 200
+
+⚠️ CAUTION:
+- Uses random 512-d vectors, so only speed and IVF recall are meaningful, not accuracy.
+- 1M vectors need about 2 GB of RAM, and building the IVF partitions takes a while.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from api.embedding_cache import EMBED_DIM
+from api.embedding_index import EmbeddingIndex
+
+
+def _clustered_vectors(n, n_labels, rng):
+    # Points scattered around per-label centres, roughly like real embeddings
+    centres = rng.standard_normal((n_labels, EMBED_DIM)).astype(np.float32)
+    labels = rng.integers(0, n_labels, size=n)
+    vectors = centres[labels] + 0.6 * rng.standard_normal((n, EMBED_DIM)).astype(np.float32)
+    return vectors, labels
+
+
+def _time_queries(index, queries, k, n_probe):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        rows, _ = index.search(q, k, n_probe=n_probe)
+        latencies.append(time.perf_counter() - start)
+        results.append(set(rows.tolist()))
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    return statistics.median(latencies) * 1000, p99 * 1000, results
+
+
+def run_benchmark(sizes, n_queries, k, probes, n_labels):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        vectors, labels = _clustered_vectors(n, n_labels, rng)
+        queries, _ = _clustered_vectors(n_queries, n_labels, rng)
+
+        index = EmbeddingIndex()
+        start = time.perf_counter()
+        for chunk in range(0, n, 100000):
+            index.add(vectors[chunk:chunk + 100000], [f"landmark_{l}" for l in labels[chunk:chunk + 100000]])
+        add_s = time.perf_counter() - start
+        del vectors
+
+        p50, p99, exact = _time_queries(index, queries, k, n_probe=0)
+        print(f"\nN={n:>9,}  add={add_s:6.2f}s")
+        print(f"  flat              p50={p50:8.3f} ms  p99={p99:8.3f} ms")
+
+        start = time.perf_counter()
+        index.build_ivf()
+        print(f"  IVF build ({len(index.centroids)} lists): {time.perf_counter() - start:6.2f}s")
+        for n_probe in probes:
+            p50, p99, approx = _time_queries(index, queries, k, n_probe=n_probe)
+            recall = np.mean([len(a & e) / len(e) for a, e in zip(approx, exact)])
+            print(f"  IVF probes={n_probe:<4}   p50={p50:8.3f} ms  p99={p99:8.3f} ms  recall@{k}={recall:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the k-NN embedding index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--labels", type=int, default=100)
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.queries, args.k, args.probes, args.labels)
@@ -0,0 +1,99 @@
+"""
+🛠️ NEARBY LANDMARKS BENCHMARK
+
+PURPOSE:
+Measures "landmarks near me" query latency at 10k, 100k and 500k landmarks for:
+  - scan:   Python haversine over every row (what a plain table scan costs)
+  - numpy:  one vectorised haversine pass + argpartition (great_circle.py)
+  - kdtree: the SphericalIndex used by api/landmark_index.py
+for k-nearest and radius queries, plus how long the index takes to (re)build
+after a landmark changes. Results from all three are checked to agree.
+
+WHEN TO RUN THIS:
+1. After changing utils/spatial_index.py or api/landmark_index.py.
+2. When the landmark catalogue grows by an order of magnitude.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_nearby
+    python -m api.utils.benchmark_nearby --sizes 10000 100000 500000 --queries 200 --k 10 --radius-km 50
+
+⚠️ CAUTION:
+- Landmarks are random points on land-ish latitudes, so radius hit counts
+  are lower than for real, clustered catalogues.
+- The Python scan is only run on a few queries at the larger sizes.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from api.utils.distance import haversine
+from api.utils.great_circle import haversine_matrix, nearest_first
+from api.utils.spatial_index import SphericalIndex
+
+
+def _time_ms(fn, queries):
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(*q)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run(size, n_queries, k, radius_km, rng):
+    lats = rng.uniform(-60, 70, size)
+    lons = rng.uniform(-180, 180, size)
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+    queries = list(zip(rng.uniform(-60, 70, n_queries).tolist(), rng.uniform(-180, 180, n_queries).tolist()))
+
+    start = time.perf_counter()
+    index = SphericalIndex(lats, lons)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def scan_knn(lat, lon):
+        return sorted(range(size), key=lambda i: haversine(lat, lon, lat_list[i], lon_list[i]))[:k]
+
+    def numpy_knn(lat, lon):
+        return nearest_first(haversine_matrix(lat, lon, lats, lons)[0], k).tolist()
+
+    def tree_knn(lat, lon):
+        return [r for r, _ in index.nearest(lat, lon, k=k)]
+
+    def numpy_radius(lat, lon):
+        d = haversine_matrix(lat, lon, lats, lons)[0]
+        hits = np.flatnonzero(d <= radius_km)
+        return hits[np.argsort(d[hits], kind="stable")].tolist()
+
+    def tree_radius(lat, lon):
+        return [r for r, _ in index.within(lat, lon, radius_km)]
+
+    scan_queries = queries[:max(3, n_queries // (size // 10_000 or 1))]
+    agree = all(numpy_knn(*q) == tree_knn(*q) for q in queries[:20]) \
+        and all(scan_knn(*q) == tree_knn(*q) for q in scan_queries[:3]) \
+        and all(numpy_radius(*q) == tree_radius(*q) for q in queries[:20])
+    hits = statistics.mean(len(tree_radius(*q)) for q in queries[:50])
+
+    print(
+        f"{size:>8,} landmarks  build {build_ms:>7.1f} ms | k={k}: scan {_time_ms(scan_knn, scan_queries):>9.2f} ms  "
+        f"numpy {_time_ms(numpy_knn, queries):>7.3f} ms  kdtree {_time_ms(tree_knn, queries):>6.3f} ms | "
+        f"{radius_km:g} km (~{hits:.1f} hits): numpy {_time_ms(numpy_radius, queries):>7.3f} ms  "
+        f"kdtree {_time_ms(tree_radius, queries):>6.3f} ms | results {'agree' if agree else 'DIFFER'}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark nearby-landmark queries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.radius_km, rng)
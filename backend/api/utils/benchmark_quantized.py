@@ -0,0 +1,159 @@
+"""
+🛠️ FP32 vs INT8 MODEL BENCHMARK & ACCURACY CHECK
+
+PURPOSE:
+Compares the FP32 checkpoint of a model version against its INT8 TorchScript
+export (written after training by api/export_model.py) on:
+  - latency (batch of 1, p50 / p99)
+  - throughput (batched)
+  - memory (file size and RSS growth when loading)
+  - top-1 accuracy on the held-out test split, and top-1 agreement between the two
+
+WHEN TO RUN THIS:
+1. Before switching production to MODEL_VARIANT=int8.
+2. After every retrain, to make sure quantization did not cost too much accuracy.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_quantized [--version run_12] [--runs 100]
+
+⚠️ CAUTION:
+- The held-out images are the ones training recorded in the version's
+  test_split.json; versions trained before it was written cannot be checked
+  for accuracy. Held-out files deleted since training are skipped.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import torch
+from torch.utils.data import DataLoader, Subset
+
+from api import export_model, model_registry
+from api.dataset_cache import CachedImageDataset
+from api.predict import _build_model
+from api.train_landmarks import BASE_DATA_DIR
+from api.utils.worker_metrics import _memory_mb
+
+
+def _load_both(version):
+    rss_before, _ = _memory_mb()
+    checkpoint = torch.load(
+        os.path.join(model_registry.version_dir(version), model_registry.CHECKPOINT_NAME), map_location="cpu"
+    )
+    classes = checkpoint["classes"]
+    fp32 = _build_model(checkpoint["model_state_dict"], len(classes))
+    # Touch every weight so mmap / lazy pages are counted
+    sum(p.sum().item() for p in fp32.parameters())
+    rss_fp32, _ = _memory_mb()
+
+    int8 = export_model.load_int8(version)
+    with torch.no_grad():
+        int8(torch.zeros(1, 3, 224, 224))
+    rss_int8, _ = _memory_mb()
+
+    memory = {
+        "fp32": (os.path.getsize(os.path.join(model_registry.version_dir(version), model_registry.CHECKPOINT_NAME)),
+                 (rss_fp32 or 0) - (rss_before or 0)),
+        "int8": (os.path.getsize(export_model.quantized_path(version)), (rss_int8 or 0) - (rss_fp32 or 0)),
+    }
+    return classes, {"fp32": fp32, "int8": int8}, memory
+
+
+def _latency(net, runs):
+    img = torch.rand(1, 3, 224, 224)
+    times = []
+    with torch.no_grad():
+        for _ in range(5):
+            net(img)
+        for _ in range(runs):
+            start = time.perf_counter()
+            net(img)
+            times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times) * 1000, times[min(len(times) - 1, int(0.99 * len(times)))] * 1000
+
+
+def _throughput(net, batch_size, batches=10):
+    batch = torch.rand(batch_size, 3, 224, 224)
+    with torch.no_grad():
+        net(batch)
+        start = time.perf_counter()
+        for _ in range(batches):
+            net(batch)
+    return batch_size * batches / (time.perf_counter() - start)
+
+
+def _test_split(version, classes):
+    # Recomputing the split would mix in training images once the dataset has grown
+    test_files = model_registry.read_test_split(version)
+    if test_files is None:
+        return None, None
+    dataset = CachedImageDataset(BASE_DATA_DIR)
+    position = {name: i for i, name in enumerate(dataset.files)}
+
+    # Map dataset labels onto the model's class order; drop classes it never saw
+    model_idx = {c: i for i, c in enumerate(classes)}
+    keep = [position[name] for name in test_files
+            if name in position and dataset.classes[dataset.targets[position[name]]] in model_idx]
+    if len(keep) < len(test_files):
+        print(f"{len(test_files) - len(keep)} held-out images are no longer on disk and were skipped")
+    remap = torch.tensor([model_idx.get(c, -1) for c in dataset.classes])
+    return Subset(dataset, keep), remap
+
+
+def _accuracy(nets, test, remap):
+    correct = {name: 0 for name in nets}
+    agree = total = 0
+    with torch.no_grad():
+        for imgs, labels in DataLoader(test, batch_size=32):
+            labels = remap[labels]
+            preds = {name: net(imgs).argmax(1) for name, net in nets.items()}
+            for name in nets:
+                correct[name] += (preds[name] == labels).sum().item()
+            agree += (preds["fp32"] == preds["int8"]).sum().item()
+            total += len(labels)
+    return {name: c / max(total, 1) for name, c in correct.items()}, agree / max(total, 1), total
+
+
+def run_benchmark(version, runs, batch_size):
+    torch.set_num_threads(os.cpu_count() or 1)
+    classes, nets, memory = _load_both(version)
+    print(f"\nModel version {version} ({len(classes)} classes)\n")
+
+    for name, net in nets.items():
+        p50, p99 = _latency(net, runs)
+        tput = _throughput(net, batch_size)
+        size, rss = memory[name]
+        print(
+            f"{name:<5} latency p50={p50:7.2f} ms p99={p99:7.2f} ms  "
+            f"throughput(b={batch_size})={tput:7.1f} img/s  "
+            f"file={size / 1e6:6.1f} MB  rss+={rss:6.1f} MB"
+        )
+
+    test, remap = _test_split(version, classes)
+    if test is None:
+        print(f"\nVersion {version} has no recorded test split; retrain it to measure accuracy.")
+        return
+    accuracy, agreement, total = _accuracy(nets, test, remap)
+    print(f"\nHeld-out images: {total}")
+    print(f"top-1 accuracy  fp32={accuracy['fp32']:.4f}  int8={accuracy['int8']:.4f}")
+    print(f"top-1 agreement fp32 vs int8: {agreement:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FP32 vs INT8 landmark models")
+    parser.add_argument("--version", help="Model version (defaults to the active one)")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    version = args.version or (model_registry.read_active() or {}).get("version")
+    if not version:
+        raise SystemExit("No published model version found. Train a model first.")
+    if not os.path.exists(export_model.quantized_path(version)):
+        raise SystemExit(f"Version {version} has no INT8 export. Run `python -m api.export_model {version}` first.")
+
+    run_benchmark(version, args.runs, args.batch_size)
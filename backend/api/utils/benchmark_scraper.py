@@ -0,0 +1,146 @@
+"""
+🛠️ IMAGE SCRAPER BENCHMARK (LOCAL STUB SERVER)
+
+PURPOSE:
+Measures the concurrent download pipeline in api/scraping_service.py against
+the old one-request-at-a-time loop, without touching the internet. A local
+stub HTTP server serves generated JPEGs with an artificial delay, and every
+Nth request is slow so you can see one bad host stall the sequential loop.
+
+WHEN TO RUN THIS:
+1. After changing the pipeline limits (DOWNLOAD_CONCURRENCY, PER_HOST_CONCURRENCY,
+   GLOBAL_RATE_PER_SEC, SAVE_WORKERS).
+2. To check that the pipeline stops at the target count.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_scraper [--target 250] [--urls 400] [--delay-ms 80] [--hosts 4]
+
+⚠️ CAUTION:
+- Images are written to a temporary folder that is deleted afterwards; data/raw is not touched.
+- --hosts > 1 binds stub servers to 127.0.0.2, 127.0.0.3, ... which works on Linux
+  but not on macOS without extra loopback aliases.
+- The pipeline's global rate limit also applies here, so raise GLOBAL_RATE_PER_SEC
+  if you want to measure raw concurrency.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+from api import scraping_service
+
+
+def _make_jpeg(width=320, height=240):
+    buf = BytesIO()
+    Image.new("RGB", (width, height), (120, 90, 60)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def _start_stub(host, delay, slow_every, slow_delay, body):
+    """Serves `body` for any GET after a delay; every slow_every-th request takes slow_delay."""
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+            time.sleep(slow_delay if slow_every and n % slow_every == 0 else delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def _sequential(urls, folder, target):
+    """The old loop: one requests.get at a time, no shared session."""
+    saved = []
+    for url in urls:
+        if len(saved) >= target:
+            break
+        try:
+            response = requests.get(url, timeout=15)
+            response.raise_for_status()
+            img = Image.open(BytesIO(response.content))
+            if img.width < 100 or img.height < 100:
+                continue
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            idx = len(os.listdir(folder))
+            filename = os.path.join(folder, f"{idx}.jpg")
+            while os.path.exists(filename):
+                idx += 1
+                filename = os.path.join(folder, f"{idx}.jpg")
+            img.save(filename)
+            saved.append(os.path.basename(filename))
+        except Exception:
+            continue
+    return saved
+
+
+def run_benchmark(target, n_urls, delay_ms, hosts, slow_every, slow_ms):
+    body = _make_jpeg()
+    servers = [
+        _start_stub(f"127.0.0.{i + 1}", delay_ms / 1000, slow_every, slow_ms / 1000, body)
+        for i in range(hosts)
+    ]
+    urls = [
+        f"http://{servers[i % hosts][0].server_address[0]}:{servers[i % hosts][0].server_address[1]}/img/{i}.jpg"
+        for i in range(n_urls)
+    ]
+    print(f"\nStub: {hosts} host(s), {delay_ms} ms per request, every {slow_every}th takes {slow_ms} ms")
+    print(f"Candidates: {n_urls} URLs, target: {target} images\n")
+
+    results = {}
+    for name, fn in (("sequential", _sequential), ("pipeline", scraping_service.download_images)):
+        folder = tempfile.mkdtemp(prefix=f"scrape_bench_{name}_")
+        requests_before = sum(c["n"] for _, c in servers)
+        try:
+            start = time.perf_counter()
+            saved = fn(urls, folder, target)
+            elapsed = time.perf_counter() - start
+            on_disk = len(os.listdir(folder))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        fetched = sum(c["n"] for _, c in servers) - requests_before
+        results[name] = elapsed
+        print(
+            f"{name:<10} saved={len(saved):4d} (on disk {on_disk:4d})  requests={fetched:4d}  "
+            f"time={elapsed:7.2f}s  {len(saved) / elapsed:7.1f} img/s"
+        )
+
+    for server, _ in servers:
+        server.shutdown()
+    print(f"\nSpeedup: {results['sequential'] / results['pipeline']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the image download pipeline on a local stub server")
+    parser.add_argument("--target", type=int, default=scraping_service.IMAGES_PER_CLASS_TARGET)
+    parser.add_argument("--urls", type=int, default=400, help="Candidate URLs (more than target, like real search results)")
+    parser.add_argument("--delay-ms", type=float, default=80)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--slow-every", type=int, default=25)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    args = parser.parse_args()
+
+    run_benchmark(args.target, args.urls, args.delay_ms, args.hosts, args.slow_every, args.slow_ms)
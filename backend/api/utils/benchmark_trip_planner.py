@@ -0,0 +1,94 @@
+"""
+🛠️ TRIP PLANNER BENCHMARK
+
+PURPOSE:
+Shows solution quality against runtime for api/trip_planner.py at 10 to 500
+stops. For every trip size it runs the planner at several time budgets and
+reports the route length next to the greedy nearest-neighbour route and the
+best route found (the exact optimum where Held-Karp can solve it, otherwise
+the best result of any budget).
+
+WHEN TO RUN THIS:
+1. Before changing TRIP_TIME_BUDGET_S or TRIP_EXACT_MAX_STOPS.
+2. After changing the 2-opt / Or-opt / kick logic in api/trip_planner.py.
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.benchmark_trip_planner
+    python -m api.utils.benchmark_trip_planner --stops 10 25 50 100 200 500 --budgets 0.05 0.2 1 5 --trips 3
+
+⚠️ CAUTION:
+- Stops are random points, so absolute km are meaningless; compare the gaps.
+- Large budgets x many trips take a while (roughly stops x budgets x trips x budget).
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from api import trip_planner
+
+
+def _random_trip(n, rng):
+    # Clustered like real itineraries: a few regions with stops spread around each
+    centres = np.column_stack((rng.uniform(-40, 60, 6), rng.uniform(-120, 140, 6)))
+    picks = centres[rng.integers(0, len(centres), n + 1)]
+    points = picks + rng.normal(0, 4, (n + 1, 2))
+    return tuple(points[0]), [tuple(p) for p in points[1:]]
+
+
+def _exact_length(start, stops):
+    saved = trip_planner.EXACT_MAX_STOPS
+    trip_planner.EXACT_MAX_STOPS = len(stops)
+    try:
+        return trip_planner.plan_route(start, stops)["total_distance_km"]
+    finally:
+        trip_planner.EXACT_MAX_STOPS = saved
+
+
+def run(n_stops, budgets, n_trips, rng):
+    trips = [_random_trip(n_stops, rng) for _ in range(n_trips)]
+    # Force the heuristic even on small trips so its quality can be checked against the optimum
+    saved = trip_planner.EXACT_MAX_STOPS
+    trip_planner.EXACT_MAX_STOPS = 0
+    try:
+        results = {b: [trip_planner.plan_route(s, stops, time_budget_s=b) for s, stops in trips] for b in budgets}
+    finally:
+        trip_planner.EXACT_MAX_STOPS = saved
+
+    exact = n_stops <= 14
+    if exact:
+        start = time.perf_counter()
+        best = [_exact_length(s, stops) for s, stops in trips]
+        exact_ms = (time.perf_counter() - start) * 1000 / n_trips
+    else:
+        best = [min(results[b][t]["total_distance_km"] for b in budgets) for t in range(n_trips)]
+
+    greedy_gap = statistics.mean(
+        results[budgets[0]][t]["nearest_neighbour_total"] / best[t] - 1 for t in range(n_trips)
+    )
+    header = f"{n_stops:>4} stops  greedy +{greedy_gap * 100:5.1f}%"
+    if exact:
+        header += f"  (exact optimum in {exact_ms:.0f} ms)"
+    else:
+        header += "  (vs best found)"
+    print(header)
+    for b in budgets:
+        gap = statistics.mean(results[b][t]["total_distance_km"] / best[t] - 1 for t in range(n_trips))
+        ms = statistics.mean(r["elapsed_ms"] for r in results[b])
+        print(f"      budget {b:>5g} s -> used {ms:>7.1f} ms  gap +{gap * 100:5.2f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trip planner quality vs runtime")
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 25, 50, 100, 200, 500])
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.05, 0.2, 1.0])
+    parser.add_argument("--trips", type=int, default=3, help="Random trips per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.stops:
+        run(n, sorted(args.budgets), args.trips, rng)
@@ -0,0 +1,114 @@
+"""
+🛠️ OFFLINE GEODATA BUILDER
+
+PURPOSE:
+Regenerates the bundled offline datasets from full public exports, in the
+format the app reads:
+  - api/data/cities.csv   (gazetteer used by utils/user_location.py)
+  - api/data/airports.csv (airport index used by flight_service.py)
+The files shipped in the repo are a hand-picked seed of major places; this
+script swaps in a much bigger list without any code change.
+
+WHEN TO RUN THIS:
+1. When users type origins the seed gazetteer does not know (they still work,
+   but go through Nominatim the first time).
+2. When flight deals fall back to Amadeus for airport codes because no bundled
+   airport is close enough to a landmark or origin.
+
+HOW TO RUN:
+    cd backend
+    # cities15000.txt and countryInfo.txt from https://download.geonames.org/export/dump/
+    python -m api.utils.build_geodata --cities cities15000.txt --country-info countryInfo.txt
+    # airports.csv from https://ourairports.com/data/
+    python -m api.utils.build_geodata --airports airports.csv --country-info countryInfo.txt
+
+⚠️ CAUTION:
+- This overwrites the bundled CSV files. Review the diff before committing.
+- GeoNames data is CC BY 4.0; keep the attribution if you ship the generated file.
+  OurAirports data is public domain.
+"""
+
+import argparse
+import csv
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _country_names(path):
+    """ISO code -> country name from GeoNames countryInfo.txt."""
+    names = {}
+    if not path:
+        return names
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) > 4:
+                names[cols[0]] = cols[4]
+    return names
+
+
+def build_cities(cities_path, country_info_path=None, min_population=15000):
+    countries = _country_names(country_info_path)
+    rows = []
+    with open(cities_path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15 or int(cols[14] or 0) < min_population:
+                continue
+            name, ascii_name, code = cols[1], cols[2], cols[8]
+            aliases = [ascii_name] if ascii_name and ascii_name != name else []
+            rows.append((int(cols[14]), [name, code, countries.get(code, code), cols[4], cols[5], "|".join(aliases)]))
+
+    # Most populous first: the gazetteer prefers earlier rows when names clash
+    rows.sort(key=lambda r: -r[0])
+    target = os.path.join(DATA_DIR, "cities.csv")
+    with open(target, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "country_code", "country", "lat", "lon", "aliases"])
+        writer.writerows(r[1] for r in rows)
+    print(f"Wrote {len(rows)} cities to {target}")
+
+
+def build_airports(airports_path, country_info_path=None, include_medium=True):
+    """Airports with scheduled service and an IATA code, large hubs first."""
+    countries = _country_names(country_info_path)
+    types = {"large_airport": 0, "medium_airport": 1} if include_medium else {"large_airport": 0}
+    rows = []
+    with open(airports_path, newline="", encoding="utf-8") as f:
+        for order, row in enumerate(csv.DictReader(f)):
+            iata = (row.get("iata_code") or "").strip().upper()
+            if len(iata) != 3 or row.get("type") not in types or row.get("scheduled_service") != "yes":
+                continue
+            rows.append((types[row["type"]], order, [
+                iata, row["name"], row.get("municipality") or "", row["iso_country"],
+                countries.get(row["iso_country"], row["iso_country"]), row["latitude_deg"], row["longitude_deg"]
+            ]))
+
+    # The airport index prefers earlier rows when a city has several airports
+    rows.sort(key=lambda r: (r[0], r[1]))
+    target = os.path.join(DATA_DIR, "airports.csv")
+    with open(target, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["iata", "name", "city", "country_code", "country", "lat", "lon"])
+        writer.writerows(r[2] for r in rows)
+    print(f"Wrote {len(rows)} airports to {target}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the bundled offline geodata files")
+    parser.add_argument("--cities", help="GeoNames citiesNNNN.txt")
+    parser.add_argument("--country-info", help="GeoNames countryInfo.txt (for country names)")
+    parser.add_argument("--min-population", type=int, default=15000)
+    parser.add_argument("--airports", help="OurAirports airports.csv")
+    parser.add_argument("--large-only", action="store_true", help="Skip medium airports")
+    args = parser.parse_args()
+
+    if not args.cities and not args.airports:
+        parser.error("Nothing to build: pass --cities and/or --airports")
+    if args.cities:
+        build_cities(args.cities, args.country_info, args.min_population)
+    if args.airports:
+        build_airports(args.airports, args.country_info, include_medium=not args.large_only)
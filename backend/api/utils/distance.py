@@ -1,5 +1,11 @@
 from math import radians, cos, sin, asin, sqrt
 
+# Travel cost model, shared with the vectorised version in great_circle.py
+SHORT_TRIP_KM = 100
+SHORT_TRIP_FARE = 50
+COST_PER_KM = 0.15
+BOOKING_FEE = 45
+
 def haversine(lat1, lon1, lat2, lon2):
     """
     Returns distance in kilometers between two lat/lon points
@@ -18,14 +24,14 @@ def haversine(lat1, lon1, lat2, lon2):
 
 def calculate_travel_cost(distance_km):
     """Returns estimated travel cost based on $0.12 per km"""
-    if distance_km < 100:
-        return 50  # Minimum flat rate for very close travel
+    if distance_km < SHORT_TRIP_KM:
+        return SHORT_TRIP_FARE  # Minimum flat rate for very close travel
     
     # $0.15 per km is the base
-    cost_per_km = 0.15
+    cost_per_km = COST_PER_KM
     estimated_cost = distance_km * cost_per_km
     
     # Add a small fixed "booking & tax" fee of $45
-    total = estimated_cost + 45
+    total = estimated_cost + BOOKING_FEE
     
     return round(total)
\ No newline at end of file
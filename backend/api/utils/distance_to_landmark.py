@@ -5,6 +5,9 @@ import json
 from .user_location import get_user_location
 from .distance import haversine, calculate_travel_cost 
 
+# Origins per vectorised pass, so the matrix and its temporaries stay at this many rows
+MATRIX_CHUNK_ORIGINS = 10
+
 def distance_to_landmark(landmark_instance, origin_city=None):
     """
     Returns a dictionary with distance and estimated cost using a Landmark DB instance.
@@ -32,4 +35,63 @@ def distance_to_landmark(landmark_instance, origin_city=None):
         "estimated_cost": cost,
         "origin_lat": user_lat,
         "origin_lon": user_lon,
-    }
\ No newline at end of file
+    }
+
+
+def _resolve_origin(origin):
+    """An origin is a city name / "Lat: X, Lon: Y" string or a {"lat", "lon"} dict."""
+    if isinstance(origin, dict):
+        try:
+            return float(origin["lat"]), float(origin["lon"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid origin coordinates: {origin}")
+    lat, lon = get_user_location(city_name=origin)
+    if lat is None or lon is None:
+        raise ValueError(f"Could not determine location for: {origin}")
+    return lat, lon
+
+
+def distances_to_landmarks(origins, landmarks, limit=None):
+    """
+    Distance and estimated cost from each origin to every landmark, computed
+    in vectorised passes of MATRIX_CHUNK_ORIGINS origins (see great_circle.py).
+    `landmarks` is a list of (id, name, lat, lon) tuples. Returns one entry per
+    origin with its landmarks sorted nearest first (only the closest `limit` if given).
+    """
+    from .great_circle import haversine_matrix, travel_costs, nearest_first
+
+    # Checked up front so a malformed request fails before any origin is geocoded
+    for i, origin in enumerate(origins):
+        if not isinstance(origin, (str, dict)):
+            raise ValueError(f'Origin {i} must be a place name or a {{"lat", "lon"}} object, not {type(origin).__name__}')
+    if landmarks:
+        ids, names, lats, lons = zip(*landmarks)
+
+    results = []
+    for start in range(0, len(origins), MATRIX_CHUNK_ORIGINS):
+        chunk = origins[start:start + MATRIX_CHUNK_ORIGINS]
+        coords = [_resolve_origin(o) for o in chunk]
+        if not landmarks:
+            results.extend({"origin": o, "origin_lat": lat, "origin_lon": lon, "landmarks": []} for o, (lat, lon) in zip(chunk, coords))
+            continue
+
+        distances = haversine_matrix([c[0] for c in coords], [c[1] for c in coords], lats, lons)
+        costs = travel_costs(distances)
+        for row, (origin, (origin_lat, origin_lon)) in enumerate(zip(chunk, coords)):
+            order = nearest_first(distances[row], limit)
+            results.append({
+                "origin": origin,
+                "origin_lat": origin_lat,
+                "origin_lon": origin_lon,
+                "landmarks": [
+                    {
+                        "id": ids[i],
+                        "name": names[i],
+                        "lat": lats[i],
+                        "lon": lons[i],
+                        "distance_km": round(float(distances[row, i]), 2),
+                        "estimated_cost": int(costs[row, i]),
+                    } for i in order.tolist()
+                ],
+            })
+    return results
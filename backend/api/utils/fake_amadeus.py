@@ -0,0 +1,219 @@
+"""
+🛠️ FAKE AMADEUS CLIENT (OFFLINE FLIGHT SEARCH + CACHE CHECK)
+
+PURPOSE:
+A drop-in stand-in for the amadeus.Client calls used by api/flight_service.py.
+Offers are generated deterministically from the route and date, with an
+optional artificial latency, and every call is counted. The app uses it
+instead of the real client when AMADEUS_FAKE is set.
+Run as a script, it fires concurrent and repeated searches through the
+flight cache and prints how many upstream searches each route really cost.
+
+WHEN TO RUN THIS:
+1. After changing api/flight_cache.py or api/flight_calendar.py, to confirm
+   that N concurrent requests for one route still cost exactly one search,
+   repeats are cache hits and overlapping calendar windows reuse cached days.
+2. To work on the flight-deals UI without Amadeus credentials or quota:
+   AMADEUS_FAKE=1 python manage.py runserver
+
+HOW TO RUN:
+    cd backend
+    python -m api.utils.fake_amadeus
+    python -m api.utils.fake_amadeus --routes YYZ:CDG LHR:JFK DEL:AGR --threads 16 --latency 0.5
+
+⚠️ CAUTION:
+- Prices, airlines and durations are made up. Never point production at it.
+- The check uses an in-memory cache, so data/cache/external is not touched.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+CARRIERS = {
+    "AA": "AMERICAN AIRLINES", "AC": "AIR CANADA", "AF": "AIR FRANCE", "AI": "AIR INDIA",
+    "BA": "BRITISH AIRWAYS", "EK": "EMIRATES", "LH": "LUFTHANSA", "QR": "QATAR AIRWAYS",
+    "SQ": "SINGAPORE AIRLINES", "TK": "TURKISH AIRLINES", "UA": "UNITED AIRLINES",
+}
+
+
+class FakeResponse:
+    """Just the attributes flight_service reads from an amadeus.Response."""
+
+    def __init__(self, data, dictionaries=None):
+        self.data = data
+        self.result = {"data": data, "dictionaries": dictionaries or {}}
+
+
+class _Endpoint:
+    def __init__(self, get):
+        self.get = get
+
+
+class _Namespace:
+    pass
+
+
+class FakeAmadeus:
+    """
+    Mimics client.shopping.flight_offers_search.get and the two
+    reference_data location lookups. Thread-safe; `calls` counts requests per
+    endpoint and `searches` counts offer searches per route.
+    """
+
+    def __init__(self, latency_s=None):
+        self.latency_s = float(os.getenv("AMADEUS_FAKE_LATENCY_S", "0.2")) if latency_s is None else latency_s
+        self.calls = Counter()
+        self.searches = Counter()
+        self._lock = threading.Lock()
+
+        self.shopping = _Namespace()
+        self.shopping.flight_offers_search = _Endpoint(self._flight_offers_search)
+        self.reference_data = _Namespace()
+        self.reference_data.locations = _Endpoint(self._locations)
+        self.reference_data.locations.airports = _Endpoint(self._airports)
+
+    def _count(self, endpoint, route=None):
+        with self._lock:
+            self.calls[endpoint] += 1
+            if route:
+                self.searches[route] += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _airports(self, latitude, longitude, **params):
+        from .airports import get_airport_index
+        self._count("airports")
+        return FakeResponse([{"iataCode": code} for code, _ in get_airport_index().nearest(latitude, longitude, k=5)])
+
+    def _locations(self, keyword, subType=None, **params):
+        from .airports import get_airport_index
+        self._count("locations")
+        code = get_airport_index().lookup(keyword)
+        return FakeResponse([{"iataCode": code}] if code else [])
+
+    def _flight_offers_search(self, originLocationCode, destinationLocationCode, departureDate,
+                              adults=1, max=250, currencyCode="USD", **params):
+        route = f"{originLocationCode}-{destinationLocationCode}"
+        self._count("flight_offers_search", route)
+        if originLocationCode == destinationLocationCode:
+            return FakeResponse([])
+
+        # Same route and date always give the same offers
+        seed = hashlib.sha1(f"{route}:{departureDate}".encode()).hexdigest()
+        rng = random.Random(seed)
+        base_price = rng.uniform(120, 900)
+        offers = []
+        for i in range(rng.randint(2, min(max, 10))):
+            carrier = rng.choice(sorted(CARRIERS))
+            stops = rng.randint(0, 2)
+            minutes = int(base_price / 2) + 90 * stops + rng.randint(0, 240)
+            price = base_price * rng.uniform(0.8, 1.6) * (1.0 - 0.1 * stops)
+            offers.append({
+                "id": str(i + 1),
+                "validatingAirlineCode": carrier,
+                "price": {"total": f"{price:.2f}", "currency": currencyCode},
+                "itineraries": [{
+                    "duration": f"PT{minutes // 60}H{minutes % 60}M",
+                    "segments": [
+                        {"carrierCode": carrier,
+                         "departure": {"iataCode": originLocationCode, "at": f"{departureDate}T08:00:00"},
+                         "arrival": {"iataCode": destinationLocationCode}}
+                    ],
+                }],
+            })
+        offers.sort(key=lambda o: float(o["price"]["total"]))
+        return FakeResponse(offers, {"carriers": {c: CARRIERS[c] for c in {o["validatingAirlineCode"] for o in offers}}})
+
+
+def run_check(routes, threads, latency):
+    from django.test.utils import override_settings
+
+    from api import flight_cache, flight_service
+
+    fake = FakeAmadeus(latency_s=latency)
+    flight_service.amadeus = fake
+    memory_caches = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "check-default"},
+        "external": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "check-external"},
+    }
+    depart_date = "2030-01-15"
+
+    with override_settings(CACHES=memory_caches):
+        flight_cache.clear()
+        for route in routes:
+            origin, dest = route.split(":")
+
+            def search():
+                flight_cache.get_deals(origin, dest, depart_date, "USD", flight_service.search_deals)
+
+            start = time.perf_counter()
+            workers = [threading.Thread(target=search) for _ in range(threads)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(threads):
+                search()
+            warm_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"{origin}->{dest}: {threads} concurrent + {threads} repeated requests -> "
+                f"{fake.searches[f'{origin}-{dest}']} upstream search(es)  "
+                f"cold {cold_ms:.0f} ms, warm {warm_ms / threads:.3f} ms/request"
+            )
+
+        # Hot-route refresh: shrink the TTL so the entry is due for refresh straight away
+        origin, dest = routes[0].split(":")
+        saved = flight_cache.FLIGHT_CACHE_TTL_S, flight_cache.FLIGHT_HOT_HITS, flight_cache.FLIGHT_REFRESH_AHEAD_S
+        flight_cache.FLIGHT_CACHE_TTL_S, flight_cache.FLIGHT_HOT_HITS, flight_cache.FLIGHT_REFRESH_AHEAD_S = 60, 1, 60
+        try:
+            flight_cache.get_deals(origin, "XXX", depart_date, "USD", flight_service.search_deals)
+            before = fake.searches[f"{origin}-XXX"]
+            start = time.perf_counter()
+            flight_cache.get_deals(origin, "XXX", depart_date, "USD", flight_service.search_deals)
+            hit_ms = (time.perf_counter() - start) * 1000
+            time.sleep(latency + 0.2)
+            print(
+                f"hot route {origin}->XXX: hit served in {hit_ms:.2f} ms while "
+                f"{fake.searches[f'{origin}-XXX'] - before} background refresh ran"
+            )
+        finally:
+            flight_cache.FLIGHT_CACHE_TTL_S, flight_cache.FLIGHT_HOT_HITS, flight_cache.FLIGHT_REFRESH_AHEAD_S = saved
+
+        # Fare calendar: 02-04..08 overlaps 02-01..05 by 2 days, so only its 3 new days are searched
+        from api import flight_calendar
+        origin, dest = routes[-1].split(":")
+        for start in ("2030-02-01", "2030-02-04"):
+            before = fake.calls["flight_offers_search"]
+            start_t = time.perf_counter()
+            days = [item for item in flight_calendar.fare_calendar([origin], [dest], flight_calendar.date_window(start, 5))]
+            print(
+                f"calendar {origin}->{dest} from {start}: {len(days) - 1} days in "
+                f"{(time.perf_counter() - start_t) * 1000:.0f} ms, "
+                f"{fake.calls['flight_offers_search'] - before} upstream search(es), cheapest day {days[-1]['cheapest_day']}"
+            )
+
+        print(f"cache stats: {flight_cache.stats()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import django
+
+    parser = argparse.ArgumentParser(description="Exercise the flight cache against the fake Amadeus client")
+    parser.add_argument("--routes", nargs="+", default=["YYZ:CDG", "LHR:JFK", "DEL:AGR"], metavar="ORIGIN:DEST")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per fake API call")
+    args = parser.parse_args()
+
+    os.environ["AMADEUS_FAKE"] = "1"
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    run_check(args.routes, args.threads, args.latency)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from .distance import SHORT_TRIP_KM, SHORT_TRIP_FARE, COST_PER_KM, BOOKING_FEE
+
+EARTH_RADIUS_KM = 6371.0  # same radius as distance.haversine
+
+
+def haversine_matrix(origin_lats, origin_lons, lats, lons) -> np.ndarray:
+    """
+    Great-circle distances in km from every origin to every point, as an
+    (n_origins, n_points) float64 array. Same formula as distance.haversine,
+    evaluated with NumPy broadcasting instead of a Python loop.
+    """
+    o_lat = np.radians(np.atleast_1d(np.asarray(origin_lats, dtype=np.float64)))[:, None]
+    o_lon = np.radians(np.atleast_1d(np.asarray(origin_lons, dtype=np.float64)))[:, None]
+    p_lat = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+    p_lon = np.radians(np.asarray(lons, dtype=np.float64))[None, :]
+
+    a = np.sin((p_lat - o_lat) / 2) ** 2 + np.cos(o_lat) * np.cos(p_lat) * np.sin((p_lon - o_lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def travel_costs(distance_km) -> np.ndarray:
+    """distance.calculate_travel_cost over a whole array (same rounding, same flat short-trip fare)."""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    costs = np.round(distance_km * COST_PER_KM + BOOKING_FEE)
+    return np.where(distance_km < SHORT_TRIP_KM, SHORT_TRIP_FARE, costs).astype(np.int64)
+
+
+def nearest_first(distances, limit=None) -> np.ndarray:
+    """
+    Indices of a 1-D distance array sorted nearest first. With a limit only
+    the closest `limit` are sorted (argpartition), which is O(n) instead of
+    O(n log n) on large catalogues.
+    """
+    n = len(distances)
+    if limit is None or limit >= n:
+        return np.argsort(distances, kind="stable")
+    if limit <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(distances, limit - 1)[:limit]
+    return top[np.argsort(distances[top], kind="stable")]
@@ -0,0 +1,33 @@
+import hashlib
+import os
+import tempfile
+
+# Hex digits of the SHA-1 kept in the filename (80 bits; collisions are not a practical concern)
+NAME_DIGITS = 20
+
+
+def _publish(folder, tmp_path, digest, ext):
+    """Moves a finished temp file to its content-addressed name. Returns the filename."""
+    filename = f"{digest[:NAME_DIGITS]}{ext}"
+    # os.replace is atomic; two writers with the same content simply write the same file
+    os.replace(tmp_path, os.path.join(folder, filename))
+    return filename
+
+
+def store_image_bytes(folder, data: bytes, ext=".jpg") -> str:
+    """
+    Writes an image under a name derived from its content and returns the
+    filename. No directory scan or counter is needed, so naming is O(1)
+    and parallel writers never collide.
+    """
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _publish(folder, tmp_path, hashlib.sha1(data).hexdigest(), ext)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
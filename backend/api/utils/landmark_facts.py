@@ -4,7 +4,7 @@ def get_landmark_facts(landmark_name):
     title = landmark_name.replace("_", " ")
     url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + title
 
-    resp = requests.get(url, headers={"User-Agent": "location-finder"})
+    resp = requests.get(url, headers={"User-Agent": "location-finder"}, timeout=10)
     if resp.status_code != 200:
         return None
 
@@ -0,0 +1,48 @@
+import re
+import unicodedata
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalise_name(text: str) -> str:
+    """'  São Paulo ' -> 'sao paulo'. Accents, case and punctuation are ignored for matching."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text.casefold()).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalised names with the row each one points to. Exact
+    and prefix lookups are binary searches (np.searchsorted), so a lookup
+    costs O(log n) with no per-name Python objects kept around.
+    """
+
+    def __init__(self, names, rows):
+        pairs = sorted((normalise_name(n), r) for n, r in zip(names, rows) if normalise_name(n))
+        self._keys = np.array([k for k, _ in pairs] or [""], dtype=str)
+        self._rows = np.array([r for _, r in pairs] or [-1], dtype=np.int32)
+        self.size = len(pairs)
+
+    def _range(self, lo_key, hi_key):
+        lo = int(np.searchsorted(self._keys, lo_key, side="left"))
+        hi = int(np.searchsorted(self._keys, hi_key, side="left"))
+        return self._rows[lo:hi]
+
+    def exact(self, name) -> list:
+        """Rows whose name matches exactly (after normalisation), in index order."""
+        key = normalise_name(name)
+        if not key or self.size == 0:
+            return []
+        # numpy strips trailing NULs, so use \x01: it sorts after key and before "key ..."
+        return list(dict.fromkeys(self._range(key, key + "\x01").tolist()))
+
+    def prefix(self, text, limit=10) -> list:
+        """Rows whose name starts with text, de-duplicated, at most `limit`."""
+        key = normalise_name(text)
+        if not key or self.size == 0:
+            return []
+        # U+FFFF sorts after every character that can follow the prefix
+        return list(dict.fromkeys(self._range(key, key + "\uffff").tolist()))[:limit]
@@ -9,6 +9,8 @@ WHEN TO RUN THIS:
 ⚠️ CAUTION:
 - This will permanently delete files, so make a backup if you're unsure.
 - It uses perceptual hashing (via the 'imagehash' library) to identify duplicates, which is more robust than simple file hashing for images.
+- New scrapes and bulk uploads are already checked against api/dedup_index.py at ingest time,
+  so this is only needed for images that were added before that or copied in by hand.
 - Run this from the backend root folder to ensure it correctly accesses the 'data/raw/' directory.
 """
 import os
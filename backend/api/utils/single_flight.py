@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Request coalescing: while a call for a key is in flight, further callers
+    for the same key get that call's result instead of starting their own.
+    Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn, *args, **kwargs):
+        """Runs fn on the calling thread, or waits for the call already running for key."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def submit(self, executor, key, fn, *args, **kwargs) -> Future:
+        """Runs fn on executor, unless a call for key is already in flight. Returns its Future."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future
+            # Registered under the lock, so the task cannot finish (and forget) before this line
+            future = self._calls[key] = executor.submit(self._run, key, fn, args, kwargs)
+            return future
+
+    def _run(self, key, fn, args, kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._forget(key)
+
+    def _forget(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
@@ -0,0 +1,60 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_unit_vectors(lats, lons) -> np.ndarray:
+    """(n,) latitudes/longitudes in degrees -> (n, 3) points on the unit sphere."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def _km_to_chord(km):
+    # Anything past half the circumference is the whole sphere
+    return 2.0 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+class SphericalIndex:
+    """
+    k-d tree (scipy cKDTree) over points on the unit sphere. Straight-line
+    (chord) distance between unit vectors grows monotonically with great-circle
+    distance, so nearest-neighbour and radius queries in 3D give the same
+    answers as haversine would, without the lon wrap-around or pole problems
+    of a tree built on raw lat/lon. Distances are returned in km.
+    """
+
+    def __init__(self, lats, lons):
+        self.size = len(lats)
+        self._tree = cKDTree(to_unit_vectors(lats, lons)) if self.size else None
+
+    def nearest(self, lat, lon, k=1, max_km=None) -> list:
+        """Up to k (row, km) pairs closest to (lat, lon), nearest first."""
+        if self._tree is None:
+            return []
+        k = min(k, self.size)
+        bound = _km_to_chord(max_km) if max_km is not None else np.inf
+        chords, rows = self._tree.query(to_unit_vectors([lat], [lon])[0], k=k, distance_upper_bound=bound)
+        chords, rows = np.atleast_1d(chords), np.atleast_1d(rows)
+        # Missing neighbours come back as distance inf / row == size
+        found = rows < self.size
+        return list(zip(rows[found].tolist(), _chord_to_km(chords[found]).tolist()))
+
+    def within(self, lat, lon, radius_km) -> list:
+        """All (row, km) pairs within radius_km of (lat, lon), nearest first."""
+        if self._tree is None:
+            return []
+        point = to_unit_vectors([lat], [lon])[0]
+        rows = self._tree.query_ball_point(point, _km_to_chord(radius_km))
+        if not rows:
+            return []
+        rows = np.asarray(rows)
+        km = _chord_to_km(np.linalg.norm(self._tree.data[rows] - point, axis=1))
+        order = np.argsort(km, kind="stable")
+        return list(zip(rows[order].tolist(), km[order].tolist()))
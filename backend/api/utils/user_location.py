@@ -1,11 +1,144 @@
+import csv
+import os
 import requests
 import re
+import threading
+
+from .prefix_index import PrefixIndex, normalise_name
+from .ttl_cache import TTLCache
+
+# ---------------- Config ----------------
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cities.csv")
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODE_TIMEOUT_S = float(os.getenv("GEOCODE_TIMEOUT_S", "5"))
+# "Not found" answers are kept for less time than real ones
+GEOCODE_NEGATIVE_TTL_S = 3600
+
+# Hot origins, answered without touching the file cache
+_memory_cache = TTLCache(maxsize=4096, ttl=6 * 3600)
+_NOT_FOUND = "none"
+
+
+class Gazetteer:
+    """
+    Bundled offline list of major cities (api/data/cities.csv) with a prefix
+    index over names and aliases. Rows earlier in the file win ties, so the
+    file is ordered roughly by importance.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.names, self.country_codes, self.countries, self.coords = [], [], [], []
+        index_names, index_rows = [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row_id, row in enumerate(csv.DictReader(f)):
+                self.names.append(row["name"])
+                self.country_codes.append(row["country_code"].lower())
+                self.countries.append(normalise_name(row["country"]))
+                self.coords.append((float(row["lat"]), float(row["lon"])))
+                for name in [row["name"]] + [a for a in row.get("aliases", "").split("|") if a]:
+                    index_names.append(name)
+                    index_rows.append(row_id)
+        self.index = PrefixIndex(index_names, index_rows)
+
+    def lookup(self, query):
+        """
+        (lat, lon) for "City" or "City, Country", else None. Anything after the
+        first comma must name the country (or its code); otherwise the query is
+        left to Nominatim, since "Portland, Maine" is not a country hint we can check.
+        """
+        name, _, hint = query.partition(",")
+        hint = normalise_name(hint)
+
+        rows = self.index.exact(name)
+        if not rows and len(normalise_name(name)) >= 4:
+            # Accept a prefix ("san fran") only when it points at a single city
+            candidates = self.index.prefix(name, limit=2)
+            rows = candidates if len(candidates) == 1 else []
+
+        if hint:
+            rows = [r for r in rows if hint in (self.country_codes[r], self.countries[r])]
+        return self.coords[rows[0]] if rows else None
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+def _nominatim(city_name):
+    """Returns (lat, lon), None if Nominatim has no match. Raises on network errors."""
+    headers = {'User-Agent': 'LocationFinderApp/1.0'}
+    response = requests.get(
+        NOMINATIM_URL,
+        params={"q": city_name, "format": "json", "limit": 1},
+        headers=headers,
+        timeout=GEOCODE_TIMEOUT_S
+    )
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None
+    print(f"DEBUG Nominatim: '{city_name}' → {results[0]['lat']}, {results[0]['lon']} ({results[0]['display_name']})")
+    return float(results[0]['lat']), float(results[0]['lon'])
+
+
+def geocode_city(city_name):
+    """
+    City name -> (lat, lon) or None. Checked in order: in-process LRU,
+    offline gazetteer, the persistent 'external' cache, then Nominatim.
+    """
+    key = normalise_name(city_name)
+    if not key:
+        return None
+
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return None if cached == _NOT_FOUND else cached
+
+    coords = get_gazetteer().lookup(city_name)
+    if coords:
+        _memory_cache.set(key, coords)
+        return coords
+
+    from django.core.cache import caches
+    shared = caches["external"]
+    cache_key = f"geocode:{key}"
+    cached = shared.get(cache_key)
+    if cached is None:
+        try:
+            coords = _nominatim(city_name)
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            # Not cached, so the next request tries again
+            print(f"Geocoding error: {e}")
+            return None
+        if coords:
+            cached = coords
+            shared.set(cache_key, cached)
+        else:
+            cached = _NOT_FOUND
+            shared.set(cache_key, cached, GEOCODE_NEGATIVE_TTL_S)
+
+    if cached == _NOT_FOUND:
+        _memory_cache.set(key, _NOT_FOUND, GEOCODE_NEGATIVE_TTL_S)
+        return None
+    coords = tuple(cached)
+    _memory_cache.set(key, coords)
+    return coords
+
 
 def get_user_location(city_name=None):
     """
     Returns (latitude, longitude) by either:
     1. Parsing coordinate strings ("Lat: X, Lon: Y")
-    2. Geocoding city names using Nominatim
+    2. Geocoding city names (gazetteer / cache / Nominatim, see geocode_city)
     """
     if not city_name:
         return None, None
@@ -21,15 +154,7 @@ def get_user_location(city_name=None):
             print(f"Coordinate parsing error: {e}")
 
     # 2. Handle City Name Geocoding (typed by user)
-    try:
-        url = f"https://nominatim.openstreetmap.org/search?q={city_name}&format=json&limit=1"
-        headers = {'User-Agent': 'LocationFinderApp/1.0'}
-        response = requests.get(url, headers=headers).json()
-        
-        if response:
-            print(f"DEBUG Nominatim: '{city_name}' → {response[0]['lat']}, {response[0]['lon']} ({response[0]['display_name']})")
-            return float(response[0]['lat']), float(response[0]['lon'])
-    except Exception as e:
-        print(f"Geocoding error: {e}")
-
-    return None, None
\ No newline at end of file
+    coords = geocode_city(city_name)
+    if coords:
+        return coords
+    return None, None
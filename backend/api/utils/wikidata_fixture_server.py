@@ -0,0 +1,171 @@
+"""
+🛠️ WIKIDATA FIXTURE SERVER (RECORD / REPLAY TEST HARNESS)
+
+PURPOSE:
+A local stand-in for the Wikidata API used by api/landmark_management.py.
+  - record: proxies every request to the real Wikidata API and saves the
+    responses to a JSON fixture file.
+  - replay: answers only from the fixture file, with no network access.
+With --check it also runs the landmark lookup against itself and prints how
+many Wikidata calls each landmark needed, cold and then warm from the cache.
+
+WHEN TO RUN THIS:
+1. After changing the Wikidata search / coordinate logic, to make sure a
+   lookup still costs at most one search call and one batched wbgetentities call.
+2. To develop offline: serve the fixtures and point WIKIDATA_API at them.
+
+HOW TO RUN:
+    cd backend
+    # record fixtures once (needs internet)
+    python -m api.utils.wikidata_fixture_server --record --check eiffel_tower taj_mahal pyramids_of_giza
+    # replay them offline (api/fixtures/wikidata.json already covers these three)
+    python -m api.utils.wikidata_fixture_server --check eiffel_tower taj_mahal pyramids_of_giza
+    # or serve them for the app: WIKIDATA_API=http://127.0.0.1:8765/w/api.php
+    python -m api.utils.wikidata_fixture_server --port 8765
+
+⚠️ CAUTION:
+- --check uses an in-memory cache, so your real data/cache/external entries are
+  neither read nor changed.
+- Replay answers 404 to any request that was not recorded; record again after
+  changing request parameters.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+import requests
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from django.test.utils import override_settings
+
+from api import landmark_management
+
+UPSTREAM = "https://www.wikidata.org/w/api.php"
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "wikidata.json")
+
+
+def _fixture_key(query_string):
+    # Parameter order does not matter to Wikidata, so it must not matter here
+    return urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(query_string)))
+
+
+class FixtureServer:
+    def __init__(self, fixture_path, record=False, port=0):
+        self.fixture_path = fixture_path
+        self.record = record
+        self.requests = []
+        self._lock = threading.Lock()
+        self.fixtures = {}
+        if os.path.exists(fixture_path):
+            with open(fixture_path) as f:
+                self.fixtures = json.load(f)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.urlparse(self.path).query
+                status, body = server.respond(query)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/w/api.php"
+
+    def respond(self, query_string):
+        key = _fixture_key(query_string)
+        with self._lock:
+            self.requests.append(dict(urllib.parse.parse_qsl(query_string)))
+            if key in self.fixtures:
+                return 200, self.fixtures[key]
+        if not self.record:
+            return 404, {"error": f"No fixture recorded for {key}"}
+
+        resp = requests.get(f"{UPSTREAM}?{query_string}", headers=landmark_management.HEADERS, timeout=15)
+        resp.raise_for_status()
+        with self._lock:
+            self.fixtures[key] = resp.json()
+            self._save()
+        return 200, self.fixtures[key]
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.fixture_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.fixture_path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.fixtures, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.fixture_path)
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+def _resolve(name):
+    """Same lookup order as get_or_create_landmark, without touching the DB."""
+    result = landmark_management._search_wikidata(name)
+    if not result:
+        for alias in landmark_management.ALIASES.get(name, []):
+            result = landmark_management._search_wikidata(alias.replace(" ", "_"))
+            if result:
+                break
+    return result
+
+
+def run_check(server, names):
+    memory_caches = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "check-default"},
+        "external": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "check-external"},
+    }
+    landmark_management.WIKIDATA_API = server.url
+    with override_settings(CACHES=memory_caches):
+        for name in names:
+            calls = []
+            for _ in ("cold", "warm"):
+                before = len(server.requests)
+                result = _resolve(name)
+                calls.append([r.get("action") for r in server.requests[before:]])
+            print(
+                f"{name:<25} -> {(result['wikidata_id'] if result else '-'):<10} "
+                f"cold calls={len(calls[0])} {calls[0]}  warm calls={len(calls[1])}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record / replay Wikidata API fixtures")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--record", action="store_true", help="Proxy unknown requests to Wikidata and save them")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--check", nargs="+", metavar="LANDMARK", help="Resolve these landmarks against the server")
+    args = parser.parse_args()
+
+    fixture_server = FixtureServer(args.fixtures, record=args.record, port=0 if args.check else args.port).start()
+    if args.check:
+        run_check(fixture_server, args.check)
+        fixture_server.stop()
+    else:
+        print(f"Serving Wikidata fixtures at {fixture_server.url} ({'record' if args.record else 'replay'} mode)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            fixture_server.stop()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+# Per-process metrics for the prediction worker. Each gunicorn worker keeps
+# its own copy, so /api/model-status/ reports on whichever worker served it.
+_metrics = {
+    "worker_started_at": time.time(),
+    "model_load_ms": None,
+    "model_preloaded": False,
+    "warmup_ms": None,
+    "time_to_first_prediction_ms": None,
+    "first_prediction_latency_ms": None,
+    "predictions": 0,
+}
+
+
+def mark_worker_started():
+    """Call right after fork so timings are measured from this worker's boot."""
+    _metrics["worker_started_at"] = time.time()
+    _metrics["time_to_first_prediction_ms"] = None
+    _metrics["first_prediction_latency_ms"] = None
+    _metrics["predictions"] = 0
+
+
+def record_model_load(seconds):
+    _metrics["model_load_ms"] = round(seconds * 1000, 1)
+
+
+def mark_model_preloaded():
+    _metrics["model_preloaded"] = True
+
+
+def record_warmup(seconds):
+    _metrics["warmup_ms"] = round(seconds * 1000, 1)
+
+
+def record_prediction(latency_seconds):
+    _metrics["predictions"] += 1
+    if _metrics["first_prediction_latency_ms"] is None:
+        _metrics["first_prediction_latency_ms"] = round(latency_seconds * 1000, 1)
+        _metrics["time_to_first_prediction_ms"] = round(
+            (time.time() - _metrics["worker_started_at"]) * 1000, 1
+        )
+
+
+def _memory_mb():
+    """
+    Returns (rss_mb, shared_mb) from /proc where available. Shared pages are
+    what preloaded / memory-mapped weights show up as across workers.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = f.read().split()[:3]
+        page_mb = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        return round(int(resident) * page_mb, 1), round(int(shared) * page_mb, 1)
+    except (OSError, ValueError):
+        pass
+
+    # macOS fallback: peak RSS only (reported in bytes there)
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round(peak / divisor, 1), None
+    except ImportError:
+        return None, None
+
+
+def snapshot() -> dict:
+    rss_mb, shared_mb = _memory_mb()
+    return {
+        "pid": os.getpid(),
+        "rss_mb": rss_mb,
+        "shared_mb": shared_mb,
+        "uptime_s": round(time.time() - _metrics["worker_started_at"], 1),
+        **{k: v for k, v in _metrics.items() if k != "worker_started_at"},
+    }
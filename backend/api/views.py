@@ -2,24 +2,41 @@ from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Landmark, LandmarkPrediction, LandmarkImage, TrainingRun, ChatMessage
-from .serializers import LandmarkSerializer, TrainingRunSerializer
-
-from api.utils.distance_to_landmark import distance_to_landmark
-from api.utils.landmark_facts import get_landmark_facts
-from api.utils.gemini_summary import generate_summary
-from .predict import predict_image
+from .models import Landmark, LandmarkPrediction, LandmarkImage, TrainingRun, ChatMessage, ScrapeJob, TripPlan
+from .serializers import LandmarkSerializer, TrainingRunSerializer, ScrapeJobSerializer
+
+from api.utils.distance_to_landmark import distance_to_landmark, distances_to_landmarks
+from api.utils.user_location import get_user_location
+from .predict import predict_image, predict_images, current_model_version, PREDICTION_ENGINES
+from .preprocessing import InvalidImageError
+from .embedding_index import IndexNotReadyError
+from api.utils import worker_metrics
+from .enrichment import summary_fields
+from .landmark_index import get_landmark_index, nearby_landmarks
+from .trip_planner import plan_route, TRIP_MAX_STOPS, TRIP_TIME_BUDGET_S, TRIP_MAX_TIME_BUDGET_S
+from .image_ingest import ingest_uploads, discard_saved
+from .parsers import StreamingMultiPartParser
 import os
 from django.conf import settings
-from .scraping_service import scrape_images_for_landmark 
+from .scraping_service import IMAGES_PER_CLASS_TARGET
+from .scrape_jobs import enqueue_scrape, resume_scrape
 from .landmark_management import get_or_create_landmark 
-from .train_landmarks import train_model
-from .flight_service import get_flight_deals
+from .train_landmarks import EPOCHS, HEAD_EPOCHS, TRAINING_MODES
+from .training_jobs import enqueue_training
+from .flight_service import get_flight_deals, resolve_route
+from .flight_calendar import fare_calendar, date_window, airports_for, CALENDAR_MAX_DAYS, CALENDAR_MAX_SEARCHES
+from . import flight_cache
+import datetime
 from google import genai
 from django.db import transaction
+from django.http import StreamingHttpResponse
+import json
+import time
 
 
 class BulkImageUploadView(APIView):
+    parser_classes = [StreamingMultiPartParser]
+
     def post(self, request, *args, **kwargs):
         landmark_name = request.data.get('landmark_name')
         if not landmark_name:
@@ -36,91 +53,91 @@ class BulkImageUploadView(APIView):
         upload_dir = os.path.join(settings.BASE_DIR.parent, 'data', 'raw', landmark_name_sanitized)
         os.makedirs(upload_dir, exist_ok=True)
 
-        # 3. Determine naming convention (highest number + 1)
-        uploaded_count = 0
-        existing_files = os.listdir(upload_dir)
-        highest_num = 0
-        for fname in existing_files:
-            try:
-                name_without_ext = os.path.splitext(fname)[0]
-                if name_without_ext.isdigit():
-                    highest_num = max(highest_num, int(name_without_ext))
-            except ValueError:
-                pass
-        
-        next_image_idx = highest_num + 1
-
-        # 4. Process Files
-        for key, file_obj in request.FILES.items():
-            if key.startswith('file'):
-                try:
-                    # Construct file system path
-                    new_filename = f"{next_image_idx}.jpg"
-                    file_path = os.path.join(upload_dir, new_filename)
-                    
-                    # Save physical file
-                    with open(file_path, 'wb+') as destination:
-                        for chunk in file_obj.chunks():
-                            destination.write(chunk)
-
-                    # 5. Create Database Entry for the image
-                    LandmarkImage.objects.create(
+        # 3. Validate, downsample and re-encode on the ingest pool. Files were
+        #    streamed to temp files by the parser, so memory stays bounded.
+        uploads = [file_obj for key, file_obj in request.FILES.items() if key.startswith('file')]
+        if not uploads:
+            return Response({'error': 'No files uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = None
+        try:
+            report = ingest_uploads(landmark_name_sanitized, upload_dir, uploads)
+
+            # 4. One bulk insert for the whole request
+            with transaction.atomic():
+                LandmarkImage.objects.bulk_create([
+                    LandmarkImage(
                         landmark=landmark_instance,
                         # Saving the relative path for easy access
                         image=f"data/raw/{landmark_name_sanitized}/{new_filename}",
                         source='UPLOAD',
-                        user=request.user if request.user.is_authenticated else None
-                    )
+                        user=request.user if request.user.is_authenticated else None,
+                        phash=phash
+                    ) for new_filename, phash in report['saved']
+                ], batch_size=500)
+        except Exception as e:
+            # Nothing was recorded, so drop the stored files and let the same images be uploaded again
+            if report:
+                discard_saved(landmark_name_sanitized, upload_dir, report['saved'])
+            return Response({'error': f'Failed to upload images: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-                    uploaded_count += 1
-                    next_image_idx += 1 
-                except Exception as e:
-                    return Response({'error': f'Failed to upload {file_obj.name}: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        if uploaded_count == 0:
-            return Response({'error': 'No files uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
+        uploaded_count = len(report['saved'])
+        if uploaded_count == 0 and report['duplicates'] == 0:
+            return Response({
+                'error': 'No valid images uploaded.',
+                'invalid_files': [{'name': name, 'error': err} for name, err in report['invalid']]
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             'message': f'Successfully uploaded {uploaded_count} images for {landmark_name}.', 
-            'uploaded_count': uploaded_count
+            'uploaded_count': uploaded_count,
+            'duplicate_count': report['duplicates'],
+            'invalid_files': [{'name': name, 'error': err} for name, err in report['invalid']]
         }, status=status.HTTP_200_OK)
 
 
 class TrainModelView(APIView):
     def post(self, request):
         landmark_name = request.data.get('landmark_name')
-        
+        # 'fast' retrains only the classifier head on cached embeddings (seconds, not minutes)
+        mode = request.data.get('mode', 'full')
+        if not landmark_name:
+            return Response({'error': 'Landmark name is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in TRAINING_MODES:
+            return Response({'error': f'Unknown training mode "{mode}".'}, status=status.HTTP_400_BAD_REQUEST)
+
         # 1. Create the run log entry first
         run_log = TrainingRun.objects.create(
             model_name=f"{landmark_name}",
-            epochs=5,
-            status='processing'
+            epochs=HEAD_EPOCHS if mode == 'fast' else EPOCHS,
+            mode=mode,
+            status='queued'
         )
 
         try:
-            # 2. Start the training process
-            results = train_model(landmark_name)
-
-            if results.get('status') == 'Complete':
-                # 3. Explicitly save stats to the database
-                run_log.accuracy = results.get('final_accuracy')
-                run_log.loss = results.get('final_loss')
-                run_log.image_count = results.get('total_images_processed')
-                run_log.status = 'success'
-                run_log.finished_at = timezone.now()
-                run_log.save()
-                
-                return Response(results, status=status.HTTP_200_OK)
-            else:
-                run_log.status = 'failed'
-                run_log.save()
-                return Response({'error': results.get('message')}, status=status.HTTP_400_BAD_REQUEST)
-
+            # 2. Hand the run to the background training queue and return right away.
+            #    Progress is polled from /api/train/<run_id>/.
+            enqueue_training(run_log.id)
         except Exception as e:
             run_log.status = 'failed'
+            run_log.error = str(e)
             run_log.save()
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        return Response({
+            'run_id': run_log.id,
+            'status': run_log.status
+        }, status=status.HTTP_202_ACCEPTED)
+
+class TrainingRunStatusView(APIView):
+    def get(self, request, run_id):
+        # Polled by the admin UI while a run is queued / processing
+        try:
+            run = TrainingRun.objects.get(pk=run_id)
+        except TrainingRun.DoesNotExist:
+            return Response({'error': 'Training run not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(TrainingRunSerializer(run).data, status=status.HTTP_200_OK)
+
 class TrainingHistoryView(APIView):
     def get(self, request):
         # Returns the 5 most recent training runs
@@ -133,18 +150,22 @@ class LandmarkPredictionView(APIView):
         image_file = request.FILES.get('file')
         if not image_file: return Response({'error': 'No image'}, status=400)
 
+        # Optional override of PREDICTION_ENGINE, e.g. to compare "classifier" and "knn"
+        engine = request.data.get('engine')
+        if engine and engine not in PREDICTION_ENGINES:
+            return Response({'error': f'Unknown prediction engine "{engine}".'}, status=400)
+
         try:
-            prediction = predict_image(image_file.read())
+            prediction = predict_image(image_file.read(), engine=engine)
             name = prediction['label']
             landmark = Landmark.objects.get(name=name)
-            
-            if not landmark.summary:
-                facts = get_landmark_facts(name)
-                landmark.summary = generate_summary(name, facts)
-                landmark.save()
+
+            # Never waits on Wikipedia / Gemini: a missing summary is generated in the
+            # background and the client polls /api/landmarks/<id>/summary/ for it
+            summary = summary_fields(landmark)
 
             # Save the "Prediction Report"
-            # This stores the history for the user
+            # This stores the history for the user (a pending summary is filled in later)
             LandmarkPrediction.objects.create(
                 user=request.user if request.user.is_authenticated else None,
                 predicted_landmark=landmark,
@@ -152,24 +173,138 @@ class LandmarkPredictionView(APIView):
                 summary_at_prediction=landmark.summary
             )
 
-            return Response({
+            response = {
                 'id': landmark.id,
                 'name': landmark.name,
                 'latitude': landmark.latitude,
                 'longitude': landmark.longitude,
-                'summary': landmark.summary,
+                **summary,
                 'confidence': prediction['confidence']
-            }, status=200)
-
+            }
+            if 'top_k' in prediction:
+                response['top_k'] = prediction['top_k']
+            if 'timings' in prediction:
+                response['timings'] = prediction['timings']
+            return Response(response, status=200)
+
+        except InvalidImageError as e:
+            return Response({'error': str(e)}, status=400)
+        except IndexNotReadyError as e:
+            return Response({'error': str(e)}, status=503)
         except Landmark.DoesNotExist:
             return Response({'error': 'Landmark not in database'}, status=404)
 
+class BatchPredictionView(APIView):
+    # One forward pass per request, so keep batches to a size the CPU handles comfortably
+    MAX_FILES = 64
+
+    def post(self, request):
+        # Files in upload order, whatever field names the client used
+        files = [f for _, file_list in request.FILES.lists() for f in file_list]
+        if not files:
+            return Response({'error': 'No images'}, status=400)
+        if len(files) > self.MAX_FILES:
+            return Response({'error': f'Too many images (max {self.MAX_FILES} per request).'}, status=400)
+
+        engine = request.data.get('engine')
+        if engine and engine not in PREDICTION_ENGINES:
+            return Response({'error': f'Unknown prediction engine "{engine}".'}, status=400)
+
+        try:
+            predictions = predict_images([f.read() for f in files], engine=engine)
+        except IndexNotReadyError as e:
+            return Response({'error': str(e)}, status=503)
+
+        # Resolve every predicted landmark with one query
+        labels = {p['label'] for p in predictions if 'label' in p}
+        landmarks = Landmark.objects.in_bulk(list(labels), field_name='name')
+
+        user = request.user if request.user.is_authenticated else None
+        results, prediction_rows = [], []
+        for idx, (file_obj, prediction) in enumerate(zip(files, predictions)):
+            result = {'index': idx, 'filename': file_obj.name}
+            landmark = landmarks.get(prediction.get('label'))
+            if 'error' in prediction:
+                result['error'] = prediction['error']
+            elif landmark is None:
+                result['error'] = 'Landmark not in database'
+            else:
+                result.update({
+                    'id': landmark.id,
+                    'name': landmark.name,
+                    'latitude': landmark.latitude,
+                    'longitude': landmark.longitude,
+                    **summary_fields(landmark),
+                    'confidence': prediction['confidence']
+                })
+                if 'top_k' in prediction:
+                    result['top_k'] = prediction['top_k']
+                if 'timings' in prediction:
+                    result['timings'] = prediction['timings']
+                prediction_rows.append(LandmarkPrediction(
+                    user=user,
+                    predicted_landmark=landmark,
+                    confidence=prediction['confidence'],
+                    summary_at_prediction=landmark.summary
+                ))
+            results.append(result)
+
+        LandmarkPrediction.objects.bulk_create(prediction_rows)
+        return Response({'results': results}, status=200)
+
+class ModelStatusView(APIView):
+    def get(self, request):
+        # Memory and first-prediction timings for the worker serving this request
+        metrics = worker_metrics.snapshot()
+        try:
+            metrics['model_version'] = current_model_version()
+        except FileNotFoundError:
+            metrics['model_version'] = None
+        return Response(metrics, status=status.HTTP_200_OK)
+
 class LandmarkListView(APIView):
     def get(self, request, *args, **kwargs):
         landmarks = Landmark.objects.all()
         serializer = LandmarkSerializer(landmarks, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK) 
 
+class NearbyLandmarksView(APIView):
+    def get(self, request):
+        # ?lat=..&lon=.. (or ?origin_city=..), optional radius_km and k
+        params = request.query_params
+        try:
+            if params.get('lat') is not None and params.get('lon') is not None:
+                lat, lon = float(params['lat']), float(params['lon'])
+            else:
+                lat, lon = get_user_location(city_name=params.get('origin_city'))
+            radius_km = float(params['radius_km']) if params.get('radius_km') else None
+            k = int(params.get('k', 10))
+        except (TypeError, ValueError):
+            return Response({"error": "lat, lon, radius_km and k must be numbers"}, status=400)
+        if lat is None or lon is None:
+            return Response({"error": "Send lat and lon, or an origin_city we can locate"}, status=400)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return Response({"error": "lat/lon out of range"}, status=400)
+
+        start = time.perf_counter()
+        results = nearby_landmarks(lat, lon, radius_km=radius_km, k=k)
+        return Response({
+            "origin_lat": lat,
+            "origin_lon": lon,
+            "radius_km": radius_km,
+            "results": results,
+            "query_ms": round((time.perf_counter() - start) * 1000, 3),
+        }, status=status.HTTP_200_OK)
+
+class LandmarkSummaryView(APIView):
+    def get(self, request, landmark_id):
+        # Polled by the client after a prediction returned summary_status 'pending'
+        try:
+            landmark = Landmark.objects.get(pk=landmark_id)
+        except Landmark.DoesNotExist:
+            return Response({'error': 'Landmark not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'id': landmark.id, 'name': landmark.name, **summary_fields(landmark)}, status=status.HTTP_200_OK)
+
 class ScrapeLandmarkView(APIView):
     def post(self, request, *args, **kwargs):
         landmark_name = request.data.get('landmark_name')
@@ -182,31 +317,44 @@ class ScrapeLandmarkView(APIView):
         if not landmark_instance:
             return Response({'error': f'Could not find or create landmark "{landmark_name}".'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # 1. Record the job first, then scrape in the background. Images are
+        #    committed in batches as they are saved; progress is polled from /api/scrape/<job_id>/.
+        job = ScrapeJob.objects.create(
+            landmark=landmark_instance,
+            search_query=search_query,
+            user=request.user if request.user.is_authenticated else None,
+            target=IMAGES_PER_CLASS_TARGET
+        )
         try:
-            # The service now returns the list of filenames as intended
-            scraped_filenames = scrape_images_for_landmark(landmark_instance.name, search_query)
-            
-            # Use bulk_create for much faster database insertion
-            image_objects = [
-                LandmarkImage(
-                    landmark=landmark_instance,
-                    image=f"data/raw/{landmark_instance.name}/{fname}",
-                    source='SCRAPED',
-                    user=request.user if request.user.is_authenticated else None
-                ) for fname in scraped_filenames
-            ]
-            
-            with transaction.atomic():
-                LandmarkImage.objects.bulk_create(image_objects)
-
-            return Response({
-                'message': f'Scraped {len(scraped_filenames)} images for {landmark_name}.', 
-                'scraped_count': len(scraped_filenames)
-            }, status=status.HTTP_200_OK)
-
+            enqueue_scrape(job.id)
         except Exception as e:
+            ScrapeJob.objects.filter(pk=job.id).update(status='failed', error=str(e))
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        return Response({
+            'job_id': job.id,
+            'status': job.status
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ScrapeJobStatusView(APIView):
+    def get(self, request, job_id):
+        try:
+            job = ScrapeJob.objects.select_related('landmark').get(pk=job_id)
+        except ScrapeJob.DoesNotExist:
+            return Response({'error': 'Scrape job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ScrapeJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ScrapeJobResumeView(APIView):
+    def post(self, request, job_id):
+        if not ScrapeJob.objects.filter(pk=job_id).exists():
+            return Response({'error': 'Scrape job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # Only failed or interrupted jobs; already attempted URLs are skipped
+        if not resume_scrape(job_id):
+            return Response({'error': 'Scrape job is finished or still running.'}, status=status.HTTP_409_CONFLICT)
+        return Response({'job_id': job_id, 'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
 
 class DistanceCalculatorView(APIView):
     def post(self, request):
@@ -235,6 +383,122 @@ class DistanceCalculatorView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
+class DistanceMatrixView(APIView):
+    # Max origins per request; each one is a full row over every landmark
+    MAX_ORIGINS = 50
+    # Landmarks returned per origin, unless the client asks for a different number (up to MAX_LIMIT)
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 200
+
+    def post(self, request):
+        # One or many origins -> their nearest landmarks, sorted by distance, in a single call
+        origins = request.data.get('origins')
+        if origins is None and request.data.get('origin_city'):
+            origins = [request.data.get('origin_city')]
+        if not origins or not isinstance(origins, list):
+            return Response({"error": "Send 'origin_city' or a list of 'origins'"}, status=400)
+        if len(origins) > self.MAX_ORIGINS:
+            return Response({"error": f"At most {self.MAX_ORIGINS} origins per request"}, status=400)
+
+        try:
+            limit = int(request.data.get('limit', self.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be a number"}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1"}, status=400)
+        limit = min(limit, self.MAX_LIMIT)
+
+        landmarks = get_landmark_index().rows
+        try:
+            results = distances_to_landmarks(origins, landmarks, limit=limit)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({"results": results}, status=200)
+
+class TripPlanView(APIView):
+    def post(self, request):
+        # Start (origin_city or origin_lat/origin_lon) + landmarks (names or ids) -> visiting order
+        requested = request.data.get('landmarks')
+        if not requested or not isinstance(requested, list):
+            return Response({"error": "Send a list of 'landmarks' (names or ids)"}, status=400)
+        if len(requested) > TRIP_MAX_STOPS:
+            return Response({"error": f"At most {TRIP_MAX_STOPS} landmarks per trip"}, status=400)
+
+        origin = request.data.get('origin_city') or ''
+        try:
+            if request.data.get('origin_lat') is not None and request.data.get('origin_lon') is not None:
+                start = float(request.data['origin_lat']), float(request.data['origin_lon'])
+            else:
+                start = get_user_location(city_name=origin)
+            time_budget_s = min(float(request.data.get('time_budget_s') or TRIP_TIME_BUDGET_S), TRIP_MAX_TIME_BUDGET_S)
+        except (TypeError, ValueError):
+            return Response({"error": "origin_lat, origin_lon and time_budget_s must be numbers"}, status=400)
+        if start[0] is None or start[1] is None:
+            return Response({"error": f"Could not determine location for: {origin}"}, status=400)
+
+        # Same name formatting as DistanceCalculatorView; ints are landmark ids
+        keys = list(dict.fromkeys(
+            item if isinstance(item, int) else str(item).lower().replace(" ", "_") for item in requested
+        ))
+        found = {}
+        for landmark in Landmark.objects.filter(id__in=[k for k in keys if isinstance(k, int)]):
+            found[landmark.id] = landmark
+        for landmark in Landmark.objects.filter(name__in=[k for k in keys if isinstance(k, str)]):
+            found[landmark.name] = landmark
+        missing = [k for k in keys if k not in found]
+        if missing:
+            return Response({"error": f"Landmarks not found: {missing}"}, status=404)
+        landmarks = list({l.id: l for l in (found[k] for k in keys)}.values())
+
+        return_to_start = str(request.data.get('return_to_start', '')).lower() in ('1', 'true', 'yes')
+        objective = request.data.get('objective', 'distance')
+        try:
+            plan = plan_route(
+                start, [(l.latitude, l.longitude) for l in landmarks],
+                return_to_start=return_to_start, objective=objective, time_budget_s=time_budget_s
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        stops = []
+        for (km, cost), index in zip(plan['legs'], plan['order']):
+            landmark = landmarks[index]
+            stops.append({
+                "id": landmark.id, "name": landmark.name, "lat": landmark.latitude, "lon": landmark.longitude,
+                "leg_km": round(km, 2), "leg_cost": cost,
+            })
+        result = {
+            "origin_lat": start[0],
+            "origin_lon": start[1],
+            "stops": stops,
+            "return_leg_km": round(plan['legs'][-1][0], 2) if return_to_start else None,
+            "total_distance_km": plan['total_distance_km'],
+            "estimated_cost": plan['estimated_cost'],
+            "objective": objective,
+            "method": plan['method'],
+            "elapsed_ms": plan['elapsed_ms'],
+            "nearest_neighbour_total": plan['nearest_neighbour_total'],
+        }
+
+        if str(request.data.get('save', '')).lower() in ('1', 'true', 'yes'):
+            with transaction.atomic():
+                trip = TripPlan.objects.create(
+                    user=request.user if request.user.is_authenticated else None,
+                    origin=origin,
+                    start_latitude=start[0],
+                    start_longitude=start[1],
+                    stops=stops,
+                    return_to_start=return_to_start,
+                    objective=objective,
+                    method=plan['method'],
+                    total_distance_km=plan['total_distance_km'],
+                    estimated_cost=plan['estimated_cost'],
+                )
+                trip.landmarks.set(landmarks)
+            result['trip_plan_id'] = trip.id
+
+        return Response(result, status=200)
+
 # Configure your Gemini API Key here
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -300,13 +564,75 @@ class FlightDealsView(APIView):
         lon = request.data.get('lon')
         origin_lat = request.data.get('origin_lat')
         origin_lon = request.data.get('origin_lon')
+        depart_date = request.data.get('depart_date')
+        currency = request.data.get('currency', 'USD')
 
         # 2. Validation
         if not destination_name and not lat:
             return Response({"error": "Destination name or coordinates are required"}, status=400)
+        if depart_date:
+            try:
+                datetime.date.fromisoformat(depart_date)
+            except (TypeError, ValueError):
+                return Response({"error": "depart_date must be YYYY-MM-DD"}, status=400)
 
         # 3. Call the service (we will update the service to handle both)
         # If we have lat/lng, we use them for pinpoint accuracy
-        deals = get_flight_deals(destination_name, origin, lat, lon, origin_lat, origin_lon)
+        deals = get_flight_deals(destination_name, origin, lat, lon, origin_lat, origin_lon,
+                                 depart_date=depart_date, currency=currency)
         
-        return Response(deals)
\ No newline at end of file
+        return Response(deals)
+
+class FlightCalendarView(APIView):
+    def post(self, request):
+        # Same route inputs as FlightDealsView, plus a window of departure dates
+        destination_name = request.data.get('destination')
+        lat = request.data.get('lat')
+        lon = request.data.get('lon')
+        currency = request.data.get('currency') or 'USD'
+        include_nearby = str(request.data.get('nearby', '')).lower() in ('1', 'true', 'yes')
+
+        if not destination_name and not lat:
+            return Response({"error": "Destination name or coordinates are required"}, status=400)
+        if not isinstance(currency, str) or len(currency) != 3 or not currency.isalpha():
+            return Response({"error": "currency must be a 3-letter ISO code such as USD"}, status=400)
+        currency = currency.upper()
+        try:
+            start_date = request.data.get('start_date') or (datetime.date.today() + datetime.timedelta(days=14)).isoformat()
+            days = int(request.data.get('days', 7))
+            dates = date_window(start_date, days)
+        except (TypeError, ValueError):
+            return Response({"error": f"start_date must be YYYY-MM-DD and days a number up to {CALENDAR_MAX_DAYS}"}, status=400)
+
+        origin_iata, dest_iata = resolve_route(
+            destination_name, request.data.get('origin', 'LON'), lat, lon,
+            request.data.get('origin_lat'), request.data.get('origin_lon')
+        )
+        if not origin_iata or not dest_iata:
+            return Response({"error": f"Could not resolve airports — origin: {origin_iata}, dest: {dest_iata}"}, status=400)
+        if origin_iata == dest_iata:
+            return Response({"error": f"Origin and destination resolved to the same airport ({origin_iata})."}, status=400)
+
+        origins = airports_for(origin_iata, include_nearby)
+        destinations = airports_for(dest_iata, include_nearby)
+        searches = len(dates) * len(origins) * len(destinations)
+        if searches > CALENDAR_MAX_SEARCHES:
+            return Response({
+                "error": f"{len(dates)} days x {len(origins) * len(destinations)} airport pairs is {searches} searches; "
+                         f"at most {CALENDAR_MAX_SEARCHES} per request. Ask for fewer days or leave out nearby airports."
+            }, status=400)
+
+        def stream():
+            # One JSON object per line: the route, one line per day as it completes, then 'done'
+            yield json.dumps({"type": "route", "origins": origins, "destinations": destinations, "dates": dates, "currency": currency}) + "\n"
+            for item in fare_calendar(origins, destinations, dates, currency):
+                yield json.dumps(item) + "\n"
+
+        response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+        response["Cache-Control"] = "no-cache"
+        return response
+
+class FlightCacheStatsView(APIView):
+    def get(self, request):
+        # Hit/miss counters of the worker serving this request
+        return Response(flight_cache.stats(), status=status.HTTP_200_OK)
\ No newline at end of file
@@ -138,6 +138,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Caches
+# 'external' holds responses from third-party APIs (Wikidata, geocoding, ...).
+# It is file based so entries survive restarts and are shared by all gunicorn workers.
+EXTERNAL_CACHE_TTL_S = env.int('EXTERNAL_CACHE_TTL_S', default=7 * 24 * 3600)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'external': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(PROJECT_ROOT, 'data', 'cache', 'external'),
+        'TIMEOUT': EXTERNAL_CACHE_TTL_S,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Uploads
+# Bulk image uploads are streamed to temp files (api/parsers.py), so allowing
+# many files per request does not mean holding them in memory
+DATA_UPLOAD_MAX_NUMBER_FILES = env.int('DATA_UPLOAD_MAX_NUMBER_FILES', default=1000)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
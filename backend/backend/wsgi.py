@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# With gunicorn's preload_app this runs once in the master before forking
+if os.getenv('PRELOAD_MODEL') == '1':
+    from api.predict import preload_model
+    preload_model()
@@ -0,0 +1,26 @@
+# Gunicorn settings (picked up automatically when gunicorn runs from backend/)
+import os
+
+# Load the Django app — and with it the landmark model — once in the master,
+# then fork workers that share the already-mapped weights.
+os.environ.setdefault("PRELOAD_MODEL", "1")
+preload_app = os.environ["PRELOAD_MODEL"] == "1"
+
+
+def post_fork(server, worker):
+    from api.utils import worker_metrics
+    worker_metrics.mark_worker_started()
+
+
+def post_worker_init(worker):
+    # Runs in each worker after the app is loaded, before it accepts requests
+    from api.predict import warmup_model
+    from api.utils import worker_metrics
+
+    warmup_model()
+    stats = worker_metrics.snapshot()
+    worker.log.info(
+        f"Worker {stats['pid']} ready: rss={stats['rss_mb']} MB shared={stats['shared_mb']} MB "
+        f"model_load={stats['model_load_ms']} ms preloaded={stats['model_preloaded']} "
+        f"warmup={stats['warmup_ms']} ms"
+    )